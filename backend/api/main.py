@@ -23,6 +23,7 @@ async def lifespan(app: FastAPI):
     app.state.assistant = assistant
     logger.info("MusicAssistant listo")
     yield
+    await assistant.close()
     logger.info("API detenida")
 
 
@@ -1,6 +1,7 @@
 """
 Endpoints de chat: POST /chat (síncrono) y POST /chat/stream (SSE).
 """
+import asyncio
 import json
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import StreamingResponse
@@ -35,23 +36,45 @@ async def chat_stream(body: ChatRequest, request: Request):
     """
     Server-Sent Events para chat con respuesta en streaming visual.
 
-    Emite dos eventos SSE:
+    Eventos SSE:
+      data: {"type": "token", "content": "<fragmento>"}   (0..n, según genera Gemini)
       data: {"type": "text",  "content": "<respuesta completa>"}
       data: {"type": "done",  "actions": [...], "success": true/false}
 
-    En el futuro, cuando MusicAgentService soporte streaming nativo de Gemini,
-    este endpoint emitirá múltiples eventos "token" en lugar de un único "text".
+    Los "token" solo llegan cuando la respuesta sale del agente en streaming
+    (no desde caché ni comandos directos). El "text" final es siempre la
+    respuesta definitiva: puede añadir enlaces o datos de playlist al final.
     """
     assistant: MusicAssistant = request.app.state.assistant
 
     async def generate():
+        # on_partial recibe el texto acumulado; a la cola solo va lo nuevo.
+        # None marca el fin de la petición (con éxito o con error).
+        queue: asyncio.Queue = asyncio.Queue()
+        streamed = {"len": 0}
+
+        async def on_partial(text: str):
+            delta = text[streamed["len"]:]
+            streamed["len"] = len(text)
+            if delta:
+                queue.put_nowait(delta)
+
+        task = asyncio.create_task(
+            assistant.chat(_uid(body.user_id), body.message, on_partial=on_partial)
+        )
+        task.add_done_callback(lambda _: queue.put_nowait(None))
         try:
-            response = await assistant.chat(_uid(body.user_id), body.message)
+            while (delta := await queue.get()) is not None:
+                yield f"data: {json.dumps({'type': 'token', 'content': delta})}\n\n"
+            response = task.result()
             actions = [{"id": a.id, "label": a.label} for a in response.actions]
             yield f"data: {json.dumps({'type': 'text', 'content': response.text})}\n\n"
             yield f"data: {json.dumps({'type': 'done', 'actions': actions, 'success': response.success})}\n\n"
         except Exception as exc:
             yield f"data: {json.dumps({'type': 'error', 'message': str(exc)})}\n\n"
+        finally:
+            # Cliente desconectado a mitad: no seguir generando para nadie
+            task.cancel()
 
     return StreamingResponse(
         generate(),
@@ -112,10 +112,11 @@ async def library(
     request: Request,
     category: str = Query("tracks", description="tracks | albums | artists"),
     limit: int = Query(15, ge=1, le=50),
+    page: int = Query(1, ge=1),
 ):
     """Lista elementos de la biblioteca musical."""
     assistant = _assistant(request)
-    response = await assistant.get_library_items(category, limit)
+    response = await assistant.get_library_items(category, limit, page)
     return ChatResponse(text=response.text, success=response.success)
 
 
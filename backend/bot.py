@@ -1,21 +1,59 @@
+import atexit
 import logging
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters
+from telegram.ext import AIORateLimiter, Application, ApplicationBuilder, CommandHandler, MessageHandler, CallbackQueryHandler, filters
+from telegram.request import HTTPXRequest
 from dotenv import load_dotenv
 
 from services.telegram_service import TelegramService
 
-# Configurar logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+# Configurar logging: los handlers solo encolan el registro y un hilo aparte
+# (QueueListener) hace la escritura, así el event loop no espera a stdout
+_log_queue = queue.SimpleQueue()
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_log_listener = QueueListener(_log_queue, _stream_handler)
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(_log_queue)])
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 # Cargar variables de entorno
 load_dotenv()
 
+
+def build_application(token: str) -> Application:
+    """Crear la Application de PTB con el pool HTTP dimensionado para ráfagas.
+
+    El HTTPXRequest por defecto usa un pool de 1 conexión, así que las ediciones
+    de mensajes de los callbacks se serializan en la capa HTTP antes de llegar
+    siquiera al límite de Telegram. TelegramService espera esta configuración:
+    handlers concurrentes y un pool amplio para envíos/ediciones en paralelo.
+    El long polling va por su propio request para no ocupar ese pool.
+
+    AIORateLimiter pone en cola todas las llamadas salientes para no pasar de
+    ~30 mensajes/s globales ni 20/min por grupo, y reintenta tras un RetryAfter
+    en lugar de propagar el 429 al handler.
+    """
+    return (
+        ApplicationBuilder()
+        .token(token)
+        .concurrent_updates(True)
+        .get_updates_request(HTTPXRequest(connection_pool_size=256))
+        .request(HTTPXRequest(
+            connection_pool_size=256,
+            pool_timeout=1.0,
+            connect_timeout=5,
+            read_timeout=10,
+        ))
+        .rate_limiter(AIORateLimiter(max_retries=2))
+        .build()
+    )
+
+
 class MusicAgentBot:
     def __init__(self):
         self.token = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -25,7 +63,7 @@ class MusicAgentBot:
             raise ValueError("TELEGRAM_BOT_TOKEN no está configurado")
         
         # Crear aplicación
-        self.application = Application.builder().token(self.token).build()
+        self.application = build_application(self.token)
         
         # Registrar handlers
         self._register_handlers()
@@ -73,17 +111,26 @@ class MusicAgentBot:
     async def post_init(self, application):
         """Inicializar sistemas después de que el bot esté listo"""
         try:
-            await self.telegram_service.ai.initialize_monitoring()
+            await self.telegram_service.assistant.initialize()
             logger.info("✅ Sistemas de monitoreo inicializados")
         except Exception as e:
             logger.warning(f"⚠️ Error inicializando monitoreo: {e}")
     
+    async def post_shutdown(self, application):
+        """Cerrar los clientes HTTP compartidos al detener el bot"""
+        try:
+            await self.telegram_service.close()
+            logger.info("✅ Conexiones cerradas")
+        except Exception as e:
+            logger.warning(f"⚠️ Error cerrando conexiones: {e}")
+    
     def run_polling(self):
         """Ejecutar bot en modo polling"""
         logger.info("Iniciando bot en modo polling...")
         
         # Registrar callback de post-inicialización
         self.application.post_init = self.post_init
+        self.application.post_shutdown = self.post_shutdown
         
         self.application.run_polling(
             allowed_updates=Update.ALL_TYPES,
@@ -0,0 +1,23 @@
+"""
+Utilidades de formato compartidas por MusicAssistant y los adaptadores de UI.
+
+Las respuestas se envían con parse_mode HTML, así que cualquier metadato que
+venga de Navidrome/ListenBrainz/MusicBrainz (artistas, títulos, álbumes...)
+debe escaparse antes de interpolarse en el texto.
+"""
+
+# Tabla precompilada: str.translate recorre la cadena una sola vez en C,
+# en lugar de encadenar varios replace() o llamar a html.escape por campo.
+_HTML_ESCAPE = str.maketrans({
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+})
+
+
+def escape_html(text) -> str:
+    """Escapa un valor para interpolarlo en un mensaje HTML de Telegram."""
+    if not text:
+        return ""
+    return str(text).translate(_HTML_ESCAPE)
@@ -4,16 +4,23 @@ MusicAssistant: núcleo de la lógica de negocio, agnóstico de la interfaz de u
 Este módulo no importa nada de telegram ni de ningún framework de UI.
 Puede ser consumido por TelegramService, FastAPI, Chainlit o cualquier otro adaptador.
 """
+import asyncio
+import hashlib
 import os
 import random
 import re
 import logging
-from typing import Optional, List
+from datetime import datetime
+from typing import Callable, Optional, List
+
+from rapidfuzz import fuzz
 
 from models.schemas import Recommendation, Track, UserProfile
 from models.responses import AssistantResponse, AssistantAction, RecommendParams, ShareResult
+from core.formatting import escape_html as _e
 from services.navidrome_service import NavidromeService
 from services.listenbrainz_service import ListenBrainzService
+from services.musicbrainz_service import MusicBrainzService
 from services.setlistfm_service import SetlistfmService
 from services.ai_service import MusicRecommendationService
 from services.playlist_service import PlaylistService
@@ -21,9 +28,59 @@ from services.music_agent_service import MusicAgentService
 from services.conversation_manager import ConversationManager
 from services.enhanced_intent_detector import EnhancedIntentDetector
 from services.analytics_system import analytics_system
+from services.cache_manager import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Centinela de caché: una lista vacía o {} también es un resultado válido
+_MISSING = object()
+
+
+async def _no_results() -> list:
+    """Sustituto de una lectura que el servicio no soporta (para gather)"""
+    return []
+
+
+# Categorías paginables de /library -> (método de Navidrome, argumentos fijos)
+_LIBRARY_PAGE_METHODS = {
+    "albums": ("get_albums", {"list_type": "alphabeticalByName"}),
+    "artists": ("get_artists", {}),
+}
+
+# Periodos de estadísticas (callback stats_<periodo>) -> nombre mostrado
+STATS_PERIOD_NAMES = {
+    "this_week": "Esta Semana",
+    "this_month": "Este Mes",
+    "this_year": "Este Año",
+    "last_week": "Semana Pasada",
+    "last_month": "Mes Pasado",
+    "last_year": "Año Pasado",
+    "all_time": "Todo el Tiempo",
+}
+
+
+# Cabecera de cada recomendación según el tipo pedido
+def _fmt_album_head(i: int, rec) -> str:
+    return f"<b>{i}. {_e(rec.track.title)}</b>\n   🎤 Artista: {_e(rec.track.artist)}\n"
+
+
+def _fmt_artist_head(i: int, rec) -> str:
+    return f"<b>{i}. 🎤 {_e(rec.track.artist)}</b>\n"
+
+
+def _fmt_track_head(i: int, rec) -> str:
+    album = f"   📀 {_e(rec.track.album)}\n" if rec.track.album else ""
+    return f"<b>{i}.</b> {_e(rec.track.artist)} - {_e(rec.track.title)}\n{album}"
+
+
+_REC_HEAD_FORMATTERS = {"album": _fmt_album_head, "artist": _fmt_artist_head}
+
+
+def _rec_identity(rec) -> tuple:
+    """Identidad de una recomendación para el feedback (los id de pista de la
+    IA no son estables entre listas)"""
+    return (rec.track.artist.lower(), rec.track.title.lower())
+
 
 class MusicAssistant:
     """
@@ -35,15 +92,71 @@ class MusicAssistant:
     """
 
     def __init__(self):
+        # Una sola instancia (y un solo pool de conexiones HTTP) por servicio,
+        # compartida con el motor de recomendaciones y el agente
         self.navidrome = NavidromeService()
         self.listenbrainz = ListenBrainzService()
         self.setlistfm = SetlistfmService()
-        self.ai = MusicRecommendationService()
+        self.musicbrainz = (
+            MusicBrainzService()
+            if os.getenv("ENABLE_MUSICBRAINZ", "true").lower() == "true"
+            else None
+        )
+        self.ai = MusicRecommendationService(
+            navidrome=self.navidrome,
+            listenbrainz=self.listenbrainz,
+            musicbrainz=self.musicbrainz,
+        )
         self.playlist_service = PlaylistService()
-        self.agent = MusicAgentService()
+        self.agent = MusicAgentService(
+            navidrome=self.navidrome,
+            listenbrainz=self.listenbrainz if os.getenv("LISTENBRAINZ_USERNAME") else None,
+            musicbrainz=self.musicbrainz,
+        )
         self.conversation_manager = ConversationManager()
         self.enhanced_intent_detector = EnhancedIntentDetector()
 
+        # "similar a X": resultado final por (semilla, tipo, límite), la lista de
+        # artistas similares de cada semilla (sirve para cualquier tipo/límite)
+        # y, más fino, el álbum/canción top de cada artista, compartido entre semillas
+        self._similar_cache = TTLCache(maxsize=512, ttl=3600)
+        self._similar_artists_cache = TTLCache(maxsize=256, ttl=3600)
+        self._artist_extras_cache = TTLCache(maxsize=2048, ttl=3600)
+        # Tope de consultas simultáneas a MusicBrainz en ese fan-out
+        self._extras_semaphore = asyncio.Semaphore(8)
+        # Generador propio para el sorteo de candidatos: sembrado una vez y
+        # reemplazable por uno con semilla fija para reproducir resultados
+        self._rng = random.Random()
+
+        # Recomendaciones de perfil (Gemini) por parámetros + huella de escuchas:
+        # repetir /recommend sin haber escuchado nada nuevo no vuelve a llamar a la IA
+        self._profile_rec_cache = TTLCache(maxsize=512, ttl=600)
+        # Token de los botones ❤️/👎 -> recomendaciones de esa lista, para que un
+        # 👎 solo descarte de las cachés las listas que las contienen
+        self._feedback_targets = TTLCache(maxsize=512, ttl=86400)
+
+        # Contexto de usuario para el detector de intención (top artistas)
+        self._user_ctx_cache = TTLCache(maxsize=128, ttl=300)
+
+        # Lecturas del servicio de scrobbling por (método, argumentos): absorbe
+        # ráfagas de botones (Actualizar, Más recomendaciones...) sin repetir HTTP
+        self._music_fetch_cache = TTLCache(maxsize=256, ttl=30)
+        # Lecturas en curso por la misma clave: las peticiones simultáneas
+        # esperan a la misma tarea en vez de lanzar otra llamada
+        self._music_fetch_inflight: dict = {}
+        # y como mucho 8 de esas lecturas en vuelo a la vez hacia el servicio
+        self._music_semaphore = asyncio.Semaphore(8)
+
+        # Páginas de álbumes/artistas de Navidrome por (método, argumentos): la
+        # biblioteca cambia poco y los botones ◀️/▶️ repiten las mismas páginas
+        self._library_cache = TTLCache(maxsize=128, ttl=60)
+        # Precargas en segundo plano de la otra categoría (referencias para que
+        # el recolector no cancele las tareas a medias)
+        self._prefetch_tasks: set = set()
+        # Categorías abiertas recientemente: solo la primera apertura precarga
+        # (no cada 🔀 Otras canciones ni cada vuelta a la página 1)
+        self._library_opened = TTLCache(maxsize=32, ttl=300)
+
         if os.getenv("LISTENBRAINZ_USERNAME"):
             self.music_service = self.listenbrainz
             self.music_service_name = "ListenBrainz"
@@ -53,18 +166,46 @@ class MusicAssistant:
             self.music_service_name = None
             logger.warning("Sin servicio de scrobbling configurado")
 
+        # Capacidades opcionales del servicio, detectadas una sola vez
+        self._has_top_tracks = hasattr(self.music_service, "get_top_tracks")
+        self._has_top_albums = hasattr(self.music_service, "get_top_albums")
+        self._has_user_stats = hasattr(self.music_service, "get_user_stats")
+        self._has_listening_activity = hasattr(self.music_service, "get_listening_activity")
+
     async def initialize(self):
         """Llamar tras construir la instancia para inicializar subsistemas async."""
         await self.ai.initialize_monitoring()
 
+    async def close(self):
+        """Cierra los clientes HTTP (pools de conexiones) de todos los servicios."""
+        for task in self._prefetch_tasks:
+            task.cancel()
+        results = await asyncio.gather(
+            self.navidrome.close(),
+            self.listenbrainz.close(),
+            self.setlistfm.close(),
+            *([self.musicbrainz.close()] if self.musicbrainz else []),
+            self.agent.close(),
+            self.ai.close(),
+            return_exceptions=True,
+        )
+        for r in results:
+            if isinstance(r, Exception):
+                logger.warning("Error cerrando servicio: %s", r)
+
     # ------------------------------------------------------------------
     # Punto de entrada principal: lenguaje natural
     # ------------------------------------------------------------------
 
-    async def chat(self, user_id: int, message: str) -> AssistantResponse:
+    async def chat(
+        self, user_id: int, message: str, on_partial: Optional[Callable] = None
+    ) -> AssistantResponse:
         """
         Procesa un mensaje en lenguaje natural y devuelve una respuesta.
         Detecta la intención y enruta al método adecuado.
+
+        on_partial (opcional) es una corrutina que recibe el texto acumulado
+        mientras el agente genera la respuesta en streaming.
         """
         session = self.conversation_manager.get_session(user_id)
 
@@ -74,14 +215,7 @@ class MusicAssistant:
         if setlist_id:
             return await self._build_setlist_playlist(setlist_id, user_id)
 
-        user_stats = None
-        if self.music_service:
-            try:
-                top_artists = await self.music_service.get_top_artists(limit=5)
-                if top_artists:
-                    user_stats = {"top_artists": [a.name for a in top_artists]}
-            except Exception:
-                pass
+        user_stats = await self._get_user_stats_context(user_id)
 
         intent_data = await self.enhanced_intent_detector.detect_intent(
             message,
@@ -98,7 +232,8 @@ class MusicAssistant:
         if intent == "playlist":
             description = params.get("description", message)
             return await self._agent_query(
-                f"Crea una playlist de {description} con canciones de mi biblioteca", user_id
+                f"Crea una playlist de {description} con canciones de mi biblioteca", user_id,
+                on_partial=on_partial,
             )
 
         if intent == "setlist_playlist":
@@ -134,7 +269,8 @@ class MusicAssistant:
             if not search_term:
                 return AssistantResponse.error("No especificaste qué buscar.")
             return await self._agent_query(
-                f"Busca '{search_term}' en mi biblioteca y dime qué tengo", user_id
+                f"Busca '{search_term}' en mi biblioteca y dime qué tengo", user_id,
+                on_partial=on_partial,
             )
 
         if intent == "recomendar":
@@ -143,14 +279,18 @@ class MusicAssistant:
                 recs = await self.get_recommendations(
                     user_id, RecommendParams(similar_to=similar_to)
                 )
-                response = self._format_recommendations(recs, similar_to=similar_to)
+                response = self._format_recommendations(
+                    recs, similar_to=similar_to, feedback_token=self._register_feedback(recs)
+                )
                 if recs:
                     session.set_last_recommendations(recs)
                 return response
-            return await self._agent_query(message, user_id)
+            return await self._agent_query(message, user_id, on_partial=on_partial)
 
         if intent == "consulta_informativa":
-            return await self._agent_query(message, user_id, context={"type": "informational"})
+            return await self._agent_query(
+                message, user_id, context={"type": "informational"}, on_partial=on_partial
+            )
 
         if intent == "recomendar_biblioteca":
             genre = params.get("genre") or (params.get("genres", [""])[0] if "genres" in params else "")
@@ -163,7 +303,10 @@ class MusicAssistant:
                     from_library_only=True,
                 ),
             )
-            response = self._format_recommendations(recs, rec_type=rec_type, genre_filter=genre or None, from_library=True)
+            response = self._format_recommendations(
+                recs, rec_type=rec_type, genre_filter=genre or None, from_library=True,
+                feedback_token=self._register_feedback(recs),
+            )
             if recs:
                 session.set_last_recommendations(recs)
             return response
@@ -174,7 +317,9 @@ class MusicAssistant:
                 recs = await self.get_recommendations(
                     user_id, RecommendParams(similar_to=last_artists[0])
                 )
-                response = self._format_recommendations(recs, similar_to=last_artists[0])
+                response = self._format_recommendations(
+                    recs, similar_to=last_artists[0], feedback_token=self._register_feedback(recs)
+                )
                 if recs:
                     session.set_last_recommendations(recs)
                 return response
@@ -189,10 +334,12 @@ class MusicAssistant:
                 if artist
                 else "Muéstrame los lanzamientos recientes de esta semana de artistas de mi biblioteca"
             )
-            return await self._agent_query(query, user_id)
+            return await self._agent_query(query, user_id, on_partial=on_partial)
 
         # Default: conversación libre
-        return await self._agent_query(message, user_id, context={"type": "conversational"})
+        return await self._agent_query(
+            message, user_id, context={"type": "conversational"}, on_partial=on_partial
+        )
 
     # ------------------------------------------------------------------
     # Setlist (setlist.fm) -> Playlist en Navidrome
@@ -205,8 +352,6 @@ class MusicAssistant:
         genérico de _agent_query/_extract_song_ids_from_context, que puntúa por
         género/idioma/año y no sirve para emparejar título+artista exactos.
         """
-        from rapidfuzz import fuzz
-
         setlist = await self.setlistfm.get_setlist(setlist_id)
         if not setlist:
             return AssistantResponse.error("No pude encontrar ese setlist en setlist.fm.")
@@ -220,9 +365,9 @@ class MusicAssistant:
         unmatched: List[str] = []
 
         for song in songs:
-            track = await self._find_best_track_match(song["artist"], song["title"], fuzz)
+            track = await self._find_best_track_match(song["artist"], song["title"])
             if not track and song.get("is_cover") and song.get("cover_artist"):
-                track = await self._find_best_track_match(song["cover_artist"], song["title"], fuzz)
+                track = await self._find_best_track_match(song["cover_artist"], song["title"])
 
             if track:
                 if track.id not in seen_ids:
@@ -249,11 +394,11 @@ class MusicAssistant:
             return AssistantResponse.error("No pude crear la playlist en Navidrome.")
 
         text = (
-            f"Playlist creada: \"{playlist_name}\"\n"
+            f"Playlist creada: \"{_e(playlist_name)}\"\n"
             f"{len(song_ids)} de {len(songs)} canciones encontradas en tu biblioteca."
         )
         if unmatched:
-            text += "\n\nNo encontré en tu biblioteca:\n" + "\n".join(f"- {t}" for t in unmatched)
+            text += "\n\nNo encontré en tu biblioteca:\n" + "\n".join(f"- {_e(t)}" for t in unmatched)
 
         return AssistantResponse(text=text)
 
@@ -268,7 +413,7 @@ class MusicAssistant:
         cleaned = cls._TITLE_NOISE_RE.sub("", text.lower())
         return re.sub(r"\s+", " ", cleaned).strip()
 
-    async def _find_best_track_match(self, artist: str, title: str, fuzz) -> Optional[Track]:
+    async def _find_best_track_match(self, artist: str, title: str) -> Optional[Track]:
         """Busca en Navidrome la mejor coincidencia de una canción por título+artista.
 
         Prueba primero "artista + título" y, si no hay nada suficientemente
@@ -305,103 +450,191 @@ class MusicAssistant:
     # Recomendaciones
     # ------------------------------------------------------------------
 
-    async def get_recommendations(self, user_id: int, params: RecommendParams) -> list:
-        """Devuelve list[Recommendation]."""
+    async def get_recommendations(
+        self, user_id: int, params: RecommendParams, on_progress: Optional[Callable] = None
+    ) -> list:
+        """Devuelve list[Recommendation].
+
+        on_progress (opcional) es una corrutina que recibe la lista parcial
+        cada vez que crece, para que la UI muestre resultados antes de que
+        terminen todas las consultas. Solo aplica a "similar a X".
+        """
         if params.similar_to:
-            return await self._get_similar_recommendations(params)
+            return await self._get_similar_recommendations(params, on_progress)
         return await self._get_profile_recommendations(params)
 
-    async def _get_similar_recommendations(self, params: RecommendParams) -> list:
+    async def _get_similar_recommendations(
+        self, params: RecommendParams, on_progress: Optional[Callable] = None
+    ) -> list:
+        cache_key = (params.similar_to.lower(), params.rec_type, params.limit)
+        cached = self._similar_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Recomendaciones similares a '%s' desde caché", params.similar_to)
+            return cached
+
         search_limit = max(30, params.limit * 5)
-        similar_artists = await self.listenbrainz.get_similar_artists_from_recording(
-            params.similar_to,
-            limit=search_limit,
-            musicbrainz_service=self.agent.musicbrainz,
-        )
+        seed_key = (params.similar_to.lower(), search_limit)
+        similar_artists = self._similar_artists_cache.get(seed_key)
+        if similar_artists is None:
+            similar_artists = await self.listenbrainz.get_similar_artists_from_recording(
+                params.similar_to,
+                limit=search_limit,
+                musicbrainz_service=self.agent.musicbrainz,
+            )
+            if similar_artists:
+                self._similar_artists_cache.set(seed_key, similar_artists)
 
         if not similar_artists:
             return []
 
-        top, rest = similar_artists[:5], similar_artists[5:]
-        random.shuffle(rest)
-        candidates = top + rest
+        # Margen x2 para los artistas sin álbum top, que se descartan. Del resto
+        # solo se sortean los que faltan, sin barajar la lista entera.
+        wanted = params.limit * 2
+        top, rest = similar_artists[:5][:wanted], similar_artists[5:]
+        candidates = top + self._rng.sample(rest, min(len(rest), wanted - len(top)))
 
+        extras, pending, fetch_name = self._fetch_artist_extras(candidates, params.rec_type)
+
+        # Las consultas corren en paralelo; las recomendaciones se construyen en
+        # el orden de los candidatos a medida que se resuelve cada prefijo
         recommendations = []
-        for artist in candidates:
-            if len(recommendations) >= params.limit:
-                break
+        cursor = 0
+        try:
+            while True:
+                grew = False
+                while (
+                    cursor < len(candidates)
+                    and extras[cursor] is not None
+                    and len(recommendations) < params.limit
+                ):
+                    rec = self._similar_recommendation(params, candidates[cursor], extras[cursor])
+                    if rec:
+                        recommendations.append(rec)
+                        grew = True
+                    cursor += 1
+
+                if cursor >= len(candidates) or len(recommendations) >= params.limit:
+                    break
+                if grew and on_progress:
+                    await on_progress(list(recommendations))
+
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    i = pending.pop(task)
+                    result = None if task.exception() else task.result()
+                    extras[i] = result if isinstance(result, list) else []
+                    if isinstance(result, list):
+                        self._artist_extras_cache.set((candidates[i].name.lower(), fetch_name), result)
+        finally:
+            # Ya hay suficientes: no esperar al resto
+            for task in pending:
+                task.cancel()
+
+        if recommendations:
+            self._similar_cache.set(cache_key, recommendations)
+        return recommendations
 
-            title = ""
-            album_name = ""
-            artist_url = artist.url or ""
-            reason = ""
+    def _fetch_artist_extras(self, candidates: list, rec_type: str) -> tuple:
+        """Lanza de una vez las consultas de álbum/canción top de los candidatos.
 
-            if params.rec_type == "album":
-                top_albums = (
-                    await self.agent.musicbrainz.get_artist_top_albums(artist.name, limit=1)
-                    if self.agent.musicbrainz
-                    else []
-                )
-                if not top_albums:
-                    continue
-                album_data = top_albums[0]
-                album_name = album_data.get("name", artist.name)
-                title = album_name
-                artist_url = album_data.get("url", artist_url)
-                reason = f"Álbum top de {artist.name}, artista similar a {params.similar_to}"
-
-            elif params.rec_type == "track":
-                top_tracks = (
-                    await self.agent.musicbrainz.get_artist_top_tracks(artist.name, limit=1)
-                    if self.agent.musicbrainz
-                    else []
-                )
-                if top_tracks:
-                    track_data = top_tracks[0]
-                    title = track_data.get("name", f"Música de {artist.name}")
-                    artist_url = track_data.get("url", artist_url)
+        Devuelve (extras, pending, fetch_name): extras[i] son los datos de
+        MusicBrainz del candidato i (None = consulta pendiente), pending mapea
+        cada tarea en curso a su índice. Los aciertos de caché no lanzan tarea.
+        """
+        extras = [[] for _ in candidates]
+        pending = {}
+        fetch_name = {"album": "get_artist_top_albums", "track": "get_artist_top_tracks"}.get(rec_type)
+        fetch = getattr(self.agent.musicbrainz, fetch_name) if fetch_name and self.agent.musicbrainz else None
+        if fetch:
+            for i, artist in enumerate(candidates):
+                hit = self._artist_extras_cache.get((artist.name.lower(), fetch_name))
+                if hit is None:
+                    extras[i] = None
+                    pending[asyncio.ensure_future(self._fetch_bounded(fetch, artist.name))] = i
                 else:
-                    title = f"Música de {artist.name}"
-                reason = f"Canción top de artista similar a {params.similar_to}"
+                    extras[i] = hit
+        return extras, pending, fetch_name
+
+    async def _fetch_bounded(self, fetch: Callable, artist_name: str):
+        """Consulta de álbum/canción top limitada por el semáforo de MusicBrainz.
 
+        Las tareas se crean en el orden de los candidatos, así que los primeros
+        (los que desbloquean el prefijo de recomendaciones) entran antes.
+        """
+        async with self._extras_semaphore:
+            return await fetch(artist_name, limit=1)
+
+    def _similar_recommendation(self, params: RecommendParams, artist, extra: list) -> Optional[Recommendation]:
+        """Recommendation para un artista similar; None si no aplica (álbum sin datos)."""
+        title = ""
+        album_name = ""
+        artist_url = artist.url or ""
+        reason = ""
+
+        if params.rec_type == "album":
+            if not extra:
+                return None
+            album_data = extra[0]
+            album_name = album_data.get("name", artist.name)
+            title = album_name
+            artist_url = album_data.get("url", artist_url)
+            reason = f"Álbum top de {artist.name}, artista similar a {params.similar_to}"
+
+        elif params.rec_type == "track":
+            if extra:
+                track_data = extra[0]
+                title = track_data.get("name", f"Música de {artist.name}")
+                artist_url = track_data.get("url", artist_url)
             else:
-                title = artist.name
-                reason = f"Similar a {params.similar_to}"
-
-            track = Track(
-                id=f"listenbrainz_similar_{artist.name.replace(' ', '_')}",
-                title=title,
-                artist=artist.name,
-                album=album_name,
-                duration=None,
-                year=None,
-                genre="",
-                play_count=None,
-                path=artist_url,
-                cover_url=None,
-            )
-            recommendations.append(
-                Recommendation(
-                    track=track,
-                    reason=reason,
-                    confidence=0.9,
-                    source="ListenBrainz+MusicBrainz",
-                    tags=[],
-                )
-            )
+                title = f"Música de {artist.name}"
+            reason = f"Canción top de artista similar a {params.similar_to}"
 
-        return recommendations
+        else:
+            title = artist.name
+            reason = f"Similar a {params.similar_to}"
+
+        track = Track(
+            id=f"listenbrainz_similar_{artist.name.replace(' ', '_')}",
+            title=title,
+            artist=artist.name,
+            album=album_name,
+            duration=None,
+            year=None,
+            genre="",
+            play_count=None,
+            path=artist_url,
+            cover_url=None,
+        )
+        return Recommendation(
+            track=track,
+            reason=reason,
+            confidence=0.9,
+            source="ListenBrainz+MusicBrainz",
+            tags=[],
+        )
 
     async def _get_profile_recommendations(self, params: RecommendParams) -> list:
         if not self.music_service:
             return []
 
-        recent_tracks = await self.music_service.get_recent_tracks(limit=20)
-        top_artists = await self.music_service.get_top_artists(limit=10)
-
+        recent_tracks, top_artists = await self._get_listening_context()
         if not recent_tracks:
             return []
 
+        cache_key = (
+            params.rec_type,
+            params.genre_filter,
+            params.custom_prompt,
+            params.limit,
+            params.from_library_only,
+            tuple((t.artist, t.name) for t in recent_tracks[:10]),
+            tuple(a.name for a in (top_artists or [])[:5]),
+        )
+        cached = self._profile_rec_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Recomendaciones de perfil desde caché")
+            return cached
+
         user_profile = UserProfile(
             recent_tracks=recent_tracks,
             top_artists=top_artists,
@@ -410,7 +643,7 @@ class MusicAssistant:
             activity_context="",
         )
 
-        return await self.ai.generate_recommendations(
+        recommendations = await self.ai.generate_recommendations(
             user_profile,
             limit=params.limit,
             recommendation_type=params.rec_type,
@@ -418,6 +651,9 @@ class MusicAssistant:
             custom_prompt=params.custom_prompt,
             from_library_only=params.from_library_only,
         )
+        if recommendations:
+            self._profile_rec_cache.set(cache_key, recommendations)
+        return recommendations
 
     # ------------------------------------------------------------------
     # Compartir música
@@ -476,8 +712,10 @@ class MusicAssistant:
             words = search_term.split()
             if len(words) > 1:
                 alt = await self.navidrome.search(words[0], limit=20)
+                words_lower = [w.lower() for w in words]
                 for album in alt.get("albums", []):
-                    if any(w.lower() in album.name.lower() or w.lower() in album.artist.lower() for w in words):
+                    haystack = f"{album.name}\n{album.artist}".lower()
+                    if any(w in haystack for w in words_lower):
                         found_name = f"{album.artist} - {album.name}"
                         share_type = "álbum"
                         tracks = await self.navidrome.get_album_tracks(album.id)
@@ -486,7 +724,8 @@ class MusicAssistant:
                         break
                 if not items_to_share:
                     for track in alt.get("tracks", []):
-                        if any(w.lower() in track.title.lower() or w.lower() in track.artist.lower() for w in words):
+                        haystack = f"{track.title}\n{track.artist}".lower()
+                        if any(w in haystack for w in words_lower):
                             found_name = f"{track.artist} - {track.title}"
                             share_type = "canción"
                             items_to_share = [track.id]
@@ -517,42 +756,102 @@ class MusicAssistant:
     # Feedback de recomendaciones
     # ------------------------------------------------------------------
 
-    async def process_feedback(self, user_id: int, track_id: str, feedback_type: str) -> None:
-        from datetime import datetime
+    def _register_feedback(self, recommendations: list) -> Optional[str]:
+        """Registra la lista final enviada y devuelve el token de sus botones de feedback"""
+        if not recommendations:
+            return None
+        # Token determinista: volver a enviar la misma lista no añade entradas
+        identities = frozenset(_rec_identity(r) for r in recommendations)
+        token = hashlib.blake2b(repr(sorted(identities)).encode(), digest_size=6).hexdigest()
+        self._feedback_targets.set(token, identities)
+        return token
+
+    async def process_feedback(self, user_id: int, target_id: str, feedback_type: str) -> None:
+        """Registra un like/dislike.
+
+        ``target_id`` es el token de los botones de una lista (ver
+        ``_register_feedback``) o, desde la API, el id de una pista concreta.
+        """
+        context = {"timestamp": datetime.now().isoformat()}
+        targets = self._feedback_targets.get(target_id)
+        if targets:
+            # El token solo identifica la lista: el aprendizaje recibe sus pistas
+            items = [f"{artist} - {title}" for artist, title in sorted(targets)]
+            recommendation_id = "; ".join(items)
+            context["items"] = items
+        else:
+            recommendation_id = target_id
         await self.ai.process_recommendation_feedback(
             user_id=user_id,
-            recommendation_id=track_id,
+            recommendation_id=recommendation_id,
             feedback_type=feedback_type,
-            recommendation_context={"timestamp": datetime.now().isoformat()},
+            recommendation_context=context,
         )
+        disliked = targets if feedback_type == "dislike" else None
+        if disliked:
+            # Las listas cacheadas con algo rechazado no reflejan el 👎: que la
+            # próxima petición las regenere en lugar de repetirlas
+            def contains_disliked(recommendations) -> bool:
+                return any(_rec_identity(r) in disliked for r in recommendations)
+
+            dropped = self._profile_rec_cache.discard_if(contains_disliked)
+            dropped += self._similar_cache.discard_if(contains_disliked)
+            logger.debug("👎 %s listas de recomendaciones descartadas de la caché", dropped)
 
     # ------------------------------------------------------------------
     # Biblioteca
     # ------------------------------------------------------------------
 
-    async def get_library_items(self, category: str, limit: int = 15) -> AssistantResponse:
+    async def get_library_items(
+        self, category: str, limit: int = 15, page: int = 1
+    ) -> AssistantResponse:
+        """Lista una página de la biblioteca.
+
+        Álbumes y artistas se paginan en orden alfabético con offset, pidiendo
+        un elemento extra para saber si hay página siguiente. Las canciones
+        salen de getRandomSongs (sin offset), así que en lugar de paginar se
+        ofrece otra tanda aleatoria (y por eso tampoco se cachean).
+        """
+        if category != "tracks" and category not in _LIBRARY_PAGE_METHODS:
+            return AssistantResponse.error(f"Categoría no reconocida: {category}")
+
+        page = max(page, 1)
+        offset = (page - 1) * limit
+
+        opened_key = (category, limit)
+        if page == 1 and self._library_opened.get(opened_key) is None:
+            self._library_opened.set(opened_key, True)
+            # Quien abre una categoría suele abrir las demás a continuación
+            for other in _LIBRARY_PAGE_METHODS.keys() - {category}:
+                self._prefetch_library(other, limit)
+
         if category == "tracks":
-            items = await self.navidrome.get_tracks(limit=limit + 5)
-            text = "<b>Canciones de tu biblioteca:</b>\n\n"
-            for i, t in enumerate(items[:limit], 1):
-                text += f"{i}. {t.artist} - {t.title}\n"
-
-        elif category == "albums":
-            items = await self.navidrome.get_albums(limit=limit + 5)
-            text = "<b>Álbumes de tu biblioteca:</b>\n\n"
-            for i, a in enumerate(items[:limit], 1):
-                text += f"{i}. {a.artist} - {a.name}\n"
-
-        elif category == "artists":
-            items = await self.navidrome.get_artists(limit=limit + 5)
-            text = "<b>Artistas de tu biblioteca:</b>\n\n"
-            for i, a in enumerate(items[:limit], 1):
-                text += f"{i}. {a.name}\n"
+            items = await self.navidrome.get_tracks(limit=limit)
+            body = "\n".join(f"{i}. {_e(t.artist)} - {_e(t.title)}" for i, t in enumerate(items, 1))
+            text = f"<b>Canciones de tu biblioteca:</b>\n\n{body}"
+            return AssistantResponse(
+                text=text,
+                actions=[AssistantAction(id="library_tracks", label="🔀 Otras canciones")],
+            )
+
+        items = await self._library_page(category, limit, offset)
+
+        if category == "albums":
+            body = "\n".join(
+                f"{i}. {_e(a.artist)} - {_e(a.name)}" for i, a in enumerate(items[:limit], offset + 1)
+            )
+            text = f"<b>Álbumes de tu biblioteca</b> (página {page}):\n\n{body}"
 
         else:
-            return AssistantResponse.error(f"Categoría no reconocida: {category}")
+            body = "\n".join(f"{i}. {_e(a.name)}" for i, a in enumerate(items[:limit], offset + 1))
+            text = f"<b>Artistas de tu biblioteca</b> (página {page}):\n\n{body}"
 
-        return AssistantResponse(text=text)
+        actions = []
+        if page > 1:
+            actions.append(AssistantAction(id=f"library_{category}_p{page - 1}", label="◀️ Anterior"))
+        if len(items) > limit:
+            actions.append(AssistantAction(id=f"library_{category}_p{page + 1}", label="Siguiente ▶️"))
+        return AssistantResponse(text=text, actions=actions)
 
     # ------------------------------------------------------------------
     # Estadísticas
@@ -562,69 +861,75 @@ class MusicAssistant:
         if not self.music_service:
             return AssistantResponse.error("No hay servicio de scrobbling configurado.")
 
-        period_names = {
-            "this_week": "Esta Semana",
-            "this_month": "Este Mes",
-            "this_year": "Este Año",
-            "last_week": "Semana Pasada",
-            "last_month": "Mes Pasado",
-            "last_year": "Año Pasado",
-            "all_time": "Todo el Tiempo",
-        }
-        period_name = period_names.get(period, "Este Mes")
-
-        top_artists = await self.music_service.get_top_artists(period=period, limit=10)
-        top_tracks = (
-            await self.music_service.get_top_tracks(period=period, limit=5)
-            if hasattr(self.music_service, "get_top_tracks")
-            else []
-        )
-        recent_tracks = await self.music_service.get_recent_tracks(limit=5)
-        top_albums = (
-            await self.music_service.get_top_albums(period=period, limit=5)
-            if hasattr(self.music_service, "get_top_albums")
-            else []
+        period_name = STATS_PERIOD_NAMES.get(period, "Este Mes")
+
+        # Las cuatro lecturas son independientes: en paralelo, la latencia es la
+        # de la más lenta y no la suma
+        top_artists, top_tracks, recent_tracks, top_albums = await asyncio.gather(
+            self._music_fetch("get_top_artists", period=period, limit=10),
+            self._music_fetch("get_top_tracks", period=period, limit=5)
+            if self._has_top_tracks
+            else _no_results(),
+            # Solo se muestra la última escucha: no pedir más de la cuenta
+            self._music_fetch("get_recent_tracks", limit=1),
+            self._music_fetch("get_top_albums", period=period, limit=5)
+            if self._has_top_albums
+            else _no_results(),
         )
 
-        text = f"<b>Estadísticas de {period_name}</b>\n<i>{self.music_service_name}</i>\n\n"
+        parts = [f"<b>Estadísticas de {period_name}</b>\n<i>{self.music_service_name}</i>\n\n"]
 
         if top_artists:
-            text += "<b>Top 5 Artistas:</b>\n"
-            for i, a in enumerate(top_artists[:5], 1):
-                text += f"{i}. {a.name} - {a.playcount} escuchas\n"
-            text += "\n"
+            parts.append("<b>Top 5 Artistas:</b>\n")
+            parts.extend(
+                f"{i}. {_e(a.name)} - {a.playcount} escuchas\n"
+                for i, a in enumerate(top_artists[:5], 1)
+            )
+            parts.append("\n")
 
         if top_albums:
-            text += "<b>Top 3 Álbumes:</b>\n"
-            for i, a in enumerate(top_albums[:3], 1):
-                text += f"{i}. {a['artist']} - {a['name']} ({a['listen_count']} escuchas)\n"
-            text += "\n"
+            parts.append("<b>Top 3 Álbumes:</b>\n")
+            parts.extend(
+                f"{i}. {_e(a['artist'])} - {_e(a['name'])} ({a['listen_count']} escuchas)\n"
+                for i, a in enumerate(top_albums[:3], 1)
+            )
+            parts.append("\n")
 
         if top_tracks:
-            text += "<b>Top 3 Canciones:</b>\n"
-            for i, t in enumerate(top_tracks[:3], 1):
-                text += f"{i}. {t.artist} - {t.name} ({t.playcount} escuchas)\n"
-            text += "\n"
+            parts.append("<b>Top 3 Canciones:</b>\n")
+            parts.extend(
+                f"{i}. {_e(t.artist)} - {_e(t.name)} ({t.playcount} escuchas)\n"
+                for i, t in enumerate(top_tracks[:3], 1)
+            )
+            parts.append("\n")
 
         if recent_tracks:
-            text += "<b>Última escucha:</b>\n"
-            text += f"{recent_tracks[0].artist} - {recent_tracks[0].name}\n"
+            parts.append("<b>Última escucha:</b>\n")
+            parts.append(f"{_e(recent_tracks[0].artist)} - {_e(recent_tracks[0].name)}\n")
 
-        return AssistantResponse(text=text)
+        return AssistantResponse(text="".join(parts))
 
     async def get_user_stats_summary(self) -> dict:
         """Estadísticas generales del usuario (total de escuchas, artistas, etc.)"""
-        if not self.music_service:
-            return {}
-        if hasattr(self.music_service, "get_user_stats"):
-            return await self.music_service.get_user_stats()
+        if self._has_user_stats:
+            return await self._music_fetch("get_user_stats")
         return {}
 
     async def get_listening_activity(self, days: int = 30) -> dict:
-        if self.music_service and hasattr(self.music_service, "get_listening_activity"):
-            return await self.music_service.get_listening_activity(days=days)
+        if self._has_listening_activity:
+            return await self._music_fetch("get_listening_activity", days=days)
         return {}
 
+    async def get_recent_tracks(self, limit: int = 20) -> list:
+        if not self.music_service:
+            return []
+        return await self._music_fetch("get_recent_tracks", limit=limit)
+
+    async def get_top_artists(self, limit: int = 10) -> list:
+        if not self.music_service:
+            return []
+        return await self._music_fetch("get_top_artists", limit=limit)
+
     # ------------------------------------------------------------------
     # Sistema / salud / analytics
     # ------------------------------------------------------------------
@@ -648,8 +953,7 @@ class MusicAssistant:
     async def get_user_profile(self, user_id: int) -> Optional[UserProfile]:
         if not self.music_service:
             return None
-        recent_tracks = await self.music_service.get_recent_tracks(limit=20)
-        top_artists = await self.music_service.get_top_artists(limit=10)
+        recent_tracks, top_artists = await self._get_listening_context()
         if not recent_tracks:
             return None
         return UserProfile(
@@ -664,15 +968,103 @@ class MusicAssistant:
     # Helpers internos
     # ------------------------------------------------------------------
 
-    async def _agent_query(self, query: str, user_id: int, context: dict = None) -> AssistantResponse:
-        result = await self.agent.query(query, user_id=user_id, context=context or {})
+    async def _music_fetch(self, method: str, **kwargs):
+        """Llama a un método de lectura del servicio de scrobbling con caché de 30 s.
+
+        Los resultados vacíos (fallo transitorio o sin datos aún) no se cachean,
+        y las llamadas simultáneas con la misma clave comparten una única tarea.
+        """
+        key = (method, tuple(sorted(kwargs.items())))
+        cached = self._music_fetch_cache.get(key, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        task = self._music_fetch_inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._music_fetch_uncached(key, method, kwargs))
+            self._music_fetch_inflight[key] = task
+            task.add_done_callback(lambda _: self._music_fetch_inflight.pop(key, None))
+        # shield: cancelar a uno de los que esperan no cancela la lectura de los demás
+        return await asyncio.shield(task)
+
+    async def _music_fetch_uncached(self, key: tuple, method: str, kwargs: dict):
+        async with self._music_semaphore:
+            value = await getattr(self.music_service, method)(**kwargs)
+        if value:
+            self._music_fetch_cache.set(key, value)
+        return value
+
+    async def _library_fetch(self, method: str, **kwargs):
+        """Llama a un método de listado de Navidrome con caché de 60 s"""
+        key = (method, tuple(sorted(kwargs.items())))
+        cached = self._library_cache.get(key, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        value = await getattr(self.navidrome, method)(**kwargs)
+        self._library_cache.set(key, value)
+        return value
+
+    def _library_page(self, category: str, limit: int, offset: int):
+        """Página de álbumes/artistas (con un elemento extra) vía la caché"""
+        method, extra = _LIBRARY_PAGE_METHODS[category]
+        return self._library_fetch(method, limit=limit + 1, offset=offset, **extra)
+
+    def _prefetch_library(self, category: str, limit: int) -> None:
+        """Calienta en segundo plano la primera página de una categoría"""
+        name = f"library-prefetch:{category}:{limit}"
+        if any(t.get_name() == name for t in self._prefetch_tasks):
+            return
+
+        async def run():
+            try:
+                await self._library_page(category, limit, 0)
+            except Exception as e:
+                logger.debug("Precarga de biblioteca (%s) fallida: %s", category, e)
+
+        task = asyncio.create_task(run(), name=name)
+        self._prefetch_tasks.add(task)
+        task.add_done_callback(self._prefetch_tasks.discard)
+
+    async def _get_listening_context(self) -> tuple:
+        """(últimas 20 escuchas, top 10 artistas) en paralelo y con la caché de
+        _music_fetch: perfil, recomendaciones y contexto del detector comparten
+        las mismas dos lecturas en lugar de pedir cada uno las suyas."""
+        return await asyncio.gather(
+            self._music_fetch("get_recent_tracks", limit=20),
+            self._music_fetch("get_top_artists", limit=10),
+        )
+
+    async def _get_user_stats_context(self, user_id: int) -> Optional[dict]:
+        """Top artistas del usuario para el detector de intención, cacheado 5 min.
+
+        Se consultaba en cada mensaje; cambia muy poco entre mensajes seguidos.
+        """
+        if not self.music_service:
+            return None
+        cached = self._user_ctx_cache.get(user_id)
+        if cached is not None:
+            return cached or None
+        try:
+            top_artists = await self._music_fetch("get_top_artists", limit=10)
+        except Exception:
+            return None
+        user_stats = {"top_artists": [a.name for a in top_artists[:5]]} if top_artists else {}
+        self._user_ctx_cache.set(user_id, user_stats)
+        return user_stats or None
+
+    async def _agent_query(
+        self, query: str, user_id: int, context: dict = None, on_partial: Optional[Callable] = None
+    ) -> AssistantResponse:
+        result = await self.agent.query(
+            query, user_id=user_id, context=context or {}, on_partial=on_partial
+        )
         if result.get("success") and result.get("answer"):
             answer = result["answer"]
             links = result.get("links", [])
             if links:
-                answer += "\n\n<b>Enlaces relevantes:</b>\n"
-                for link in links[:5]:
-                    answer += f"• {link}\n"
+                answer = "".join(
+                    [answer, "\n\n<b>Enlaces relevantes:</b>\n"]
+                    + [f"• {link}\n" for link in links[:5]]
+                )
             return AssistantResponse(text=answer)
         return AssistantResponse.error("No pude procesar tu consulta en este momento.")
 
@@ -684,36 +1076,37 @@ class MusicAssistant:
         rec_type: str = "general",
         genre_filter: str = None,
         from_library: bool = False,
+        feedback_token: Optional[str] = None,
     ) -> AssistantResponse:
+        """Formatea una lista de recomendaciones sin efectos secundarios.
+
+        Los botones de feedback solo aparecen con ``feedback_token`` (ver
+        ``_register_feedback``); las vistas previas no lo llevan.
+        """
         if not recommendations:
             return AssistantResponse.error("No pude generar recomendaciones en este momento.")
 
         if custom_prompt:
-            text = f"<b>Recomendaciones para:</b> <i>{custom_prompt}</i>\n\n"
+            header = f"<b>Recomendaciones para:</b> <i>{_e(custom_prompt)}</i>\n\n"
         elif similar_to:
-            text = f"<b>Música similar a '{similar_to}':</b>\n\n"
+            header = f"<b>Música similar a '{_e(similar_to)}':</b>\n\n"
         elif rec_type == "album":
-            text = f"<b>Álbumes recomendados{f' de {genre_filter}' if genre_filter else ''}:</b>\n\n"
+            header = f"<b>Álbumes recomendados{f' de {_e(genre_filter)}' if genre_filter else ''}:</b>\n\n"
         elif rec_type == "artist":
-            text = f"<b>Artistas recomendados{f' de {genre_filter}' if genre_filter else ''}:</b>\n\n"
+            header = f"<b>Artistas recomendados{f' de {_e(genre_filter)}' if genre_filter else ''}:</b>\n\n"
         elif rec_type == "track":
-            text = f"<b>Canciones recomendadas{f' de {genre_filter}' if genre_filter else ''}:</b>\n\n"
+            header = f"<b>Canciones recomendadas{f' de {_e(genre_filter)}' if genre_filter else ''}:</b>\n\n"
         else:
-            text = "<b>Tus recomendaciones personalizadas:</b>\n\n"
+            header = "<b>Tus recomendaciones personalizadas:</b>\n\n"
 
+        # rec_type es fijo para toda la lista: elegir el formateador una sola vez
+        fmt = _REC_HEAD_FORMATTERS.get(rec_type, _fmt_track_head)
+        parts = [header]
         for i, rec in enumerate(recommendations, 1):
-            if rec_type == "album":
-                text += f"<b>{i}. {rec.track.title}</b>\n   🎤 Artista: {rec.track.artist}\n"
-            elif rec_type == "artist":
-                text += f"<b>{i}. 🎤 {rec.track.artist}</b>\n"
-            else:
-                text += f"<b>{i}.</b> {rec.track.artist} - {rec.track.title}\n"
-                if rec.track.album:
-                    text += f"   📀 {rec.track.album}\n"
-
-            text += f"   💡 {rec.reason}\n"
+            parts.append(fmt(i, rec))
+            parts.append(f"   💡 {_e(rec.reason)}\n")
             if rec.source:
-                text += f"   🔗 Fuente: {rec.source}\n"
+                parts.append(f"   🔗 Fuente: {_e(rec.source)}\n")
             if rec.track.path:
                 if "musicbrainz.org" in rec.track.path:
                     svc = "MusicBrainz"
@@ -721,14 +1114,17 @@ class MusicAssistant:
                     svc = "ListenBrainz"
                 else:
                     svc = "Ver información"
-                text += f"   🌐 <a href=\"{rec.track.path}\">Ver en {svc}</a>\n"
-            text += f"   🎯 {int(rec.confidence * 100)}% match\n\n"
-
-        actions = [
-            AssistantAction(id="like_rec", label="❤️ Me gusta"),
-            AssistantAction(id="dislike_rec", label="👎 No me gusta"),
-            AssistantAction(id="more_recommendations", label="🔄 Más recomendaciones"),
-        ]
+                parts.append(f"   🌐 <a href=\"{_e(rec.track.path)}\">Ver en {svc}</a>\n")
+            parts.append(f"   🎯 {int(rec.confidence * 100)}% match\n\n")
+        text = "".join(parts)
+
+        actions = []
+        if feedback_token:
+            actions += [
+                AssistantAction(id=f"like_{feedback_token}", label="❤️ Me gusta"),
+                AssistantAction(id=f"dislike_{feedback_token}", label="👎 No me gusta"),
+            ]
+        actions.append(AssistantAction(id="more_recommendations", label="🔄 Más recomendaciones"))
 
         return AssistantResponse(text=text, actions=actions, recommendations=recommendations)
 
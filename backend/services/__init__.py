@@ -3,7 +3,8 @@ from .navidrome_service import NavidromeService
 from .listenbrainz_service import ListenBrainzService
 from .musicbrainz_service import MusicBrainzService
 from .ai_service import MusicRecommendationService
-from .cache_manager import CacheManager, cache_manager, cached
+from .cache_manager import CacheManager, TTLCache, cache_manager, cached
+from .semantic_cache import SemanticCache
 from .analytics_system import AnalyticsSystem, analytics_system
 from .enhanced_intent_detector import EnhancedIntentDetector
 from .adaptive_learning_system import AdaptiveLearningSystem, adaptive_learning_system
@@ -19,8 +20,10 @@ __all__ = [
     'MusicBrainzService',
     'MusicRecommendationService',
     'CacheManager',
+    'TTLCache',
     'cache_manager',
     'cached',
+    'SemanticCache',
     'AnalyticsSystem',
     'analytics_system',
     'EnhancedIntentDetector',
@@ -1,10 +1,11 @@
-import google.generativeai as genai
+import logging
 import os
 from typing import List, Dict, Any, Optional
 import numpy as np
-from collections import Counter
+from collections import Counter, defaultdict
 import re
 import random
+from services import gemini_client
 from models.schemas import UserProfile, Recommendation, Track, ScrobbleTrack, ScrobbleArtist, MusicAnalysis
 from services.navidrome_service import NavidromeService
 from services.listenbrainz_service import ListenBrainzService
@@ -18,40 +19,61 @@ from services.error_recovery_system import error_recovery_system
 from services.advanced_monitoring_system import advanced_monitoring_system
 from services.user_features_system import user_features_system
 
+logger = logging.getLogger(__name__)
+
 class MusicRecommendationService:
-    def __init__(self):
+    def __init__(
+        self,
+        navidrome: Optional[NavidromeService] = None,
+        listenbrainz: Optional[ListenBrainzService] = None,
+        musicbrainz: Optional[MusicBrainzService] = None,
+    ):
+        """Los servicios inyectados se comparten (mismo pool HTTP) y no se cierran
+        aquí; los que falten se crean y pasan a ser propiedad de esta instancia."""
         # Configurar Gemini
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
-        self.navidrome = NavidromeService()
-        self.listenbrainz = ListenBrainzService()
+        self.model = gemini_client.get_model()
+        self._owned_clients = []
+        self.navidrome = navidrome or self._own(NavidromeService())
+        self.listenbrainz = listenbrainz or self._own(ListenBrainzService())
         
         # Inicializar MusicBrainz para metadatos y descubrimiento
-        self.musicbrainz = None
-        if os.getenv("ENABLE_MUSICBRAINZ", "true").lower() == "true":
+        self.musicbrainz = musicbrainz
+        if musicbrainz is None and os.getenv("ENABLE_MUSICBRAINZ", "true").lower() == "true":
             try:
-                self.musicbrainz = MusicBrainzService()
-                print("✅ MusicBrainz habilitado para metadatos y descubrimiento")
+                self.musicbrainz = self._own(MusicBrainzService())
+                logger.info("✅ MusicBrainz habilitado para metadatos y descubrimiento")
             except Exception as e:
-                print(f"⚠️ Error inicializando MusicBrainz: {e}")
+                logger.warning("⚠️ Error inicializando MusicBrainz: %s", e)
         
         # Cache simple para optimizar rendimiento
         self._library_artists_cache = None
         self._library_artists_cache_time = 0
         self._cache_ttl = 300  # 5 minutos
         
-        print("✅ Servicio de recomendaciones usando ListenBrainz + MusicBrainz + Aprendizaje Adaptativo + Motor Híbrido + Características Avanzadas")
+        logger.info("✅ Servicio de recomendaciones usando ListenBrainz + MusicBrainz + Aprendizaje Adaptativo + Motor Híbrido + Características Avanzadas")
         
         # Inicializar motor híbrido
         self.hybrid_engine = HybridRecommendationEngine(self)
     
+    def _own(self, service):
+        self._owned_clients.append(service)
+        return service
+
+    async def close(self):
+        """Cerrar los clientes HTTP propios del servicio (no los inyectados)"""
+        try:
+            for service in self._owned_clients:
+                await service.close()
+        except Exception as e:
+            logger.debug("Error cerrando conexiones: %s", e)
+    
     async def initialize_monitoring(self):
         """Inicializar sistemas de monitoreo después de que el event loop esté ejecutándose"""
         try:
             await advanced_monitoring_system.start_monitoring()
-            print("✅ Sistema de monitoreo avanzado iniciado")
+            logger.debug("✅ Sistema de monitoreo avanzado iniciado")
         except Exception as e:
-            print(f"⚠️ Error iniciando monitoreo avanzado: {e}")
+            logger.warning("⚠️ Error iniciando monitoreo avanzado: %s", e)
     
     async def _get_library_artists_cached(self) -> set:
         """Obtener lista de artistas de biblioteca con caché mejorado
@@ -64,10 +86,10 @@ class MusicRecommendationService:
             try:
                 library_data = await self.navidrome.get_artists(limit=500)
                 artists_set = {artist.name.lower() for artist in library_data}
-                print(f"📚 Biblioteca cargada: {len(artists_set)} artistas")
+                logger.debug("📚 Biblioteca cargada: %s artistas", len(artists_set))
                 return artists_set
             except Exception as e:
-                print(f"⚠️ Error obteniendo artistas de biblioteca: {e}")
+                logger.warning("⚠️ Error obteniendo artistas de biblioteca: %s", e)
                 return set()
         
         # Usar el nuevo sistema de caché
@@ -116,7 +138,7 @@ class MusicRecommendationService:
             )
             
         except Exception as e:
-            print(f"Error analizando perfil: {e}")
+            logger.debug("Error analizando perfil: %s", e)
             return MusicAnalysis(
                 genre_distribution={},
                 tempo_preferences={},
@@ -151,15 +173,15 @@ class MusicRecommendationService:
             # Si hay genre_filter pero no custom_prompt, convertir el genre_filter en custom_prompt
             if genre_filter and not custom_prompt:
                 custom_prompt = f"música de género {genre_filter}"
-                print(f"🎯 Convirtiendo filtro de género '{genre_filter}' en prompt personalizado")
+                logger.debug("🎯 Convirtiendo filtro de género '%s' en prompt personalizado", genre_filter)
             
             # Mensaje de log con información del prompt personalizado
             if from_library_only:
-                print(f"📚 Generando {limit} recomendaciones SOLO de tu biblioteca...")
+                logger.debug("📚 Generando %s recomendaciones SOLO de tu biblioteca...", limit)
             elif custom_prompt:
-                print(f"🎯 Generando {limit} recomendaciones con criterios específicos: {custom_prompt[:100]}...")
+                logger.debug("🎯 Generando %s recomendaciones con criterios específicos: %s...", limit, custom_prompt[:100])
             else:
-                print(f"🎯 Generando {limit} recomendaciones...")
+                logger.debug("🎯 Generando %s recomendaciones...", limit)
             
             # Analizar perfil del usuario
             analysis = await self.analyze_user_profile(user_profile)
@@ -168,7 +190,7 @@ class MusicRecommendationService:
             
             # Si solo quiere recomendaciones de biblioteca, ir directo a eso
             if from_library_only:
-                print("📚 Modo: Solo recomendaciones de tu biblioteca (sin descubrimiento)")
+                logger.debug("📚 Modo: Solo recomendaciones de tu biblioteca (sin descubrimiento)")
                 library_recs = await self._generate_library_only_recommendations(
                     user_profile,
                     analysis,
@@ -189,7 +211,7 @@ class MusicRecommendationService:
                 if not custom_prompt and genre_filter:
                     custom_prompt = f"música de género {genre_filter}"
                 
-                print(f"🎨 Generando recomendaciones con IA (criterio específico: {custom_prompt[:100]}...)...")
+                logger.debug("🎨 Generando recomendaciones con IA (criterio específico: %s...)...", custom_prompt[:100])
                 custom_recs = await self._generate_custom_prompt_recommendations(
                     user_profile,
                     analysis,
@@ -198,16 +220,16 @@ class MusicRecommendationService:
                     recommendation_type
                 )
                 recommendations.extend(custom_recs)
-                print(f"✅ Encontradas {len(custom_recs)} recomendaciones de IA")
+                logger.debug("✅ Encontradas %s recomendaciones de IA", len(custom_recs))
             
             # Usar ListenBrainz+MusicBrainz para descubrimiento basado en historial
             if len(recommendations) < limit and include_new_music and len(user_profile.top_artists) > 0:
                 remaining_limit = limit - len(recommendations)
                 
                 if use_ai:
-                    print(f"🌍 Complementando con ListenBrainz+MusicBrainz...")
+                    logger.debug("🌍 Complementando con ListenBrainz+MusicBrainz...")
                 else:
-                    print(f"🌍 Generando recomendaciones desde ListenBrainz+MusicBrainz basadas en tu historial...")
+                    logger.debug("🌍 Generando recomendaciones desde ListenBrainz+MusicBrainz basadas en tu historial...")
                 
                 new_music_recs = await self._generate_listenbrainz_recommendations(
                     user_profile, 
@@ -224,12 +246,12 @@ class MusicRecommendationService:
                 
                 recommendations.extend(filtered_recs)
                 if len(filtered_recs) < len(new_music_recs):
-                    print(f"⚠️ Filtrados {len(new_music_recs) - len(filtered_recs)} duplicados")
-                print(f"✅ Encontradas {len(filtered_recs)} recomendaciones de música nueva")
+                    logger.warning("⚠️ Filtrados %s duplicados", len(new_music_recs) - len(filtered_recs))
+                logger.debug("✅ Encontradas %s recomendaciones de música nueva", len(filtered_recs))
             
             # Si no hay suficientes, buscar en la biblioteca
             if len(recommendations) < limit:
-                print("📚 Buscando en tu biblioteca de Navidrome...")
+                logger.debug("📚 Buscando en tu biblioteca de Navidrome...")
                 library_tracks = await self.navidrome.get_tracks(limit=200)
                 
                 # Filtrar canciones ya conocidas
@@ -251,8 +273,8 @@ class MusicRecommendationService:
                 
                 recommendations.extend(filtered_lib_recs)
                 if len(filtered_lib_recs) < len(library_recs):
-                    print(f"⚠️ Filtrados {len(library_recs) - len(filtered_lib_recs)} duplicados de biblioteca")
-                print(f"✅ Encontradas {len(filtered_lib_recs)} recomendaciones de tu biblioteca")
+                    logger.warning("⚠️ Filtrados %s duplicados de biblioteca", len(library_recs) - len(filtered_lib_recs))
+                logger.debug("✅ Encontradas %s recomendaciones de tu biblioteca", len(filtered_lib_recs))
             
             # Eliminar duplicados finales (por si acaso)
             unique_recommendations = []
@@ -264,13 +286,13 @@ class MusicRecommendationService:
                     seen_final.add(key)
             
             if len(unique_recommendations) < len(recommendations):
-                print(f"⚠️ Eliminados {len(recommendations) - len(unique_recommendations)} duplicados finales")
+                logger.warning("⚠️ Eliminados %s duplicados finales", len(recommendations) - len(unique_recommendations))
             
-            print(f"🎵 Total de recomendaciones únicas: {len(unique_recommendations)}")
+            logger.debug("🎵 Total de recomendaciones únicas: %s", len(unique_recommendations))
             return unique_recommendations[:limit]
             
         except Exception as e:
-            print(f"❌ Error generando recomendaciones: {e}")
+            logger.error("❌ Error generando recomendaciones: %s", e)
             return []
     
     async def _generate_listenbrainz_recommendations(
@@ -303,7 +325,7 @@ class MusicRecommendationService:
             num_artists_to_use = min(3, len(available_top_artists))  # Máximo 3 artistas
             selected_artists = random.sample(available_top_artists, num_artists_to_use) if len(available_top_artists) > num_artists_to_use else available_top_artists
             
-            print(f"🔍 Generando recomendaciones de ListenBrainz para {len(selected_artists)} artistas (optimizado para velocidad)")
+            logger.debug("🔍 Generando recomendaciones de ListenBrainz para %s artistas (optimizado para velocidad)", len(selected_artists))
             
             # Para asegurar diversidad, tomar 1 recomendación por artista
             # Obtener artistas similares basados en los artistas seleccionados
@@ -311,7 +333,7 @@ class MusicRecommendationService:
                 if len(recommendations) >= limit:
                     break
                 
-                print(f"🎤 Buscando artistas similares a: {top_artist.name}")
+                logger.debug("🎤 Buscando artistas similares a: %s", top_artist.name)
                 # Obtener más artistas similares y seleccionar aleatoriamente
                 # OPTIMIZACIÓN: Reducido de 10 a 7 para ser más rápido
                 similar_artists = await self.listenbrainz.get_similar_artists_from_recording(
@@ -319,7 +341,7 @@ class MusicRecommendationService:
                     limit=7,
                     musicbrainz_service=self.musicbrainz
                 )
-                print(f"   Encontrados {len(similar_artists)} artistas similares")
+                logger.debug("   Encontrados %s artistas similares", len(similar_artists))
                 
                 # Aleatorizar el orden de artistas similares
                 if similar_artists:
@@ -333,13 +355,13 @@ class MusicRecommendationService:
                     if (candidate.name not in processed_artists and 
                         candidate_lower not in library_artists):
                         similar_artist = candidate
-                        print(f"   ✅ Seleccionado: {candidate.name} (NO está en biblioteca)")
+                        logger.debug("   ✅ Seleccionado: %s (NO está en biblioteca)", candidate.name)
                         break
                     elif candidate_lower in library_artists:
-                        print(f"   ⏭️ Skipping {candidate.name}: ya está en biblioteca")
+                        logger.debug("   ⏭️ Skipping %s: ya está en biblioteca", candidate.name)
                 
                 if not similar_artist:
-                    print(f"   ⚠️ No hay artistas similares nuevos para {top_artist.name}")
+                    logger.warning("   ⚠️ No hay artistas similares nuevos para %s", top_artist.name)
                     continue
                     
                 processed_artists.add(similar_artist.name)
@@ -351,7 +373,7 @@ class MusicRecommendationService:
                     pass
                 
                 # Crear recomendación del artista similar
-                print(f"   ➕ Agregando recomendación: {similar_artist.name}")
+                logger.debug("   ➕ Agregando recomendación: %s", similar_artist.name)
                 
                 # Personalizar según el tipo de recomendación
                 title = ""
@@ -383,8 +405,8 @@ class MusicRecommendationService:
                         top_tracks = []
                     if top_tracks:
                         track_data = top_tracks[0]
-                        title = track_data.name
-                        artist_url = track_data.url if track_data.url else artist_url
+                        title = track_data.get("name", f"Música de {similar_artist.name}")
+                        artist_url = track_data.get("url") or artist_url
                         reason = f"🎵 Canción top de artista similar a {top_artist.name}"
                     else:
                         title = f"Música de {similar_artist.name}"
@@ -422,13 +444,11 @@ class MusicRecommendationService:
                 )
                 recommendations.append(recommendation)
             
-            print(f"✅ Total de recomendaciones de ListenBrainz: {len(recommendations)}")
+            logger.debug("✅ Total de recomendaciones de ListenBrainz: %s", len(recommendations))
             return recommendations
             
         except Exception as e:
-            print(f"❌ Error generando recomendaciones de ListenBrainz: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error generando recomendaciones de ListenBrainz: %s", e)
             return []
     
     async def _generate_custom_prompt_recommendations(
@@ -449,7 +469,7 @@ class MusicRecommendationService:
             recommendation_type: Tipo de recomendación
         """
         try:
-            print(f"🎨 Generando recomendaciones con prompt personalizado: {custom_prompt}")
+            logger.debug("🎨 Generando recomendaciones con prompt personalizado: %s", custom_prompt)
             
             # Preparar contexto del usuario
             recent_artists = [track.artist for track in user_profile.recent_tracks[:15]]
@@ -500,8 +520,8 @@ Aphex Twin - Selected Ambient Works | Electrónica ambient pionera con texturas
                 'max_output_tokens': 800,  # Suficiente para 5-10 recomendaciones
             }
             
-            response = self.model.generate_content(
-                ai_prompt,
+            response = await gemini_client.generate(
+                self.model, ai_prompt,
                 generation_config=generation_config
             )
             
@@ -510,8 +530,8 @@ Aphex Twin - Selected Ambient Works | Electrónica ambient pionera con texturas
                 ai_response = response.text.strip()
             except ValueError as e:
                 # Si la respuesta fue bloqueada por seguridad, intentar sin lista de biblioteca
-                print(f"⚠️ Respuesta bloqueada por filtros de seguridad de Gemini")
-                print(f"   Reintentando sin lista detallada de biblioteca...")
+                logger.warning("⚠️ Respuesta bloqueada por filtros de seguridad de Gemini")
+                logger.debug("   Reintentando sin lista detallada de biblioteca...")
                 
                 # Prompt simplificado sin artistas específicos
                 ai_prompt_simple = f"""TAREA: Genera {limit} recomendaciones musicales.
@@ -526,15 +546,15 @@ FORMATO (cada línea):
 NO generes análisis. EMPIEZA DIRECTAMENTE:
 """
                 
-                response = self.model.generate_content(ai_prompt_simple, generation_config=generation_config)
+                response = await gemini_client.generate(self.model, ai_prompt_simple, generation_config=generation_config)
                 try:
                     ai_response = response.text.strip()
                 except ValueError:
-                    print(f"❌ IA bloqueada por seguridad incluso con prompt simple")
+                    logger.error("❌ IA bloqueada por seguridad incluso con prompt simple")
                     return []
             
-            print(f"📝 Respuesta de IA recibida (longitud: {len(ai_response)})")
-            print(f"📝 DEBUG - Respuesta completa:\n{ai_response}\n---END---")
+            logger.debug("📝 Respuesta de IA recibida (longitud: %s)", len(ai_response))
+            logger.debug("📝 DEBUG - Respuesta completa:\n%s\n---END---", ai_response)
             
             # Procesar las recomendaciones de la IA
             recommendations = []
@@ -561,9 +581,9 @@ NO generes análisis. EMPIEZA DIRECTAMENTE:
                     if not any(skip in lower for skip in ['**', 'basado en', 'perfil', 'análisis', 'usuario', 'género']):
                         valid_lines.append(line_clean)
             
-            print(f"📝 DEBUG - Encontradas {len(valid_lines)} líneas válidas de {len(lines_raw)} totales")
+            logger.debug("📝 DEBUG - Encontradas %s líneas válidas de %s totales", len(valid_lines), len(lines_raw))
             if len(valid_lines) > 0:
-                print(f"📝 DEBUG - Primera línea válida: {valid_lines[0][:100]}")
+                logger.debug("📝 DEBUG - Primera línea válida: %s", valid_lines[0][:100])
             
             for line in valid_lines:
                 if len(recommendations) >= limit:
@@ -577,7 +597,7 @@ NO generes análisis. EMPIEZA DIRECTAMENTE:
                     
                     # Si la razón es muy corta (probablemente un fragmento), skip
                     if len(reason) < 20:
-                        print(f"   ⚠️ Razón muy corta ({len(reason)} chars), skipping: {reason}")
+                        logger.warning("   ⚠️ Razón muy corta (%s chars), skipping: %s", len(reason), reason)
                         continue
                     
                     # Dividir artista y nombre
@@ -599,12 +619,12 @@ NO generes análisis. EMPIEZA DIRECTAMENTE:
                     
                     # Patrones de fragmento con markdown o análisis
                     if any(pattern in reason for pattern in ['):**', '**', ':**', '*:', 'céntrico', 'fi:', 'hop:', 'rock:', 'punk:', 'jazz:', 'pop:', 'metal:']):
-                        print(f"   ⚠️ Razón con patrón markdown/análisis, skipping: {reason[:60]}")
+                        logger.warning("   ⚠️ Razón con patrón markdown/análisis, skipping: %s", reason[:60])
                         is_invalid = True
                     
                     # Empieza con minúscula (fragmento de oración)
                     if reason and reason[0].islower():
-                        print(f"   ⚠️ Razón empieza con minúscula (fragmento), skipping: {reason[:60]}")
+                        logger.warning("   ⚠️ Razón empieza con minúscula (fragmento), skipping: %s", reason[:60])
                         is_invalid = True
                     
                     # Frases de análisis (más exhaustivo)
@@ -615,18 +635,18 @@ NO generes análisis. EMPIEZA DIRECTAMENTE:
                         'basado en', 'el análisis'
                     ]
                     if any(phrase in reason.lower() for phrase in analysis_phrases):
-                        print(f"   ⚠️ Razón con frase de análisis, skipping: {reason[:60]}")
+                        logger.warning("   ⚠️ Razón con frase de análisis, skipping: %s", reason[:60])
                         is_invalid = True
                     
                     # Razón muy corta (menos de 8 palabras)
                     if len(reason.split()) < 8:
-                        print(f"   ⚠️ Razón muy corta ({len(reason.split())} palabras), skipping: {reason}")
+                        logger.warning("   ⚠️ Razón muy corta (%s palabras), skipping: %s", len(reason.split()), reason)
                         is_invalid = True
                     
                     # Detectar si la razón parece ser un fragmento de título de sección
                     # Ej: "Hip Hop Español Clásico y Colaborativo:**"
                     if reason.endswith(':**') or reason.endswith('**'):
-                        print(f"   ⚠️ Razón parece título de sección, skipping: {reason[:60]}")
+                        logger.warning("   ⚠️ Razón parece título de sección, skipping: %s", reason[:60])
                         is_invalid = True
                     
                     # Detectar palabras truncadas al inicio (señal de fragmento)
@@ -636,7 +656,7 @@ NO generes análisis. EMPIEZA DIRECTAMENTE:
                         # Verificar si parece un fragmento de palabra
                         common_fragments = ['hop', 'fi', 'pop', 'rap', 'dub', 'ska']
                         if first_word.lower() in common_fragments:
-                            print(f"   ⚠️ Razón empieza con fragmento de palabra ({first_word}), skipping: {reason[:60]}")
+                            logger.warning("   ⚠️ Razón empieza con fragmento de palabra (%s), skipping: %s", first_word, reason[:60])
                             is_invalid = True
                     
                     if is_invalid:
@@ -644,13 +664,13 @@ NO generes análisis. EMPIEZA DIRECTAMENTE:
                     
                     # VALIDACIÓN: Verificar que el artista NO esté en biblioteca
                     if artist.lower() in library_artists_set:
-                        print(f"   ⏭️ Skipping {artist}: ya está en biblioteca")
+                        logger.debug("   ⏭️ Skipping %s: ya está en biblioteca", artist)
                         continue
                     
                     # Verificar duplicados
                     track_key = f"{artist.lower()}|{name.lower()}"
                     if track_key in seen_tracks:
-                        print(f"   ⚠️ Duplicado detectado, skipping: {artist} - {name}")
+                        logger.warning("   ⚠️ Duplicado detectado, skipping: %s - %s", artist, name)
                         continue
                     seen_tracks.add(track_key)
                     
@@ -681,19 +701,19 @@ NO generes análisis. EMPIEZA DIRECTAMENTE:
                         tags=["custom", "specific"]
                     )
                     recommendations.append(recommendation)
-                    print(f"   ✅ Agregada: {artist} - {name}")
-                    print(f"      Razón: {reason[:80]}...")
+                    logger.debug("   ✅ Agregada: %s - %s", artist, name)
+                    logger.debug("      Razón: %s...", reason[:80])
                     
                 except Exception as e:
-                    print(f"   ⚠️ Error parseando línea: {line[:100]} | {e}")
+                    logger.warning("   ⚠️ Error parseando línea: %s | %s", line[:100], e)
                     continue
             
-            print(f"🎨 Total recomendaciones personalizadas generadas: {len(recommendations)}")
+            logger.debug("🎨 Total recomendaciones personalizadas generadas: %s", len(recommendations))
             
             # Si se generaron recomendaciones usando IA, intentar buscar en MusicBrainz
             # para agregar URLs y más información
             if self.musicbrainz and recommendations:
-                print("🔍 Enriqueciendo recomendaciones con datos de MusicBrainz...")
+                logger.debug("🔍 Enriqueciendo recomendaciones con datos de MusicBrainz...")
                 for rec in recommendations[:limit]:
                     try:
                         # Si es artista, buscar info del artista
@@ -711,15 +731,13 @@ NO generes análisis. EMPIEZA DIRECTAMENTE:
                                         rec.track.path = album_data.get("url", "")
                                         break
                     except Exception as e:
-                        print(f"   ⚠️ No se pudo enriquecer {rec.track.artist}: {e}")
+                        logger.warning("   ⚠️ No se pudo enriquecer %s: %s", rec.track.artist, e)
                         continue
             
             return recommendations
             
         except Exception as e:
-            print(f"❌ Error generando recomendaciones personalizadas: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error generando recomendaciones personalizadas: %s", e)
             return []
     
     async def _generate_ai_recommendations(
@@ -777,10 +795,10 @@ The Beatles - Hey Jude | Clásico del rock con melodías memorables y letras emo
                 'max_output_tokens': 600,
             }
             
-            response = self.model.generate_content(prompt, generation_config=generation_config)
+            response = await gemini_client.generate(self.model, prompt, generation_config=generation_config)
             ai_suggestions = response.text.strip()
             
-            print(f"📝 Respuesta de IA para biblioteca (longitud: {len(ai_suggestions)})")
+            logger.debug("📝 Respuesta de IA para biblioteca (longitud: %s)", len(ai_suggestions))
             
             # Procesar sugerencias de IA con parseo ROBUSTO
             recommendations = []
@@ -816,22 +834,22 @@ The Beatles - Hey Jude | Clásico del rock con melodías memorables y letras emo
                     # VALIDACIONES DE RAZÓN
                     # 1. No debe contener patrones de markdown o análisis
                     if any(pattern in reason for pattern in ['**', '):**', 'céntrico', 'fi:', 'hop:', 'rock:', 'punk:']):
-                        print(f"   ⚠️ Razón con patrón inválido, skipping: {reason[:60]}")
+                        logger.warning("   ⚠️ Razón con patrón inválido, skipping: %s", reason[:60])
                         continue
                     
                     # 2. Debe empezar con mayúscula (no es fragmento de oración)
                     if reason and reason[0].islower():
-                        print(f"   ⚠️ Razón empieza con minúscula, skipping: {reason[:60]}")
+                        logger.warning("   ⚠️ Razón empieza con minúscula, skipping: %s", reason[:60])
                         continue
                     
                     # 3. No debe contener frases de análisis
                     if any(phrase in reason.lower() for phrase in ['la lista de', 'el usuario', 'artistas recientes', 'demuestran', 'sugiere', 'análisis', 'perfil']):
-                        print(f"   ⚠️ Razón con frase de análisis, skipping: {reason[:60]}")
+                        logger.warning("   ⚠️ Razón con frase de análisis, skipping: %s", reason[:60])
                         continue
                     
                     # 4. Debe tener longitud razonable
                     if len(reason) < 20 or len(reason.split()) < 8:
-                        print(f"   ⚠️ Razón muy corta, skipping: {reason}")
+                        logger.warning("   ⚠️ Razón muy corta, skipping: %s", reason)
                         continue
                     
                     # 5. Dividir artista y canción
@@ -869,19 +887,17 @@ The Beatles - Hey Jude | Clásico del rock con melodías memorables y letras emo
                             tags=["ai-recommendation"]
                         )
                         recommendations.append(recommendation)
-                        print(f"   ✅ Agregada: {artist} - {song}")
+                        logger.debug("   ✅ Agregada: %s - %s", artist, song)
                         
                 except Exception as e:
-                    print(f"   ⚠️ Error parseando línea: {line_clean[:100]} | {e}")
+                    logger.warning("   ⚠️ Error parseando línea: %s | %s", line_clean[:100], e)
                     continue
             
-            print(f"🎨 Total recomendaciones de biblioteca con IA: {len(recommendations)}")
+            logger.debug("🎨 Total recomendaciones de biblioteca con IA: %s", len(recommendations))
             return recommendations
             
         except Exception as e:
-            print(f"❌ Error generando recomendaciones con IA: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error generando recomendaciones con IA: %s", e)
             return []
     
     async def _generate_library_only_recommendations(
@@ -906,7 +922,7 @@ The Beatles - Hey Jude | Clásico del rock con melodías memorables y letras emo
             custom_prompt: Criterio específico del usuario
         """
         try:
-            print(f"📚 Buscando recomendaciones en tu biblioteca de Navidrome...")
+            logger.debug("📚 Buscando recomendaciones en tu biblioteca de Navidrome...")
             
             # Preparar contexto del usuario
             recent_artists = [track.artist for track in user_profile.recent_tracks[:15]]
@@ -928,7 +944,7 @@ The Beatles - Hey Jude | Clásico del rock con melodías memorables y letras emo
             
             # Filtrar por género si se especifica
             if genre_filter:
-                print(f"   Filtrando por género: {genre_filter}")
+                logger.debug("   Filtrando por género: %s", genre_filter)
                 filtered_items = []
                 for item in library_items:
                     # Buscar en el género del item
@@ -938,9 +954,9 @@ The Beatles - Hey Jude | Clásico del rock con melodías memorables y letras emo
                 
                 if filtered_items:
                     library_items = filtered_items
-                    print(f"   Encontrados {len(filtered_items)} {item_type} de género '{genre_filter}'")
+                    logger.debug("   Encontrados %s %s de género '%s'", len(filtered_items), item_type, genre_filter)
                 else:
-                    print(f"   ⚠️ No se encontraron {item_type} del género '{genre_filter}', usando toda la biblioteca")
+                    logger.warning("   ⚠️ No se encontraron %s del género '%s', usando toda la biblioteca", item_type, genre_filter)
             
             # Filtrar música que NO ha escuchado recientemente (para redescubrir)
             recent_track_names = {track.name.lower() for track in user_profile.recent_tracks[:50]}
@@ -966,12 +982,12 @@ The Beatles - Hey Jude | Clásico del rock con melodías memorables y letras emo
                     if recent_count < 3:
                         rediscovery_items.append(item)
             
-            print(f"   📊 Total en biblioteca: {len(library_items)} {item_type}")
-            print(f"   🔍 Para redescubrir (no escuchados recientemente): {len(rediscovery_items)} {item_type}")
+            logger.debug("   📊 Total en biblioteca: %s %s", len(library_items), item_type)
+            logger.debug("   🔍 Para redescubrir (no escuchados recientemente): %s %s", len(rediscovery_items), item_type)
             
             # Si no hay suficientes items para redescubrir, usar toda la biblioteca
             if len(rediscovery_items) < limit:
-                print(f"   ⚠️ Pocos items para redescubrir, usando toda la biblioteca")
+                logger.warning("   ⚠️ Pocos items para redescubrir, usando toda la biblioteca")
                 candidate_items = library_items
             else:
                 candidate_items = rediscovery_items
@@ -1043,14 +1059,14 @@ Pink Floyd - Wish You Were Here | Rock progresivo atmosférico con guitarras emo
             
             # Intentar generar respuesta con manejo de bloqueo de seguridad
             try:
-                response = self.model.generate_content(prompt, generation_config=generation_config)
+                response = await gemini_client.generate(self.model, prompt, generation_config=generation_config)
                 ai_response = response.text.strip()
-                print(f"📝 Respuesta de IA recibida (longitud: {len(ai_response)})")
+                logger.debug("📝 Respuesta de IA recibida (longitud: %s)", len(ai_response))
             except ValueError as e:
                 # Si fue bloqueado por seguridad, intentar con prompt más simple
                 if "finish_reason" in str(e) or "response.text" in str(e):
-                    print(f"⚠️ Respuesta bloqueada por filtros de seguridad de Gemini")
-                    print(f"   Reintentando con prompt simplificado...")
+                    logger.warning("⚠️ Respuesta bloqueada por filtros de seguridad de Gemini")
+                    logger.debug("   Reintentando con prompt simplificado...")
                     
                     # Prompt mucho más simple sin listas largas
                     simple_prompt = f"""Recomienda {limit} {item_type} de música para redescubrir.
@@ -1069,11 +1085,11 @@ FORMATO (cada línea):"""
                     simple_prompt += "\n\nEMPIEZA DIRECTAMENTE:"
                     
                     try:
-                        response = self.model.generate_content(simple_prompt, generation_config=generation_config)
+                        response = await gemini_client.generate(self.model, simple_prompt, generation_config=generation_config)
                         ai_response = response.text.strip()
-                        print(f"📝 Respuesta de IA recibida con prompt simple (longitud: {len(ai_response)})")
+                        logger.debug("📝 Respuesta de IA recibida con prompt simple (longitud: %s)", len(ai_response))
                     except:
-                        print(f"❌ Fallo también con prompt simple, usando fallback básico")
+                        logger.error("❌ Fallo también con prompt simple, usando fallback básico")
                         # Fallback: recomendar aleatoriamente de los candidatos
                         return await self._generate_random_library_recommendations(
                             candidate_items, limit, recommendation_type
@@ -1214,19 +1230,17 @@ FORMATO (cada línea):"""
                                 source="biblioteca",
                                 tags=["library-recommendation", "rediscovery"]
                             ))
-                            print(f"   ✅ Agregada: {artist} - {name}")
+                            logger.debug("   ✅ Agregada: %s - %s", artist, name)
                 
                 except Exception as e:
-                    print(f"   ⚠️ Error parseando línea: {line_clean[:100]} | {e}")
+                    logger.warning("   ⚠️ Error parseando línea: %s | %s", line_clean[:100], e)
                     continue
             
-            print(f"📚 Total recomendaciones de biblioteca: {len(recommendations)}")
+            logger.debug("📚 Total recomendaciones de biblioteca: %s", len(recommendations))
             return recommendations
             
         except Exception as e:
-            print(f"❌ Error generando recomendaciones de biblioteca: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error generando recomendaciones de biblioteca: %s", e)
             return []
     
     async def _generate_random_library_recommendations(
@@ -1247,12 +1261,11 @@ FORMATO (cada línea):"""
         Returns:
             Lista de recomendaciones aleatorias
         """
-        print(f"🎲 Generando {limit} recomendaciones aleatorias de biblioteca (fallback)")
+        logger.debug("🎲 Generando %s recomendaciones aleatorias de biblioteca (fallback)", limit)
         
         recommendations = []
         
         # Seleccionar items aleatorios
-        import random
         selected_items = random.sample(candidate_items, min(limit, len(candidate_items)))
         
         for item in selected_items:
@@ -1299,10 +1312,10 @@ FORMATO (cada línea):"""
                     tags=["library-recommendation", "random"]
                 ))
             except Exception as e:
-                print(f"   ⚠️ Error creando recomendación aleatoria: {e}")
+                logger.warning("   ⚠️ Error creando recomendación aleatoria: %s", e)
                 continue
         
-        print(f"🎲 Generadas {len(recommendations)} recomendaciones aleatorias")
+        logger.debug("🎲 Generadas %s recomendaciones aleatorias", len(recommendations))
         return recommendations
     
     async def _generate_similarity_recommendations(
@@ -1353,7 +1366,7 @@ FORMATO (cada línea):"""
             return recommendations
             
         except Exception as e:
-            print(f"Error generando recomendaciones por similitud: {e}")
+            logger.debug("Error generando recomendaciones por similitud: %s", e)
             return []
     
     async def _extract_genre(self, artist: str, track: str) -> Optional[str]:
@@ -1461,36 +1474,36 @@ FORMATO (cada línea):"""
             Lista de recomendaciones de la biblioteca
         """
         try:
-            print(f"📚 Generando playlist de biblioteca: {description}")
+            logger.debug("📚 Generando playlist de biblioteca: %s", description)
             
             # PASO 0: Detectar cantidad solicitada en la descripción (si existe)
             detected_count = self._extract_song_count(description)
             if detected_count:
                 limit = detected_count
-                print(f"✨ Usando cantidad detectada de la descripción: {limit} canciones")
+                logger.debug("✨ Usando cantidad detectada de la descripción: %s canciones", limit)
             
             # PASO 0.5: Obtener géneros disponibles en la biblioteca para mapeo inteligente
             available_genres = await self._get_available_genres()
-            print(f"🎭 Géneros disponibles en biblioteca: {len(available_genres)}")
+            logger.debug("🎭 Géneros disponibles en biblioteca: %s", len(available_genres))
             
             # PASO 1: Intentar detectar nombres de artistas específicos
             artist_names = self._extract_artist_names(description)
             all_tracks = []
             seen_ids = set()
             
-            print(f"🔍 Análisis de descripción: '{description}'")
-            print(f"   Artistas detectados: {artist_names if artist_names else 'Ninguno'}")
+            logger.debug("🔍 Análisis de descripción: '%s'", description)
+            logger.debug("   Artistas detectados: %s", artist_names if artist_names else 'Ninguno')
             
             if artist_names:
-                print(f"🎤 Artistas detectados: {artist_names}")
-                print(f"🎯 Modo: Playlist específica de artista(s)")
+                logger.debug("🎤 Artistas detectados: %s", artist_names)
+                logger.debug("🎯 Modo: Playlist específica de artista(s)")
                 
                 # Buscar canciones específicas de esos artistas
                 for artist_name in artist_names:
-                    print(f"   🔍 Buscando canciones de '{artist_name}'...")
+                    logger.debug("   🔍 Buscando canciones de '%s'...", artist_name)
                     results = await self.navidrome.search(artist_name, limit=100)
                     
-                    print(f"      Resultados búsqueda: {len(results.get('tracks', []))} tracks, {len(results.get('albums', []))} albums, {len(results.get('artists', []))} artists")
+                    logger.debug("      Resultados búsqueda: %s tracks, %s albums, %s artists", len(results.get('tracks', [])), len(results.get('albums', [])), len(results.get('artists', [])))
                     
                     # Priorizar tracks del artista exacto
                     matches_found = 0
@@ -1502,7 +1515,7 @@ FORMATO (cada línea):"""
                                 seen_ids.add(track.id)
                                 matches_found += 1
                     
-                    print(f"      ✓ {matches_found} canciones coinciden con el artista")
+                    logger.debug("      ✓ %s canciones coinciden con el artista", matches_found)
                     
                     # También agregar de álbumes
                     for album in results.get('albums', []):
@@ -1514,16 +1527,16 @@ FORMATO (cada línea):"""
                                     all_tracks.append(track)
                                     seen_ids.add(track.id)
                 
-                print(f"✅ Encontradas {len(all_tracks)} canciones de los artistas especificados")
+                logger.debug("✅ Encontradas %s canciones de los artistas especificados", len(all_tracks))
                 
                 # Si encontramos canciones del artista, NO buscar más
                 # Solo crear playlist con canciones de ese artista
                 if len(all_tracks) > 0:
-                    print(f"🎵 Playlist exclusiva de {', '.join(artist_names)}")
+                    logger.debug("🎵 Playlist exclusiva de %s", ', '.join(artist_names))
                     # Saltar a la selección final
                     if len(all_tracks) >= limit:
                         # Tenemos suficientes canciones del artista
-                        selected = self._smart_track_selection(
+                        selected = await self._smart_track_selection(
                             all_tracks, 
                             artist_names,
                             limit, 
@@ -1539,10 +1552,10 @@ FORMATO (cada línea):"""
                             ) for track in selected
                         ]
                         
-                        print(f"🎵 Generadas {len(recommendations)} recomendaciones de biblioteca")
+                        logger.debug("🎵 Generadas %s recomendaciones de biblioteca", len(recommendations))
                         return recommendations
                     else:
-                        print(f"⚠️ Solo {len(all_tracks)} canciones encontradas del artista")
+                        logger.warning("⚠️ Solo %s canciones encontradas del artista", len(all_tracks))
                         # Si hay pocas, devolver todas las que hay
                         recommendations = [
                             Recommendation(
@@ -1552,7 +1565,7 @@ FORMATO (cada línea):"""
                                 source="library"
                             ) for track in all_tracks
                         ]
-                        print(f"🎵 Generadas {len(recommendations)} recomendaciones de biblioteca")
+                        logger.debug("🎵 Generadas %s recomendaciones de biblioteca", len(recommendations))
                         return recommendations
             
             # PASO 2: Si no hay artistas específicos o no se encontraron suficientes, buscar por género/keywords
@@ -1560,17 +1573,17 @@ FORMATO (cada línea):"""
                 # Intentar detectar género musical con mapeo inteligente
                 genres_detected = self._extract_genres(description)
                 if genres_detected:
-                    print(f"🎸 Géneros detectados: {genres_detected}")
+                    logger.debug("🎸 Géneros detectados: %s", genres_detected)
                     
                     # Filtrar solo los géneros que realmente existen en la biblioteca
                     valid_genres = [g for g in genres_detected if g in available_genres]
                     if valid_genres:
-                        print(f"✅ Géneros válidos en biblioteca: {valid_genres}")
+                        logger.debug("✅ Géneros válidos en biblioteca: %s", valid_genres)
                         
                         # ESTRATEGIA 1: Buscar por género usando getRandomSongs
                         for genre in valid_genres:
                             try:
-                                print(f"   🔍 Buscando por género '{genre}' con getRandomSongs...")
+                                logger.debug("   🔍 Buscando por género '%s' con getRandomSongs...", genre)
                                 genre_tracks = await self.navidrome.get_tracks(limit=100, genre=genre)
                                 added_count = 0
                                 for track in genre_tracks:
@@ -1578,14 +1591,14 @@ FORMATO (cada línea):"""
                                         all_tracks.append(track)
                                         seen_ids.add(track.id)
                                         added_count += 1
-                                print(f"   ✓ Género '{genre}' (getRandomSongs): {added_count} canciones nuevas")
+                                logger.debug("   ✓ Género '%s' (getRandomSongs): %s canciones nuevas", genre, added_count)
                             except Exception as e:
-                                print(f"   ⚠️ Error con getRandomSongs para '{genre}': {e}")
+                                logger.warning("   ⚠️ Error con getRandomSongs para '%s': %s", genre, e)
                         
                         # ESTRATEGIA 2: Buscar por género usando search (más robusto)
                         for genre in valid_genres:
                             try:
-                                print(f"   🔍 Buscando por género '{genre}' con search...")
+                                logger.debug("   🔍 Buscando por género '%s' con search...", genre)
                                 search_results = await self.navidrome.search(genre, limit=100)
                                 added_count = 0
                                 for track in search_results.get('tracks', []):
@@ -1599,13 +1612,13 @@ FORMATO (cada línea):"""
                                             all_tracks.append(track)
                                             seen_ids.add(track.id)
                                             added_count += 1
-                                print(f"   ✓ Género '{genre}' (search): {added_count} canciones nuevas")
+                                logger.debug("   ✓ Género '%s' (search): %s canciones nuevas", genre, added_count)
                             except Exception as e:
-                                print(f"   ⚠️ Error con search para '{genre}': {e}")
+                                logger.warning("   ⚠️ Error con search para '%s': %s", genre, e)
                         
                         # ESTRATEGIA 2.5: Si no encuentra nada, buscar sin filtro de género
                         if len(all_tracks) < 10:
-                            print(f"   🔄 Pocas canciones encontradas, buscando sin filtro de género...")
+                            logger.debug("   🔄 Pocas canciones encontradas, buscando sin filtro de género...")
                             for genre in valid_genres:
                                 try:
                                     search_results = await self.navidrome.search(genre, limit=50)
@@ -1615,13 +1628,13 @@ FORMATO (cada línea):"""
                                             all_tracks.append(track)
                                             seen_ids.add(track.id)
                                             added_count += 1
-                                    print(f"   ✓ Género '{genre}' (sin filtro): {added_count} canciones nuevas")
+                                    logger.debug("   ✓ Género '%s' (sin filtro): %s canciones nuevas", genre, added_count)
                                 except Exception as e:
-                                    print(f"   ⚠️ Error sin filtro para '{genre}': {e}")
+                                    logger.warning("   ⚠️ Error sin filtro para '%s': %s", genre, e)
                         
                         # ESTRATEGIA 2.75: Si aún hay pocas canciones, usar MusicBrainz
                         if len(all_tracks) < 15 and self.musicbrainz:
-                            print(f"   🎯 Pocas canciones encontradas ({len(all_tracks)}), activando MusicBrainz...")
+                            logger.debug("   🎯 Pocas canciones encontradas (%s), activando MusicBrainz...", len(all_tracks))
                             
                             # Extraer filtros adicionales de la descripción
                             additional_filters = self._extract_filters_from_description(description)
@@ -1640,14 +1653,14 @@ FORMATO (cada línea):"""
                                         seen_ids.add(track.id)
                                 
                                 if mb_tracks:
-                                    print(f"   ✅ MusicBrainz agregó {len(mb_tracks)} canciones para '{genre}'")
+                                    logger.debug("   ✅ MusicBrainz agregó %s canciones para '%s'", len(mb_tracks), genre)
                     else:
-                        print(f"⚠️ Ninguno de los géneros detectados existe literalmente en la biblioteca")
-                        print(f"   Detectados: {genres_detected}")
-                        print(f"   Disponibles: {list(available_genres)[:10]}...")
+                        logger.warning("⚠️ Ninguno de los géneros detectados existe literalmente en la biblioteca")
+                        logger.debug("   Detectados: %s", genres_detected)
+                        logger.debug("   Disponibles: %s...", list(available_genres)[:10])
                         
                         # ESTRATEGIA INTELIGENTE: Usar IA para identificar artistas del género solicitado
-                        print(f"🤖 Usando IA para identificar artistas que coinciden con el género solicitado...")
+                        logger.debug("🤖 Usando IA para identificar artistas que coinciden con el género solicitado...")
                         ai_matched_tracks = await self._ai_match_artists_by_genre(
                             description, 
                             genres_detected,
@@ -1659,11 +1672,11 @@ FORMATO (cada línea):"""
                                 all_tracks.append(track)
                                 seen_ids.add(track.id)
                         
-                        print(f"   ✅ IA identificó {len(ai_matched_tracks)} canciones del género solicitado")
+                        logger.debug("   ✅ IA identificó %s canciones del género solicitado", len(ai_matched_tracks))
                         
                         # ESTRATEGIA MUSICBRAINZ: Si aún hay pocas canciones, usar MusicBrainz como complemento
                         if len(all_tracks) < 20 and self.musicbrainz:
-                            print(f"   🎯 Complementando con MusicBrainz ({len(all_tracks)} canciones hasta ahora)...")
+                            logger.debug("   🎯 Complementando con MusicBrainz (%s canciones hasta ahora)...", len(all_tracks))
                             
                             # Extraer filtros adicionales de la descripción
                             additional_filters = self._extract_filters_from_description(description)
@@ -1682,15 +1695,15 @@ FORMATO (cada línea):"""
                                         seen_ids.add(track.id)
                                 
                                 if mb_tracks:
-                                    print(f"   ✅ MusicBrainz agregó {len(mb_tracks)} canciones para '{genre}'")
+                                    logger.debug("   ✅ MusicBrainz agregó %s canciones para '%s'", len(mb_tracks), genre)
                 
                 # ESTRATEGIA 3: Buscar por keywords generales
                 keywords = self._extract_keywords(description)
-                print(f"🔑 Palabras clave extraídas: {keywords}")
+                logger.debug("🔑 Palabras clave extraídas: %s", keywords)
                 
                 for keyword in keywords[:3]:  # Usar hasta 3 keywords
                     try:
-                        print(f"   🔍 Buscando por keyword '{keyword}'...")
+                        logger.debug("   🔍 Buscando por keyword '%s'...", keyword)
                         results = await self.navidrome.search(keyword, limit=50)
                         added_count = 0
                         for track in results.get('tracks', []):
@@ -1698,9 +1711,9 @@ FORMATO (cada línea):"""
                                 all_tracks.append(track)
                                 seen_ids.add(track.id)
                                 added_count += 1
-                        print(f"   ✓ Keyword '{keyword}': {added_count} canciones nuevas")
+                        logger.debug("   ✓ Keyword '%s': %s canciones nuevas", keyword, added_count)
                     except Exception as e:
-                        print(f"   ⚠️ Error buscando keyword '{keyword}': {e}")
+                        logger.warning("   ⚠️ Error buscando keyword '%s': %s", keyword, e)
             
             # PASO 3: Si no hay artistas específicos, obtener una muestra grande de la biblioteca
             # para que el algoritmo de selección tenga suficiente material
@@ -1708,19 +1721,19 @@ FORMATO (cada línea):"""
             if not artist_names and len(all_tracks) < limit * 2:
                 # Sin artistas específicos, necesitamos una muestra grande para seleccionar
                 target_pool_size = max(200, limit * 5)  # Al menos 5x el límite solicitado
-                print(f"🎲 Sin artistas específicos y pocas canciones ({len(all_tracks)}): obteniendo {target_pool_size} aleatorias...")
+                logger.debug("🎲 Sin artistas específicos y pocas canciones (%s): obteniendo %s aleatorias...", len(all_tracks), target_pool_size)
                 random_tracks = await self.navidrome.get_tracks(limit=target_pool_size)
                 for track in random_tracks:
                     if track.id not in seen_ids:
                         all_tracks.append(track)
                         seen_ids.add(track.id)
-                print(f"✅ Agregadas {len(random_tracks)} canciones aleatorias")
+                logger.debug("✅ Agregadas %s canciones aleatorias", len(random_tracks))
             elif not artist_names:
-                print(f"✅ Ya hay {len(all_tracks)} canciones, no se agregan aleatorias")
+                logger.debug("✅ Ya hay %s canciones, no se agregan aleatorias", len(all_tracks))
             
             # PASO 4: Si aún no hay suficientes (caso con artistas específicos), completar
             elif len(all_tracks) < limit * 2:
-                print(f"⚠️ Solo {len(all_tracks)} canciones de artistas específicos, complementando...")
+                logger.warning("⚠️ Solo %s canciones de artistas específicos, complementando...", len(all_tracks))
                 additional = max(100, limit * 2)
                 random_tracks = await self.navidrome.get_tracks(limit=additional)
                 for track in random_tracks:
@@ -1730,40 +1743,40 @@ FORMATO (cada línea):"""
             
             # PASO 5: FALLBACK AGRESIVO - Si aún no hay suficientes canciones, obtener más
             if len(all_tracks) < limit:
-                print(f"🚨 FALLBACK: Solo {len(all_tracks)} canciones encontradas, obteniendo más...")
+                logger.debug("🚨 FALLBACK: Solo %s canciones encontradas, obteniendo más...", len(all_tracks))
                 # Intentar obtener más canciones aleatorias
                 fallback_tracks = await self.navidrome.get_tracks(limit=300)
                 for track in fallback_tracks:
                     if track.id not in seen_ids:
                         all_tracks.append(track)
                         seen_ids.add(track.id)
-                print(f"✅ Fallback agregó {len(fallback_tracks)} canciones más")
+                logger.debug("✅ Fallback agregó %s canciones más", len(fallback_tracks))
             
-            print(f"📊 Total de canciones disponibles antes de filtrado: {len(all_tracks)}")
+            logger.debug("📊 Total de canciones disponibles antes de filtrado: %s", len(all_tracks))
             
             if not all_tracks:
-                print("❌ No se encontraron canciones en la biblioteca")
+                logger.error("❌ No se encontraron canciones en la biblioteca")
                 return []
             
             # POST-FILTRADO: Aplicar filtro de idioma si se especificó
             description_lower = description.lower()
             if 'español' in description_lower or 'castellano' in description_lower:
-                print(f"🇪🇸 Aplicando filtro de idioma ESPAÑOL...")
-                all_tracks = self._filter_by_language(all_tracks, 'spanish')
-                print(f"   ✅ Quedan {len(all_tracks)} canciones en español")
+                logger.debug("🇪🇸 Aplicando filtro de idioma ESPAÑOL...")
+                all_tracks = await self._filter_by_language(all_tracks, 'spanish')
+                logger.debug("   ✅ Quedan %s canciones en español", len(all_tracks))
             elif 'inglés' in description_lower or 'english' in description_lower:
-                print(f"🇬🇧 Aplicando filtro de idioma INGLÉS...")
-                all_tracks = self._filter_by_language(all_tracks, 'english')
-                print(f"   ✅ Quedan {len(all_tracks)} canciones en inglés")
+                logger.debug("🇬🇧 Aplicando filtro de idioma INGLÉS...")
+                all_tracks = await self._filter_by_language(all_tracks, 'english')
+                logger.debug("   ✅ Quedan %s canciones en inglés", len(all_tracks))
             
             if not all_tracks:
-                print("❌ No quedan canciones después del filtrado de idioma")
+                logger.error("❌ No quedan canciones después del filtrado de idioma")
                 return []
             
-            print(f"📊 Total de canciones disponibles después de filtrado: {len(all_tracks)}")
+            logger.debug("📊 Total de canciones disponibles después de filtrado: %s", len(all_tracks))
             
             # NUEVO ALGORITMO: Selección con diversidad garantizada de artistas
-            selected_tracks = self._smart_track_selection(
+            selected_tracks = await self._smart_track_selection(
                 all_tracks,
                 artist_names,
                 limit,
@@ -1782,16 +1795,14 @@ FORMATO (cada línea):"""
                 )
                 recommendations.append(rec)
             
-            print(f"🎵 Generadas {len(recommendations)} recomendaciones de biblioteca")
+            logger.debug("🎵 Generadas %s recomendaciones de biblioteca", len(recommendations))
             return recommendations
             
         except Exception as e:
-            print(f"❌ Error generando playlist de biblioteca: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error generando playlist de biblioteca: %s", e)
             return []
     
-    def _smart_track_selection(
+    async def _smart_track_selection(
         self,
         all_tracks: List[Track],
         artist_names: List[str],
@@ -1809,16 +1820,14 @@ FORMATO (cada línea):"""
         Returns:
             Lista de tracks seleccionadas con buena diversidad
         """
-        import random
-        from collections import defaultdict
         
-        print(f"🎯 Seleccionando {limit} canciones con diversidad de artistas...")
+        logger.debug("🎯 Seleccionando %s canciones con diversidad de artistas...", limit)
         
         # Si no hay artistas específicos y hay muchas canciones, pre-filtrar con IA
         if not artist_names and len(all_tracks) > limit * 3:
-            print(f"🤖 Usando IA para pre-filtrar canciones relevantes...")
-            all_tracks = self._ai_filter_tracks(all_tracks, description, limit * 3)
-            print(f"✅ Pre-filtradas a {len(all_tracks)} canciones más relevantes")
+            logger.debug("🤖 Usando IA para pre-filtrar canciones relevantes...")
+            all_tracks = await self._ai_filter_tracks(all_tracks, description, limit * 3)
+            logger.debug("✅ Pre-filtradas a %s canciones más relevantes", len(all_tracks))
         
         # Agrupar canciones por artista
         tracks_by_artist = defaultdict(list)
@@ -1826,11 +1835,11 @@ FORMATO (cada línea):"""
             artist_key = track.artist.lower() if track.artist else "unknown"
             tracks_by_artist[artist_key].append(track)
         
-        print(f"📊 Canciones agrupadas en {len(tracks_by_artist)} artistas diferentes")
+        logger.debug("📊 Canciones agrupadas en %s artistas diferentes", len(tracks_by_artist))
         
         # Si hay artistas específicos solicitados, dar prioridad equitativa
         if artist_names:
-            print(f"🎤 Distribuyendo equitativamente entre {len(artist_names)} artistas: {artist_names}")
+            logger.debug("🎤 Distribuyendo equitativamente entre %s artistas: %s", len(artist_names), artist_names)
             
             # Calcular cuántas canciones por artista
             songs_per_artist = max(1, limit // len(artist_names))
@@ -1855,9 +1864,9 @@ FORMATO (cada línea):"""
                     to_take = min(songs_per_artist, len(matching_tracks))
                     selected.extend(matching_tracks[:to_take])
                     artist_count[artist_lower] = to_take
-                    print(f"   ✓ {artist_name}: {to_take} canciones")
+                    logger.debug("   ✓ %s: %s canciones", artist_name, to_take)
                 else:
-                    print(f"   ✗ {artist_name}: no se encontraron canciones")
+                    logger.debug("   ✗ %s: no se encontraron canciones", artist_name)
             
             # Segunda pasada: rellenar con canciones adicionales si hay espacio
             if len(selected) < limit and remaining > 0:
@@ -1879,17 +1888,17 @@ FORMATO (cada línea):"""
                         random.shuffle(matching_tracks)
                         additional = min(1, len(matching_tracks), limit - len(selected))
                         selected.extend(matching_tracks[:additional])
-                        print(f"   + {artist_name}: +{additional} adicional(es)")
+                        logger.debug("   + %s: +%s adicional(es)", artist_name, additional)
             
             # Aleatorizar el orden final para mezclar mejor
             random.shuffle(selected)
             
-            print(f"✅ Seleccionadas {len(selected)} canciones con distribución equitativa")
+            logger.debug("✅ Seleccionadas %s canciones con distribución equitativa", len(selected))
             return selected[:limit]
         
         else:
             # No hay artistas específicos: selección por diversidad general
-            print(f"🎲 Selección diversificada sin artistas específicos")
+            logger.debug("🎲 Selección diversificada sin artistas específicos")
             
             # Calcular máximo de canciones por artista (evitar que un artista domine)
             max_per_artist = max(2, limit // max(5, len(tracks_by_artist) // 3))
@@ -1933,12 +1942,12 @@ FORMATO (cada línea):"""
             
             # Mostrar estadísticas
             artists_used = len([count for count in artist_usage.values() if count > 0])
-            print(f"✅ Seleccionadas {len(selected)} canciones de {artists_used} artistas diferentes")
-            print(f"   Promedio: {len(selected)/artists_used:.1f} canciones por artista")
+            logger.debug("✅ Seleccionadas %s canciones de %s artistas diferentes", len(selected), artists_used)
+            logger.debug("   Promedio: %.1f canciones por artista", len(selected)/artists_used)
             
             return selected[:limit]
     
-    def _ai_filter_tracks(
+    async def _ai_filter_tracks(
         self,
         tracks: List[Track],
         description: str,
@@ -1954,7 +1963,6 @@ FORMATO (cada línea):"""
         Returns:
             Lista filtrada de canciones más relevantes
         """
-        import random
         
         try:
             # Limitar a un máximo razonable para la IA
@@ -1998,9 +2006,9 @@ FORMATO (cada línea):"""
             
             # Log de especificaciones detectadas
             if special_instructions:
-                print(f"🎯 Especificaciones detectadas:")
+                logger.debug("🎯 Especificaciones detectadas:")
                 for inst in special_instructions:
-                    print(f"   • {inst}")
+                    logger.debug("   • %s", inst)
             
             prompt = f"""Analiza esta lista de canciones y selecciona las que mejor coincidan con: "{description}"
 
@@ -2021,7 +2029,7 @@ INSTRUCCIONES:
 
 Selecciona ahora (máximo {min(target_count, sample_size)} canciones):"""
 
-            response = self.model.generate_content(prompt)
+            response = await gemini_client.generate(self.model, prompt)
             selected_indices = self._parse_selection(response.text)
             
             # Construir lista de canciones seleccionadas
@@ -2039,7 +2047,7 @@ Selecciona ahora (máximo {min(target_count, sample_size)} canciones):"""
             return filtered
             
         except Exception as e:
-            print(f"⚠️ Error en filtrado por IA: {e}")
+            logger.warning("⚠️ Error en filtrado por IA: %s", e)
             # Fallback: devolver muestra aleatoria
             return random.sample(tracks, min(target_count, len(tracks)))
     
@@ -2057,7 +2065,6 @@ Selecciona ahora (máximo {min(target_count, sample_size)} canciones):"""
         Returns:
             Lista de nombres de artistas detectados
         """
-        import re
         
         artists = []
         
@@ -2117,7 +2124,7 @@ Selecciona ahora (máximo {min(target_count, sample_size)} canciones):"""
                 # - Nombres cortos pero únicos: "oasis", "queen", "muse" (1 palabra pero >2 chars)
                 if word_count >= 3 or (word_count >= 1 and char_count > 3):
                     # Podría ser un nombre de artista
-                    print(f"🤔 Texto ambiguo, podría ser nombre de artista: '{text_clean}'")
+                    logger.debug("🤔 Texto ambiguo, podría ser nombre de artista: '%s'", text_clean)
                     artists.append(text_clean)
         
         # ESTRATEGIA 3: Detectar nombres propios (palabras con mayúscula)
@@ -2143,7 +2150,7 @@ Selecciona ahora (máximo {min(target_count, sample_size)} canciones):"""
                 unique_artists.append(artist)
         
         if unique_artists:
-            print(f"🎤 Nombres de artistas extraídos: {unique_artists}")
+            logger.debug("🎤 Nombres de artistas extraídos: %s", unique_artists)
         
         return unique_artists
     
@@ -2162,7 +2169,6 @@ Selecciona ahora (máximo {min(target_count, sample_size)} canciones):"""
         Returns:
             Número de canciones solicitadas, o None si no se especifica
         """
-        import re
         
         # Patrones para detectar cantidad de canciones
         patterns = [
@@ -2177,7 +2183,7 @@ Selecciona ahora (máximo {min(target_count, sample_size)} canciones):"""
                 count = int(match.group(1))
                 # Validar que sea un número razonable (entre 5 y 200)
                 if 5 <= count <= 200:
-                    print(f"🔢 Cantidad detectada: {count} canciones")
+                    logger.debug("🔢 Cantidad detectada: %s canciones", count)
                     return count
         
         return None
@@ -2296,7 +2302,7 @@ Selecciona ahora (máximo {min(target_count, sample_size)} canciones):"""
                 f"playlist de {requested_genre}" in text_lower):
                 # Agregar todos los géneros relacionados que podrían existir en la biblioteca
                 detected_genres.extend(possible_genres)
-                print(f"🎸 Género '{requested_genre}' detectado → mapea a: {possible_genres}")
+                logger.debug("🎸 Género '%s' detectado → mapea a: %s", requested_genre, possible_genres)
         
         # Eliminar duplicados manteniendo orden
         unique_genres = []
@@ -2326,11 +2332,11 @@ Selecciona ahora (máximo {min(target_count, sample_size)} canciones):"""
                     if genre:
                         genres.add(genre)
             
-            print(f"🎭 Encontrados {len(genres)} géneros únicos en biblioteca")
+            logger.debug("🎭 Encontrados %s géneros únicos en biblioteca", len(genres))
             return genres
             
         except Exception as e:
-            print(f"⚠️ Error obteniendo géneros disponibles: {e}")
+            logger.warning("⚠️ Error obteniendo géneros disponibles: %s", e)
             # Fallback: géneros comunes
             return {
                 'rock', 'pop', 'jazz', 'blues', 'metal', 'punk', 'folk', 
@@ -2347,7 +2353,6 @@ Selecciona ahora (máximo {min(target_count, sample_size)} canciones):"""
         Returns:
             Lista de palabras clave
         """
-        import re
         
         # Remover palabras comunes (stop words en español)
         stop_words = {
@@ -2409,7 +2414,7 @@ Selecciona ahora (máximo {min(target_count, sample_size)} canciones):"""
         try:
             # Obtener una muestra grande y diversa de la biblioteca
             sample_size = min(500, limit * 3)
-            print(f"   📚 Obteniendo muestra de {sample_size} canciones de la biblioteca...")
+            logger.debug("   📚 Obteniendo muestra de %s canciones de la biblioteca...", sample_size)
             library_tracks = await self.navidrome.get_tracks(limit=sample_size)
             
             if not library_tracks:
@@ -2424,7 +2429,7 @@ Selecciona ahora (máximo {min(target_count, sample_size)} canciones):"""
                 artists_map[artist].append(track)
             
             artists_list = list(artists_map.keys())
-            print(f"   🎤 {len(artists_list)} artistas únicos en la muestra")
+            logger.debug("   🎤 %s artistas únicos en la muestra", len(artists_list))
             
             # Crear prompt para la IA
             genres_text = ', '.join(genres)
@@ -2460,7 +2465,7 @@ EJEMPLO: 5,12,23,34,45,67,89
 Números de artistas que coinciden:"""
 
             # Generar con IA
-            response = self.model.generate_content(prompt)
+            response = await gemini_client.generate(self.model, prompt)
             selected_indices = self._parse_selection(response.text)
             
             # Construir lista de tracks de los artistas seleccionados
@@ -2474,17 +2479,15 @@ Números de artistas que coinciden:"""
                     # Agregar todas las canciones de este artista
                     matched_tracks.extend(artists_map[artist])
             
-            print(f"   🎯 IA seleccionó {len(selected_artists)} artistas: {list(selected_artists)[:5]}...")
+            logger.debug("   🎯 IA seleccionó %s artistas: %s...", len(selected_artists), list(selected_artists)[:5])
             
             return matched_tracks[:limit]
             
         except Exception as e:
-            print(f"   ⚠️ Error en matching por IA: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.warning("   ⚠️ Error en matching por IA: %s", e, exc_info=True)
             return []
     
-    def _filter_by_language(self, tracks: List[Track], language: str) -> List[Track]:
+    async def _filter_by_language(self, tracks: List[Track], language: str) -> List[Track]:
         """Filtrar canciones por idioma del artista usando conocimiento de la IA
         
         Args:
@@ -2501,7 +2504,7 @@ Números de artistas que coinciden:"""
             if not artists:
                 return tracks
             
-            print(f"   🎤 Filtrando {len(artists)} artistas por idioma {language}...")
+            logger.debug("   🎤 Filtrando %s artistas por idioma %s...", len(artists), language)
             
             # Preparar prompt para la IA
             artists_text = '\n'.join([f"{i}. {artist}" for i, artist in enumerate(artists[:150])])
@@ -2527,7 +2530,7 @@ Ejemplo: 1,5,8,12,23,34,56,78,90
 
 Números de artistas en {language_name}:"""
 
-            response = self.model.generate_content(prompt)
+            response = await gemini_client.generate(self.model, prompt)
             selected_indices = self._parse_selection(response.text)
             
             # Crear set de artistas válidos
@@ -2536,7 +2539,7 @@ Números de artistas en {language_name}:"""
                 if idx < len(artists):
                     valid_artists.add(artists[idx].lower())
             
-            print(f"   ✓ {len(valid_artists)} artistas válidos en {language_name}: {list(valid_artists)[:5]}...")
+            logger.debug("   ✓ %s artistas válidos en %s: %s...", len(valid_artists), language_name, list(valid_artists)[:5])
             
             # Filtrar canciones
             filtered_tracks = []
@@ -2547,7 +2550,7 @@ Números de artistas en {language_name}:"""
             return filtered_tracks
             
         except Exception as e:
-            print(f"   ⚠️ Error filtrando por idioma: {e}")
+            logger.warning("   ⚠️ Error filtrando por idioma: %s", e)
             # Si falla, devolver todas
             return tracks
     
@@ -2570,19 +2573,19 @@ Números de artistas en {language_name}:"""
             Lista de tracks de artistas que cumplen
         """
         if not self.musicbrainz:
-            print("   ⚠️ MusicBrainz no disponible")
+            logger.warning("   ⚠️ MusicBrainz no disponible")
             return []
         
         try:
-            print(f"🎯 MusicBrainz: Buscando artistas de '{genre}' en tu biblioteca...")
+            logger.debug("🎯 MusicBrainz: Buscando artistas de '%s' en tu biblioteca...", genre)
             
             # Paso 1: Obtener lista de artistas de la biblioteca
-            print(f"   📚 Obteniendo artistas de la biblioteca...")
+            logger.debug("   📚 Obteniendo artistas de la biblioteca...")
             library_tracks = await self.navidrome.get_tracks(limit=500)
             
             # Extraer artistas únicos
             unique_artists = list(set([track.artist for track in library_tracks if track.artist]))
-            print(f"   🎤 {len(unique_artists)} artistas únicos en biblioteca")
+            logger.debug("   🎤 %s artistas únicos en biblioteca", len(unique_artists))
             
             # Paso 2: Preparar filtros para MusicBrainz
             filters = {"genre": genre}
@@ -2597,12 +2600,12 @@ Números de artistas en {language_name}:"""
             )
             
             if not matching_artists_data:
-                print(f"   ❌ Ningún artista de tu biblioteca cumple con '{genre}'")
+                logger.error("   ❌ Ningún artista de tu biblioteca cumple con '%s'", genre)
                 return []
             
             # Extraer nombres de artistas que coinciden
             matching_artist_names = set([a["name"].lower() for a in matching_artists_data])
-            print(f"   ✅ Artistas coincidentes: {list(matching_artist_names)}")
+            logger.debug("   ✅ Artistas coincidentes: %s", list(matching_artist_names))
             
             # Paso 4: Filtrar tracks solo de esos artistas
             matching_tracks = []
@@ -2610,14 +2613,12 @@ Números de artistas en {language_name}:"""
                 if track.artist and track.artist.lower() in matching_artist_names:
                     matching_tracks.append(track)
             
-            print(f"   🎵 {len(matching_tracks)} canciones de {len(matching_artist_names)} artistas verificados")
+            logger.debug("   🎵 %s canciones de %s artistas verificados", len(matching_tracks), len(matching_artist_names))
             
             return matching_tracks
             
         except Exception as e:
-            print(f"   ❌ Error en búsqueda con MusicBrainz: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("   ❌ Error en búsqueda con MusicBrainz: %s", e)
             return []
     
     def _extract_filters_from_description(self, description: str) -> Dict[str, Any]:
@@ -2627,7 +2628,6 @@ Números de artistas en {language_name}:"""
             "indie español de los 2000" → {genre: "indie", country: "ES", year_from: 2000, year_to: 2009}
             "rock británico de los 70" → {genre: "rock", country: "GB", year_from: 1970, year_to: 1979}
         """
-        import re
         
         filters = {}
         desc_lower = description.lower()
@@ -2674,7 +2674,6 @@ Números de artistas en {language_name}:"""
         Returns:
             Lista de índices seleccionados
         """
-        import re
         
         # Buscar todos los números en el texto
         numbers = re.findall(r'\d+', text)
@@ -2699,16 +2698,16 @@ Números de artistas en {language_name}:"""
                 feedback_type=feedback_type,
                 context=recommendation_context
             )
-            logger.debug(f"📚 Feedback procesado: {user_id} - {feedback_type}")
+            logger.debug("📚 Feedback procesado: %s - %s", user_id, feedback_type)
         except Exception as e:
-            logger.error(f"❌ Error procesando feedback: {e}")
+            logger.error("❌ Error procesando feedback: %s", e)
     
     async def get_personalized_weights(self, user_id: int, features: Dict[str, Any]) -> Dict[str, float]:
         """Obtener pesos personalizados para recomendaciones basados en aprendizaje"""
         try:
             return adaptive_learning_system.get_recommendation_weights(user_id, features)
         except Exception as e:
-            logger.error(f"❌ Error obteniendo pesos personalizados: {e}")
+            logger.error("❌ Error obteniendo pesos personalizados: %s", e)
             return {}
     
     async def get_user_learning_insights(self, user_id: int) -> Dict[str, Any]:
@@ -2716,7 +2715,7 @@ Números de artistas en {language_name}:"""
         try:
             return adaptive_learning_system.get_user_insights(user_id)
         except Exception as e:
-            logger.error(f"❌ Error obteniendo insights de aprendizaje: {e}")
+            logger.error("❌ Error obteniendo insights de aprendizaje: %s", e)
             return {"error": str(e)}
     
     async def _apply_learning_weights(
@@ -2764,7 +2763,7 @@ Números de artistas en {language_name}:"""
             return recommendations
             
         except Exception as e:
-            logger.error(f"❌ Error aplicando pesos de aprendizaje: {e}")
+            logger.error("❌ Error aplicando pesos de aprendizaje: %s", e)
             return recommendations
     
     async def generate_hybrid_recommendations(
@@ -2785,7 +2784,7 @@ Números de artistas en {language_name}:"""
                         strategy_enum = RecommendationStrategy(strategy_name)
                         strategy_weights[strategy_enum] = weight
                     except ValueError:
-                        logger.warning(f"⚠️ Estrategia desconocida: {strategy_name}")
+                        logger.warning("⚠️ Estrategia desconocida: %s", strategy_name)
             
             # Generar recomendaciones híbridas
             hybrid_scores = await self.hybrid_engine.generate_hybrid_recommendations(
@@ -2808,11 +2807,11 @@ Números de artistas en {language_name}:"""
                 
                 recommendations.append(recommendation)
             
-            logger.info(f"✅ Generadas {len(recommendations)} recomendaciones híbridas")
+            logger.info("✅ Generadas %s recomendaciones híbridas", len(recommendations))
             return recommendations
             
         except Exception as e:
-            logger.error(f"❌ Error generando recomendaciones híbridas: {e}")
+            logger.error("❌ Error generando recomendaciones híbridas: %s", e)
             # Fallback a recomendaciones normales
             return await self.generate_recommendations(user_profile)
     
@@ -2828,7 +2827,7 @@ Números de artistas en {language_name}:"""
                 user_profile, user_id, context_data
             )
         except Exception as e:
-            logger.error(f"❌ Error analizando perfil avanzado: {e}")
+            logger.error("❌ Error analizando perfil avanzado: %s", e)
             return {"error": str(e)}
     
     async def get_contextual_recommendations(
@@ -2843,7 +2842,7 @@ Números de artistas en {language_name}:"""
                 user_id, context, available_tracks
             )
         except Exception as e:
-            logger.error(f"❌ Error obteniendo recomendaciones contextuales: {e}")
+            logger.error("❌ Error obteniendo recomendaciones contextuales: %s", e)
             return []
     
     def get_hybrid_engine_stats(self) -> Dict[str, Any]:
@@ -2851,7 +2850,7 @@ Números de artistas en {language_name}:"""
         try:
             return self.hybrid_engine.get_engine_stats()
         except Exception as e:
-            logger.error(f"❌ Error obteniendo estadísticas del motor híbrido: {e}")
+            logger.error("❌ Error obteniendo estadísticas del motor híbrido: %s", e)
             return {"error": str(e)}
     
     def get_personalization_stats(self) -> Dict[str, Any]:
@@ -2859,7 +2858,7 @@ Números de artistas en {language_name}:"""
         try:
             return advanced_personalization_system.get_system_stats()
         except Exception as e:
-            logger.error(f"❌ Error obteniendo estadísticas de personalización: {e}")
+            logger.error("❌ Error obteniendo estadísticas de personalización: %s", e)
             return {"error": str(e)}
     
     async def discover_new_music(self, user_profile: UserProfile, user_id: int, 
@@ -2868,7 +2867,7 @@ Números de artistas en {language_name}:"""
         try:
             return await user_features_system.discover_music(user_profile, user_id, discovery_type)
         except Exception as e:
-            logger.error(f"❌ Error descubriendo música: {e}")
+            logger.error("❌ Error descubriendo música: %s", e)
             return []
     
     def track_user_activity(self, user_id: int, activity_type: str, metadata: Dict[str, Any] = None):
@@ -2876,14 +2875,14 @@ Números de artistas en {language_name}:"""
         try:
             user_features_system.track_user_activity(user_id, activity_type, metadata)
         except Exception as e:
-            logger.error(f"❌ Error rastreando actividad: {e}")
+            logger.error("❌ Error rastreando actividad: %s", e)
     
     def get_user_profile_enhanced(self, user_id: int) -> Dict[str, Any]:
         """Obtener perfil mejorado del usuario con gamificación"""
         try:
             return user_features_system.get_user_profile_enhanced(user_id)
         except Exception as e:
-            logger.error(f"❌ Error obteniendo perfil mejorado: {e}")
+            logger.error("❌ Error obteniendo perfil mejorado: %s", e)
             return {"error": str(e)}
     
     def get_leaderboard(self, limit: int = 10) -> List[Dict[str, Any]]:
@@ -2891,7 +2890,7 @@ Números de artistas en {language_name}:"""
         try:
             return user_features_system.get_leaderboard(limit)
         except Exception as e:
-            logger.error(f"❌ Error obteniendo leaderboard: {e}")
+            logger.error("❌ Error obteniendo leaderboard: %s", e)
             return []
     
     def get_system_health(self) -> Dict[str, Any]:
@@ -2899,7 +2898,7 @@ Números de artistas en {language_name}:"""
         try:
             return advanced_monitoring_system.get_system_health()
         except Exception as e:
-            logger.error(f"❌ Error obteniendo salud del sistema: {e}")
+            logger.error("❌ Error obteniendo salud del sistema: %s", e)
             return {"error": str(e)}
     
     def get_detailed_metrics(self, hours: int = 24) -> Dict[str, Any]:
@@ -2907,7 +2906,7 @@ Números de artistas en {language_name}:"""
         try:
             return advanced_monitoring_system.get_detailed_metrics(hours)
         except Exception as e:
-            logger.error(f"❌ Error obteniendo métricas detalladas: {e}")
+            logger.error("❌ Error obteniendo métricas detalladas: %s", e)
             return {"error": str(e)}
     
     def get_error_stats(self, hours: int = 24) -> Dict[str, Any]:
@@ -2915,7 +2914,7 @@ Números de artistas en {language_name}:"""
         try:
             return error_recovery_system.get_error_stats(hours)
         except Exception as e:
-            logger.error(f"❌ Error obteniendo estadísticas de errores: {e}")
+            logger.error("❌ Error obteniendo estadísticas de errores: %s", e)
             return {"error": str(e)}
     
     def get_health_status(self) -> Dict[str, Any]:
@@ -2923,5 +2922,5 @@ Números de artistas en {language_name}:"""
         try:
             return error_recovery_system.get_health_status()
         except Exception as e:
-            logger.error(f"❌ Error obteniendo estado de salud: {e}")
+            logger.error("❌ Error obteniendo estado de salud: %s", e)
             return {"error": str(e)}
\ No newline at end of file
@@ -2,13 +2,16 @@
 Sistema de caché distribuido con Redis y fallback automático
 """
 import redis
-import json
 import os
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Any, Callable, Dict, Optional, TypeVar, Awaitable
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar, Awaitable
 from functools import wraps
 import logging
 
+from services import json_utils
+
 logger = logging.getLogger(__name__)
 
 R = TypeVar('R')
@@ -57,7 +60,7 @@ class CacheManager:
             try:
                 cached_data = self.redis_client.get(key)
                 if cached_data:
-                    data = json.loads(cached_data)
+                    data = json_utils.loads(cached_data)
                     # Actualizar caché local
                     self.local_cache[key] = data
                     self.local_cache_ttl[key] = datetime.now() + timedelta(seconds=self._get_ttl(cache_type))
@@ -82,7 +85,7 @@ class CacheManager:
         # Cache Redis
         if self.redis_client:
             try:
-                self.redis_client.setex(key, ttl, json.dumps(data))
+                self.redis_client.setex(key, ttl, json_utils.dumps(data))
                 logger.debug(f"💾 Cached in Redis: {key} (TTL: {ttl}s)")
             except Exception as e:
                 logger.warning(f"⚠️ Error al escribir en Redis para {key}: {e}")
@@ -129,6 +132,54 @@ class CacheManager:
                 logger.warning(f"⚠️ Error al obtener info de Redis: {e}")
         return stats
 
+
+class TTLCache:
+    """
+    Caché en memoria acotada (LRU) con expiración por entrada.
+    Para resultados que solo tienen sentido dentro del proceso (objetos
+    Recommendation, Track...) y que no merece la pena serializar a Redis.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def discard_if(self, predicate: Callable[[Any], bool]) -> int:
+        """Elimina las entradas cuyo valor cumple predicate; devuelve cuántas"""
+        keys = [k for k, (_, value) in self._data.items() if predicate(value)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
 cache_manager = CacheManager()
 
 def cached(cache_type: str = 'default', ttl: Optional[int] = None):
@@ -2,8 +2,6 @@
 Sistema de detección de intenciones mejorado con contexto enriquecido
 y análisis de sentimiento
 """
-import google.generativeai as genai
-import os
 import json
 import logging
 import asyncio
@@ -11,8 +9,76 @@ from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 import re
 
+from services import gemini_client
+
 logger = logging.getLogger(__name__)
 
+# Gemini devuelve directamente JSON válido (sin markdown alrededor)
+_JSON_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+# Bloque estático de instrucciones del prompt de intención; se construye una
+# sola vez en lugar de en cada mensaje.
+_INTENT_INSTRUCTIONS = "\n".join([
+    "INSTRUCCIONES DE DETECCIÓN:",
+    "Usa TODA la información de contexto para hacer una detección más precisa.",
+    "Considera el sentimiento, urgencia y contexto musical en tu decisión.",
+    "",
+    "INTENCIONES DISPONIBLES (solo 7):",
+    "",
+    "1. 'playlist' - SOLO cuando pide EXPLÍCITAMENTE crear una playlist M3U",
+    "   Palabras clave: 'haz playlist', 'crea playlist', 'genera playlist'",
+    "   Ejemplo: 'haz playlist de Pink Floyd y Queen'",
+    "",
+    "2. 'buscar' - SOLO cuando usa la palabra 'busca' o 'buscar' (pero NO 'busca más')",
+    "   Palabras clave: 'busca', 'buscar'",
+    "   Ejemplo: 'busca Queen'",
+    "   EXCEPCIÓN: 'busca más', 'buscar más' → usar 'conversacion'",
+    "",
+    "3. 'recomendar' - SOLO cuando dice 'similar a' Y menciona artista específico",
+    "   Palabras clave: 'similar a [artista]', 'parecido a [artista]'",
+    "   Ejemplo: 'similar a Pink Floyd'",
+    "   NOTA: 'recomiéndame rock' → usa 'conversacion', NO 'recomendar'",
+    "",
+    "4. 'recomendar_biblioteca' - SOLO cuando pide recomendaciones DE SU BIBLIOTECA",
+    "   Palabras clave: 'de mi biblioteca', 'de la biblioteca', 'que tengo', 'redescubrir'",
+    "   Ejemplo: 'recomiéndame algo de mi biblioteca'",
+    "",
+    "5. 'consulta_informativa' - Preguntas directas sobre QUÉ TIENE en su biblioteca",
+    "   Palabras clave: 'qué tengo', 'qué géneros', 'qué artistas', 'cuántos álbumes', 'lista de'",
+    "   Ejemplo: '¿qué géneros tengo?', '¿qué artistas tengo?', '¿cuántos álbumes de rock?'",
+    "",
+    "6. 'referencia' - SOLO cuando dice 'más de eso', 'otro así' SIN mencionar artista",
+    "   Palabras clave: 'más de eso', 'otro así', 'ponme otro'",
+    "   Ejemplo: 'ponme más de eso'",
+    "",
+    "7. 'buscar_mas' - SOLO cuando dice 'busca más', 'buscar más', 'continuar búsqueda'",
+    "   Palabras clave: 'busca más', 'buscar más', 'busca mas', 'buscar mas', 'continuar', 'sigue buscando'",
+    "   Ejemplo: 'busca más', 'continuar búsqueda'",
+    "",
+    "8. 'releases' - SOLO cuando pregunta por LANZAMIENTOS RECIENTES o música NUEVA",
+    "   Palabras clave: 'lanzamientos', 'releases', 'nuevo', 'nueva', 'nuevos', 'nuevas'",
+    "   Ejemplos: '¿qué hay nuevo?', 'lanzamientos recientes', 'música nueva'",
+    "",
+    "9. 'conversacion' - TODO LO DEMÁS (usar por defecto, 90% de los casos)",
+    "   Incluye: preguntas, solicitudes generales, info, CUALQUIER conversación natural",
+    "",
+    "10. 'setlist_playlist' - SOLO cuando pide crear playlist a partir de un concierto/setlist",
+    "   Palabras clave: 'setlist', 'setlist.fm', 'concierto de', 'tocó en', 'el concierto en'",
+    "   Ejemplos: 'hazme una playlist con el setlist de Radiohead en Madrid 2023',",
+    "             'https://www.setlist.fm/setlist/...'",
+    "   Params a extraer: 'artist' (obligatorio si no hay URL), 'city' (opcional),",
+    "   'event_date' (opcional, formato dd-MM-yyyy), 'setlist_url' (si el mensaje trae un enlace)",
+    "",
+    "FACTORES DE CONTEXTO A CONSIDERAR:",
+    "- Si el usuario está frustrado (sentiment: frustrated) → priorizar 'conversacion'",
+    "- Si hay urgencia alta → ajustar confidence según la urgencia",
+    "- Si hay contexto musical específico → usar en los parámetros",
+    "- Si hay referencia a conversación anterior → considerar 'referencia'",
+    "",
+    "RESPONDE SOLO CON JSON (sin markdown, sin explicaciones):",
+    '{"intent": "...", "params": {...}, "confidence": 0.0-1.0, "reasoning": "breve explicación"}'
+])
+
 
 class SentimentAnalyzer:
     """Analizador de sentimiento para mensajes de usuario"""
@@ -218,8 +284,7 @@ class EnhancedIntentDetector:
     """Detector de intenciones mejorado con contexto enriquecido"""
     
     def __init__(self):
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = gemini_client.get_model()
         
         # Componentes de análisis
         self.sentiment_analyzer = SentimentAnalyzer()
@@ -265,13 +330,12 @@ class EnhancedIntentDetector:
             # Generar respuesta con múltiples intentos
             for attempt in range(3):
                 try:
-                    response = await self.model.generate_content_async(prompt)
+                    # Salida JSON nativa: sin bloques ```json que limpiar
+                    response = await gemini_client.generate(
+                        self.model, prompt, generation_config=_JSON_GENERATION_CONFIG
+                    )
                     response_text = response.text.strip()
                     
-                    # Limpiar markdown si existe
-                    if response_text.startswith("```"):
-                        response_text = response_text.replace("```json", "").replace("```", "").strip()
-                    
                     # Parsear JSON
                     intent_data = json.loads(response_text)
                     
@@ -376,66 +440,7 @@ class EnhancedIntentDetector:
                 ])
         
         # Instrucciones de detección
-        prompt_parts.extend([
-            "INSTRUCCIONES DE DETECCIÓN:",
-            "Usa TODA la información de contexto para hacer una detección más precisa.",
-            "Considera el sentimiento, urgencia y contexto musical en tu decisión.",
-            "",
-            "INTENCIONES DISPONIBLES (solo 7):",
-            "",
-            "1. 'playlist' - SOLO cuando pide EXPLÍCITAMENTE crear una playlist M3U",
-            "   Palabras clave: 'haz playlist', 'crea playlist', 'genera playlist'",
-            "   Ejemplo: 'haz playlist de Pink Floyd y Queen'",
-            "",
-            "2. 'buscar' - SOLO cuando usa la palabra 'busca' o 'buscar' (pero NO 'busca más')",
-            "   Palabras clave: 'busca', 'buscar'",
-            "   Ejemplo: 'busca Queen'",
-            "   EXCEPCIÓN: 'busca más', 'buscar más' → usar 'conversacion'",
-            "",
-            "3. 'recomendar' - SOLO cuando dice 'similar a' Y menciona artista específico",
-            "   Palabras clave: 'similar a [artista]', 'parecido a [artista]'",
-            "   Ejemplo: 'similar a Pink Floyd'",
-            "   NOTA: 'recomiéndame rock' → usa 'conversacion', NO 'recomendar'",
-            "",
-            "4. 'recomendar_biblioteca' - SOLO cuando pide recomendaciones DE SU BIBLIOTECA",
-            "   Palabras clave: 'de mi biblioteca', 'de la biblioteca', 'que tengo', 'redescubrir'",
-            "   Ejemplo: 'recomiéndame algo de mi biblioteca'",
-            "",
-            "5. 'consulta_informativa' - Preguntas directas sobre QUÉ TIENE en su biblioteca",
-            "   Palabras clave: 'qué tengo', 'qué géneros', 'qué artistas', 'cuántos álbumes', 'lista de'",
-            "   Ejemplo: '¿qué géneros tengo?', '¿qué artistas tengo?', '¿cuántos álbumes de rock?'",
-            "",
-            "6. 'referencia' - SOLO cuando dice 'más de eso', 'otro así' SIN mencionar artista",
-            "   Palabras clave: 'más de eso', 'otro así', 'ponme otro'",
-            "   Ejemplo: 'ponme más de eso'",
-            "",
-            "7. 'buscar_mas' - SOLO cuando dice 'busca más', 'buscar más', 'continuar búsqueda'",
-            "   Palabras clave: 'busca más', 'buscar más', 'busca mas', 'buscar mas', 'continuar', 'sigue buscando'",
-            "   Ejemplo: 'busca más', 'continuar búsqueda'",
-            "",
-            "8. 'releases' - SOLO cuando pregunta por LANZAMIENTOS RECIENTES o música NUEVA",
-            "   Palabras clave: 'lanzamientos', 'releases', 'nuevo', 'nueva', 'nuevos', 'nuevas'",
-            "   Ejemplos: '¿qué hay nuevo?', 'lanzamientos recientes', 'música nueva'",
-            "",
-            "9. 'conversacion' - TODO LO DEMÁS (usar por defecto, 90% de los casos)",
-            "   Incluye: preguntas, solicitudes generales, info, CUALQUIER conversación natural",
-            "",
-            "10. 'setlist_playlist' - SOLO cuando pide crear playlist a partir de un concierto/setlist",
-            "   Palabras clave: 'setlist', 'setlist.fm', 'concierto de', 'tocó en', 'el concierto en'",
-            "   Ejemplos: 'hazme una playlist con el setlist de Radiohead en Madrid 2023',",
-            "             'https://www.setlist.fm/setlist/...'",
-            "   Params a extraer: 'artist' (obligatorio si no hay URL), 'city' (opcional),",
-            "   'event_date' (opcional, formato dd-MM-yyyy), 'setlist_url' (si el mensaje trae un enlace)",
-            "",
-            "FACTORES DE CONTEXTO A CONSIDERAR:",
-            "- Si el usuario está frustrado (sentiment: frustrated) → priorizar 'conversacion'",
-            "- Si hay urgencia alta → ajustar confidence según la urgencia",
-            "- Si hay contexto musical específico → usar en los parámetros",
-            "- Si hay referencia a conversación anterior → considerar 'referencia'",
-            "",
-            "RESPONDE SOLO CON JSON (sin markdown, sin explicaciones):",
-            '{"intent": "...", "params": {...}, "confidence": 0.0-1.0, "reasoning": "breve explicación"}'
-        ])
+        prompt_parts.append(_INTENT_INSTRUCTIONS)
         
         return "\n".join(prompt_parts)
     
@@ -0,0 +1,43 @@
+"""
+Cliente Gemini compartido
+
+genai.configure() es global al proceso, así que se hace una sola vez y todos
+los servicios (agente, recomendaciones, detectores de intención, ListenBrainz)
+reutilizan la misma instancia de GenerativeModel en lugar de crear la suya.
+
+Todas las llamadas a la API pasan además por un semáforo común
+(GEMINI_MAX_CONCURRENCY, 4 por defecto): una ráfaga de usuarios hace cola
+aquí en vez de acabar en errores 429 y reintentos.
+"""
+import asyncio
+import os
+from functools import lru_cache
+
+import google.generativeai as genai
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+
+@lru_cache(maxsize=None)
+def configure() -> None:
+    """Configura la API key de Gemini (solo la primera llamada tiene efecto)"""
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+
+
+@lru_cache(maxsize=None)
+def get_model(name: str = DEFAULT_MODEL) -> genai.GenerativeModel:
+    """Instancia compartida del modelo por nombre"""
+    configure()
+    return genai.GenerativeModel(name)
+
+
+@lru_cache(maxsize=None)
+def slot() -> asyncio.Semaphore:
+    """Semáforo de llamadas simultáneas a Gemini (usar con ``async with``)"""
+    return asyncio.Semaphore(int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")))
+
+
+async def generate(model: genai.GenerativeModel, *args, **kwargs):
+    """generate_content_async limitado por el semáforo común"""
+    async with slot():
+        return await model.generate_content_async(*args, **kwargs)
@@ -2,22 +2,24 @@
 Detector de intenciones usando LLM para interpretar mensajes de usuario
 Reemplaza el sistema complejo de regex y keywords
 """
-import google.generativeai as genai
-import os
 import json
 import logging
 from typing import Dict, Any, Optional
 
+from services import gemini_client
+
 logger = logging.getLogger(__name__)
 
+# Gemini devuelve directamente JSON válido (sin markdown alrededor)
+_JSON_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
 
 class IntentDetector:
     """Detector de intenciones usando Gemini para interpretar lenguaje natural"""
     
     def __init__(self):
         """Inicializar detector de intenciones"""
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = gemini_client.get_model()
         logger.info("IntentDetector inicializado con Gemini 2.5 Flash")
     
     async def detect_intent(
@@ -42,14 +44,12 @@ class IntentDetector:
             # Construir prompt para detección de intención
             prompt = self._build_intent_prompt(user_message, session_context, user_stats)
             
-            # Generar respuesta
-            response = self.model.generate_content(prompt)
+            # Generar respuesta (JSON nativo: sin bloques ```json que limpiar)
+            response = await gemini_client.generate(
+                self.model, prompt, generation_config=_JSON_GENERATION_CONFIG
+            )
             response_text = response.text.strip()
             
-            # Limpiar markdown si existe
-            if response_text.startswith("```"):
-                response_text = response_text.replace("```json", "").replace("```", "").strip()
-            
             # Parsear JSON
             intent_data = json.loads(response_text)
             
@@ -0,0 +1,28 @@
+"""
+Serialización JSON rápida para los clientes HTTP y la caché
+
+Usa orjson si está instalado (varias veces más rápido que el módulo estándar
+al deserializar las respuestas de Navidrome/ListenBrainz/MusicBrainz/setlist.fm)
+y recurre a json en caso contrario, con la misma interfaz.
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    """Deserializa bytes o texto JSON"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """Serializa a texto JSON (str, como json.dumps)"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
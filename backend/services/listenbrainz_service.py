@@ -1,9 +1,13 @@
 import httpx
+import logging
 import os
 import re
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from models.schemas import ScrobbleTrack, ScrobbleArtist
+from services import gemini_client, json_utils
+
+logger = logging.getLogger(__name__)
 
 class ListenBrainzService:
     def __init__(self):
@@ -34,21 +38,21 @@ class ListenBrainzService:
             )
             
             if response.status_code == 404:
-                print(f"⚠️ Usuario {self.username} no encontrado en ListenBrainz")
+                logger.warning("⚠️ Usuario %s no encontrado en ListenBrainz", self.username)
                 raise ValueError(f"Usuario {self.username} no encontrado en ListenBrainz")
             
             if response.status_code == 410:
-                print(f"⚠️ Usuario {self.username}: perfil no disponible o privado en ListenBrainz")
+                logger.warning("⚠️ Usuario %s: perfil no disponible o privado en ListenBrainz", self.username)
                 raise ValueError(f"Perfil de {self.username} no disponible en ListenBrainz (privado o deshabilitado)")
             
             response.raise_for_status()
-            return response.json()
+            return json_utils.loads(response.content)
             
         except ValueError:
             # Re-lanzar errores de validación (404, 410)
             raise
         except Exception as e:
-            print(f"Error en petición ListenBrainz: {e}")
+            logger.debug("Error en petición ListenBrainz: %s", e)
             raise
     
     async def get_recent_tracks(self, limit: int = 50) -> List[ScrobbleTrack]:
@@ -88,7 +92,7 @@ class ListenBrainzService:
             return tracks
             
         except Exception as e:
-            print(f"Error obteniendo tracks recientes: {e}")
+            logger.debug("Error obteniendo tracks recientes: %s", e)
             return []
     
     async def get_top_artists(self, period: str = "this_month", limit: int = 50) -> List[ScrobbleArtist]:
@@ -127,7 +131,7 @@ class ListenBrainzService:
             return artists
             
         except Exception as e:
-            print(f"Error obteniendo top artistas: {e}")
+            logger.debug("Error obteniendo top artistas: %s", e)
             return []
     
     async def get_top_tracks(self, period: str = "this_month", limit: int = 50) -> List[ScrobbleTrack]:
@@ -169,7 +173,7 @@ class ListenBrainzService:
             return tracks
             
         except Exception as e:
-            print(f"Error obteniendo top tracks: {e}")
+            logger.debug("Error obteniendo top tracks: %s", e)
             return []
     
     async def get_user_stats(self, period: str = "all_time") -> Dict[str, Any]:
@@ -202,7 +206,7 @@ class ListenBrainzService:
             }
             
         except Exception as e:
-            print(f"Error obteniendo estadísticas: {e}")
+            logger.debug("Error obteniendo estadísticas: %s", e)
             return {}
     
     async def get_top_albums(self, period: str = "this_month", limit: int = 50) -> List[Dict[str, Any]]:
@@ -241,7 +245,7 @@ class ListenBrainzService:
             return albums
             
         except Exception as e:
-            print(f"Error obteniendo top álbumes: {e}")
+            logger.debug("Error obteniendo top álbumes: %s", e)
             return []
     
     async def get_user_info(self) -> Dict[str, Any]:
@@ -260,7 +264,7 @@ class ListenBrainzService:
             }
             
         except Exception as e:
-            print(f"Error obteniendo info del usuario: {e}")
+            logger.debug("Error obteniendo info del usuario: %s", e)
             return {}
     
     async def search_track(self, track_name: str, artist_name: str) -> Dict[str, Any]:
@@ -286,7 +290,7 @@ class ListenBrainzService:
             }
             
         except Exception as e:
-            print(f"Error buscando track: {e}")
+            logger.debug("Error buscando track: %s", e)
             return {"found": False, "track": None, "playcount": 0}
     
     async def get_listening_activity(self, days: int = 30) -> Dict[str, Any]:
@@ -311,7 +315,7 @@ class ListenBrainzService:
             }
             
         except Exception as e:
-            print(f"Error obteniendo actividad: {e}")
+            logger.debug("Error obteniendo actividad: %s", e)
             return {}
     
     async def get_recommendations(self, count: int = 50) -> List[Dict[str, Any]]:
@@ -333,7 +337,7 @@ class ListenBrainzService:
             
             if (self._recommendations_cache is not None and 
                 current_time - self._recommendations_cache_time < self._cache_ttl):
-                print(f"💾 Usando cache de recomendaciones ({len(self._recommendations_cache)} recomendaciones)")
+                logger.debug("💾 Usando cache de recomendaciones (%s recomendaciones)", len(self._recommendations_cache))
                 return self._recommendations_cache[:count]
             
             # Cache expirado o no existe, obtener de nuevo
@@ -360,11 +364,11 @@ class ListenBrainzService:
             self._recommendations_cache = recommendations
             self._recommendations_cache_time = current_time
             
-            print(f"✅ Obtenidas {len(recommendations)} recomendaciones de ListenBrainz (cacheadas por 5min)")
+            logger.debug("✅ Obtenidas %s recomendaciones de ListenBrainz (cacheadas por 5min)", len(recommendations))
             return recommendations
             
         except Exception as e:
-            print(f"❌ Error obteniendo recomendaciones: {e}")
+            logger.error("❌ Error obteniendo recomendaciones: %s", e)
             return []
     
     async def get_similar_users(self, limit: int = 10) -> List[Dict[str, Any]]:
@@ -391,7 +395,7 @@ class ListenBrainzService:
             return similar_users
             
         except Exception as e:
-            print(f"❌ Error obteniendo usuarios similares: {e}")
+            logger.error("❌ Error obteniendo usuarios similares: %s", e)
             return []
     
     async def get_lb_radio(
@@ -437,11 +441,11 @@ class ListenBrainzService:
                     "release_name": rec.get("release_name")
                 })
             
-            print(f"✅ Obtenidas {len(radio_tracks)} canciones para radio (modo: {mode})")
+            logger.debug("✅ Obtenidas %s canciones para radio (modo: %s)", len(radio_tracks), mode)
             return radio_tracks
             
         except Exception as e:
-            print(f"❌ Error obteniendo radio: {e}")
+            logger.error("❌ Error obteniendo radio: %s", e)
             return []
     
     async def get_explore_playlists(self) -> List[Dict[str, Any]]:
@@ -467,7 +471,7 @@ class ListenBrainzService:
             return playlists
             
         except Exception as e:
-            print(f"❌ Error obteniendo playlists de exploración: {e}")
+            logger.error("❌ Error obteniendo playlists de exploración: %s", e)
             return []
     
     async def get_similar_recordings(
@@ -505,7 +509,7 @@ class ListenBrainzService:
             return similar
             
         except Exception as e:
-            print(f"❌ Error obteniendo grabaciones similares: {e}")
+            logger.error("❌ Error obteniendo grabaciones similares: %s", e)
             return []
     
     async def get_sitewide_stats(
@@ -554,7 +558,7 @@ class ListenBrainzService:
             return stats
             
         except Exception as e:
-            print(f"❌ Error obteniendo estadísticas globales: {e}")
+            logger.error("❌ Error obteniendo estadísticas globales: %s", e)
             return []
     
     async def get_similar_artists_from_recording(
@@ -581,13 +585,13 @@ class ListenBrainzService:
             similar_artists = []
             
             # ESTRATEGIA 1: Usar recomendaciones de ListenBrainz
-            print(f"   📊 Estrategia 1: Intentando con recomendaciones de ListenBrainz CF...")
+            logger.debug("   📊 Estrategia 1: Intentando con recomendaciones de ListenBrainz CF...")
             try:
                 # OPTIMIZACIÓN: Reducido de 100 a 50 para ser más rápido (usa cache si existe)
                 recommendations = await self.get_recommendations(count=50)
                 
                 if recommendations:
-                    print(f"   📊 Obtenidas {len(recommendations)} recomendaciones de ListenBrainz")
+                    logger.debug("   📊 Obtenidas %s recomendaciones de ListenBrainz", len(recommendations))
                     # Agrupar por artista
                     artist_counts = {}
                     for rec in recommendations:
@@ -620,16 +624,16 @@ class ListenBrainzService:
                         similar_artists.append(artist)
                     
                     if similar_artists:
-                        print(f"✅ Encontrados {len(similar_artists)} artistas similares a '{artist_name}' (ListenBrainz CF)")
+                        logger.debug("✅ Encontrados %s artistas similares a '%s' (ListenBrainz CF)", len(similar_artists), artist_name)
                         return similar_artists
                 else:
-                    print(f"   ⚠️ No hay recomendaciones disponibles en ListenBrainz")
+                    logger.warning("   ⚠️ No hay recomendaciones disponibles en ListenBrainz")
             except Exception as e:
-                print(f"   ⚠️ ListenBrainz CF no disponible: {e}")
+                logger.warning("   ⚠️ ListenBrainz CF no disponible: %s", e)
             
             # ESTRATEGIA 2: Si no hay resultados y tenemos MusicBrainz, buscar por tags/géneros
             if not similar_artists and musicbrainz_service:
-                print(f"   📊 Estrategia 2: Buscando por tags/géneros similares en MusicBrainz...")
+                logger.debug("   📊 Estrategia 2: Buscando por tags/géneros similares en MusicBrainz...")
                 try:
                     # Usar el método de búsqueda por tags
                     tag_similar = await musicbrainz_service.find_similar_by_tags(artist_name, limit=limit)
@@ -645,27 +649,24 @@ class ListenBrainzService:
                             )
                             similar_artists.append(artist)
                         
-                        print(f"✅ Encontrados {len(similar_artists)} artistas similares por tags/géneros (MusicBrainz)")
+                        logger.debug("✅ Encontrados %s artistas similares por tags/géneros (MusicBrainz)", len(similar_artists))
                         return similar_artists
                     else:
-                        print(f"   ⚠️ No se encontraron artistas con tags similares en MusicBrainz")
-                        print(f"   💡 El artista '{artist_name}' probablemente no tiene tags/géneros en MusicBrainz")
+                        logger.warning("   ⚠️ No se encontraron artistas con tags similares en MusicBrainz")
+                        logger.debug("   💡 El artista '%s' probablemente no tiene tags/géneros en MusicBrainz", artist_name)
                 except Exception as e:
-                    print(f"   ⚠️ Error buscando en MusicBrainz: {e}")
+                    logger.warning("   ⚠️ Error buscando en MusicBrainz: %s", e)
             elif not similar_artists and not musicbrainz_service:
-                print(f"   💡 Tip: Habilita MusicBrainz para buscar artistas por relaciones/colaboraciones")
+                logger.debug("   💡 Tip: Habilita MusicBrainz para buscar artistas por relaciones/colaboraciones")
             
             # ESTRATEGIA 3: Si todo falla, usar IA para generar recomendaciones basadas en conocimiento general
             # Esto es especialmente útil para artistas sin metadata en MusicBrainz
             if not similar_artists:
-                print(f"   📊 Estrategia 3: Usando IA para generar similares basándose en conocimiento musical general...")
+                logger.debug("   📊 Estrategia 3: Usando IA para generar similares basándose en conocimiento musical general...")
                 try:
-                    # Importar aquí para evitar dependencias circulares
-                    import google.generativeai as genai
-                    
                     # Usar IA para generar artistas similares
-                    # OPTIMIZACIÓN: Usar modelo flash más rápido
-                    model = genai.GenerativeModel('gemini-2.5-flash')
+                    # OPTIMIZACIÓN: Usar modelo flash más rápido, compartido por todo el proceso
+                    model = gemini_client.get_model()
                     
                     prompt = f"""Eres un experto en música. Genera una lista de {limit} artistas similares a "{artist_name}".
 
@@ -692,7 +693,7 @@ Genera {limit} artistas similares a {artist_name}:"""
                         'top_p': 0.8
                     }
                     
-                    response = model.generate_content(prompt, generation_config=generation_config)
+                    response = await gemini_client.generate(model, prompt, generation_config=generation_config)
                     ai_response = response.text.strip()
                     
                     # Parsear respuesta
@@ -716,26 +717,24 @@ Genera {limit} artistas similares a {artist_name}:"""
                             similar_artists.append(artist)
                     
                     if similar_artists:
-                        print(f"✅ Encontrados {len(similar_artists)} artistas similares usando IA (conocimiento general)")
+                        logger.debug("✅ Encontrados %s artistas similares usando IA (conocimiento general)", len(similar_artists))
                         return similar_artists
                 except Exception as e:
-                    print(f"   ⚠️ Error usando IA para similares: {e}")
+                    logger.warning("   ⚠️ Error usando IA para similares: %s", e)
             
             # Si no hay resultados, devolver lista vacía
             if not similar_artists:
-                print(f"⚠️ No se encontraron artistas similares a '{artist_name}'")
-                print(f"   💡 Esto puede pasar si:")
-                print(f"      - ListenBrainz no tiene suficientes datos de ese artista")
-                print(f"      - MusicBrainz no tiene relaciones/tags registradas")
-                print(f"      - El artista es muy nuevo o poco conocido")
-                print(f"      - La IA no pudo generar recomendaciones fiables")
+                logger.warning("⚠️ No se encontraron artistas similares a '%s'", artist_name)
+                logger.debug("   💡 Esto puede pasar si:")
+                logger.debug("      - ListenBrainz no tiene suficientes datos de ese artista")
+                logger.debug("      - MusicBrainz no tiene relaciones/tags registradas")
+                logger.debug("      - El artista es muy nuevo o poco conocido")
+                logger.debug("      - La IA no pudo generar recomendaciones fiables")
             
             return similar_artists
             
         except Exception as e:
-            print(f"❌ Error obteniendo artistas similares: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error obteniendo artistas similares: %s", e)
             return []
     
     async def get_similar_tracks_from_recording(
@@ -782,11 +781,11 @@ Genera {limit} artistas similares a {artist_name}:"""
                     if len(similar_tracks) >= limit:
                         break
             
-            print(f"✅ Encontradas {len(similar_tracks)} canciones similares")
+            logger.debug("✅ Encontradas %s canciones similares", len(similar_tracks))
             return similar_tracks
             
         except Exception as e:
-            print(f"❌ Error obteniendo canciones similares: {e}")
+            logger.error("❌ Error obteniendo canciones similares: %s", e)
             return []
     
     async def close(self):
@@ -1,13 +1,113 @@
-import google.generativeai as genai
 import os
 import asyncio
-from typing import Dict, Any, List, Optional
+import logging
+import re
+import unicodedata
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Awaitable, Callable, Dict, Any, Hashable, List, Optional
 from datetime import datetime, timedelta
+from services import gemini_client
 from services.navidrome_service import NavidromeService
 from services.listenbrainz_service import ListenBrainzService
 from services.musicbrainz_service import MusicBrainzService
 from services.conversation_manager import ConversationManager
 from services.system_prompts import SystemPrompts
+from services.semantic_cache import SemanticCache
+
+logger = logging.getLogger(__name__)
+
+# Peticiones con efectos o que dependen de una búsqueda anterior: nunca se
+# responden desde la caché semántica
+_UNCACHEABLE_PHRASES = ("playlist", "busca más", "busca mas")
+
+# Preguntas que solo cambian el artista se parecen mucho ("¿quién es Radiohead?"
+# / "¿quién es Portishead?"): umbral más estricto que el global y vida corta
+_AGENT_CACHE_THRESHOLD = 0.92
+_AGENT_CACHE_TTL = 300
+
+
+def _mentions_proper_noun(question: str) -> bool:
+    """¿Nombra la pregunta algo concreto? (palabra en mayúscula tras la primera)"""
+    words = question.split()[1:]
+    return any(w.lstrip("¿¡\"'(«“")[:1].isupper() for w in words)
+
+
+def _resolved_entity(data_context: Dict[str, Any]) -> bool:
+    """¿Resolvió la recopilación de datos un artista/álbum/género concreto?"""
+    return bool(
+        data_context.get("library", {}).get("search_term")
+        or data_context.get("musicbrainz_artist_info")
+        or data_context.get("similar_content")
+    )
+
+# Reglas fijas que cierran el prompt del agente (tras consulta y datos)
+_AGENT_PROMPT_RULES = """REGLAS CRÍTICAS:
+1. SIEMPRE consulta PRIMERO la biblioteca (📚) para ver qué tiene el usuario
+2. LUEGO complementa con ListenBrainz/MusicBrainz (🌍) para recomendaciones y descubrimientos
+3. Si preguntan "mejor disco/álbum de X":
+   a) Verifica QUÉ TIENE en biblioteca de ese artista
+   b) Combina con información de MusicBrainz
+   c) Responde: "En tu biblioteca tienes X, Y, Z. Según MusicBrainz, el mejor es..."
+4. Si preguntan "qué tengo de X" → USA SOLO BIBLIOTECA
+5. NUNCA digas "no tienes nada" sin VERIFICAR primero en los datos de biblioteca
+6. VERIFICA coincidencia exacta de artistas - no mezcles artistas diferentes
+7. Sé PROACTIVO: combina siempre biblioteca + descubrimiento
+
+IMPORTANTE - Diferentes tipos de peticiones:
+
+1. "¿Qué álbumes TENGO de [artista]?"
+   → Busca SOLO en BIBLIOTECA
+   → Si no tiene → "No tienes álbumes de [artista] en tu biblioteca"
+
+2. "Recomiéndame un disco DE [artista]"
+   → Busca en BIBLIOTECA primero
+   → Si no tiene → Busca en MUSICBRAINZ y recomienda
+   → Ejemplo: "No tienes de [artista] en biblioteca, pero en MusicBrainz su mejor álbum es X"
+
+3. "Recomiéndame un disco" (sin artista específico)
+   → USA BIBLIOTECA + LISTENBRAINZ/MUSICBRAINZ
+   → Combina: algo de su biblioteca + descubrimientos nuevos
+   → Ejemplo: "De tu biblioteca: X. También te gustará Y (descubrimiento nuevo)"
+
+4. "Recomiéndame algo nuevo / que no tenga"
+   → USA PRINCIPALMENTE LISTENBRAINZ/MUSICBRAINZ
+   → Recomienda música que NO está en biblioteca
+   → Basado en sus gustos pero nuevo contenido
+
+IMPORTANTE - "Playlist con música DE [artistas]":
+- Si piden "playlist de/con [lista de artistas]", busca canciones de ESOS ARTISTAS ESPECÍFICOS
+- Ejemplo: "música de mujeres, vera fauna y cala vento" → busca canciones de esos 3 artistas
+- VERIFICA que cada canción sea del artista correcto
+- Si NO tienes algunos artistas, menciona cuáles SÍ tienes y cuáles NO
+
+IMPORTANTE - CREACIÓN DE PLAYLISTS:
+- Cuando el usuario pida crear una playlist, el sistema AUTOMÁTICAMENTE creará la playlist en Navidrome
+- Tu respuesta debe incluir las canciones que se van a agregar a la playlist
+- Sé específico sobre qué canciones se incluirán y por qué
+- Si no hay suficientes canciones, explica por qué y sugiere alternativas
+
+FORMATO DE RESPUESTA:
+- Si hay álbumes en biblioteca DEL ARTISTA CORRECTO → Lista y recomienda
+- Si hay artistas en biblioteca → Lista los artistas directamente
+- Si piden "recomiéndame álbum de X" y NO tienes de X → "No tienes álbumes de X en tu biblioteca"
+- Si piden "playlist con X, Y, Z" → Lista qué artistas SÍ tienes y cuáles NO
+- NUNCA inventes álbumes o artistas que no aparecen en los datos
+- Usa emojis: 📀 para álbumes, 🎤 para artistas, 🎵 para canciones
+
+Responde ahora de forma natural y conversacional:"""
+
+# Frases que piden contexto de usuario enriquecido (nivel 2) o completo (nivel 3)
+_USER_CONTEXT_PHRASES = (
+    "recomienda", "recomiéndame", "sugerencia", "sugiere",
+    "ponme", "parecido", "similar", "nuevo", "descubrir",
+    "mis gustos", "mi perfil", "personalizado",
+)
+_FULL_CONTEXT_PHRASES = (
+    "mi biblioteca", "qué tengo", "mis escuchas", "mis estadísticas",
+    "mi perfil musical", "qué he escuchado", "cuánto he escuchado",
+    "mis favoritos", "mis stats",
+)
 
 class MusicAgentService:
     """
@@ -15,25 +115,32 @@ class MusicAgentService:
     para responder consultas conversacionales sobre música
     """
     
-    def __init__(self):
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+    def __init__(
+        self,
+        navidrome: Optional[NavidromeService] = None,
+        listenbrainz: Optional[ListenBrainzService] = None,
+        musicbrainz: Optional[MusicBrainzService] = None,
+    ):
+        """Los servicios inyectados se comparten (mismo pool HTTP) y no se cierran
+        aquí; los que falten se crean y pasan a ser propiedad de esta instancia."""
+        self.model = gemini_client.get_model()
         
         # Gestor de conversaciones
         self.conversation_manager = ConversationManager()
         
         # Inicializar servicios disponibles
-        self.navidrome = NavidromeService()
+        self._owned_clients = []
+        self.navidrome = navidrome or self._own(NavidromeService())
         
-        self.listenbrainz = None
-        listenbrainz_available = False
-        if os.getenv("LISTENBRAINZ_USERNAME"):
+        self.listenbrainz = listenbrainz
+        listenbrainz_available = listenbrainz is not None
+        if listenbrainz is None and os.getenv("LISTENBRAINZ_USERNAME"):
             try:
-                self.listenbrainz = ListenBrainzService()
-                print("✅ Agente musical: ListenBrainz configurado")
+                self.listenbrainz = self._own(ListenBrainzService())
+                logger.info("✅ Agente musical: ListenBrainz configurado")
                 listenbrainz_available = True
             except Exception as e:
-                print(f"⚠️ Agente musical: Error inicializando ListenBrainz: {e}")
+                logger.warning("⚠️ Agente musical: Error inicializando ListenBrainz: %s", e)
         
         # Determinar servicios para cada propósito
         # HISTORIAL Y DESCUBRIMIENTO: ListenBrainz (open-source, sin límites)
@@ -47,20 +154,23 @@ class MusicAgentService:
             self.discovery_service = None
         
         # MUSICBRAINZ: Para verificación de metadatos
-        self.musicbrainz = None
-        if os.getenv("ENABLE_MUSICBRAINZ", "true").lower() == "true":
+        self.musicbrainz = musicbrainz
+        if musicbrainz is None and os.getenv("ENABLE_MUSICBRAINZ", "true").lower() == "true":
             try:
-                self.musicbrainz = MusicBrainzService()
-                print("✅ Agente musical: MusicBrainz habilitado para verificación de metadatos")
+                self.musicbrainz = self._own(MusicBrainzService())
+                logger.info("✅ Agente musical: MusicBrainz habilitado para verificación de metadatos")
             except Exception as e:
-                print(f"⚠️ Agente musical: Error inicializando MusicBrainz: {e}")
+                logger.warning("⚠️ Agente musical: Error inicializando MusicBrainz: %s", e)
         
         # Sistema de caché simple con TTL para optimizar rendimiento
         self._cache = {}
         self._cache_ttl = {}
         
-        print(f"📊 Servicio de historial: {self.history_service_name if self.history_service_name else 'No disponible'}")
-        print(f"🔍 Servicio de descubrimiento: {'ListenBrainz' if self.discovery_service else 'No disponible'}")
+        # Caché semántica de respuestas (por usuario y gustos)
+        self.semantic_cache = SemanticCache()
+        
+        logger.info("📊 Servicio de historial: %s", self.history_service_name if self.history_service_name else 'No disponible')
+        logger.info("🔍 Servicio de descubrimiento: %s", 'ListenBrainz' if self.discovery_service else 'No disponible')
     
     def _get_cache(self, key: str, ttl_seconds: int = 300):
         """Obtener del caché si no ha expirado
@@ -75,7 +185,7 @@ class MusicAgentService:
         if key in self._cache:
             if key in self._cache_ttl:
                 if datetime.now() < self._cache_ttl[key]:
-                    print(f"⚡ Cache hit: {key}")
+                    logger.debug("⚡ Cache hit: %s", key)
                     return self._cache[key]
         return None
     
@@ -107,22 +217,81 @@ class MusicAgentService:
                 if result:  # Si devuelve datos, usarlos
                     return result
         except Exception as e:
-            print(f"⚠️ Método principal falló ({e}), usando fallback...")
+            logger.warning("⚠️ Método principal falló (%s), usando fallback...", e)
         
         # Intentar con fallback
         try:
             if fallback_method:
                 return await fallback_method(*args, **kwargs)
         except Exception as e:
-            print(f"⚠️ Fallback también falló: {e}")
+            logger.warning("⚠️ Fallback también falló: %s", e)
         
         return []  # Devolver lista vacía si ambos fallan
     
+    async def _generate_streaming(
+        self, prompt: str, on_partial: Callable[[str], Awaitable]
+    ) -> str:
+        """Genera en streaming, notificando el texto acumulado tras cada fragmento
+
+        El hueco de Gemini solo cubre la petición y la lectura del stream: las
+        notificaciones (ediciones de Telegram, que el rate limiter puede retener
+        segundos) van en una tarea aparte, como mucho una en vuelo; si sigue en
+        curso al llegar otro fragmento, ese aviso intermedio se omite.
+        """
+        chunks = []
+        preview: Optional[asyncio.Task] = None
+        try:
+            async with gemini_client.slot():
+                stream = await self.model.generate_content_async(prompt, stream=True)
+                async for chunk in stream:
+                    chunks.append(chunk.text)
+                    if preview is not None and not preview.done():
+                        continue
+                    if preview is not None and preview.exception():
+                        logger.debug("Aviso de texto parcial fallido: %s", preview.exception())
+                    preview = asyncio.ensure_future(on_partial("".join(chunks)))
+        except BaseException:
+            if preview is not None:
+                preview.cancel()
+            raise
+        # Que ningún aviso intermedio llegue después de la respuesta final
+        if preview is not None:
+            try:
+                await preview
+            except Exception as e:
+                logger.debug("Aviso de texto parcial fallido: %s", e)
+        return "".join(chunks).strip()
+    
+    @staticmethod
+    def _semantic_cache_bucket(
+        user_question: str,
+        user_id: int,
+        is_informational: bool,
+        session,
+        user_stats: Dict
+    ) -> Optional[Hashable]:
+        """Bucket de la caché semántica, o None si la respuesta no es reutilizable
+        
+        Solo se cachea la primera pregunta de la sesión (una continuación depende
+        de la conversación) y nunca las que nombran algo concreto. Las informativas
+        se agrupan por usuario (el prompt incluye sus estadísticas); las
+        conversacionales también por sus top artistas, que personalizan la respuesta.
+        """
+        if len(session.message_history) > 1 or _mentions_proper_noun(user_question):
+            return None
+        question_lower = user_question.lower()
+        if any(phrase in question_lower for phrase in _UNCACHEABLE_PHRASES):
+            return None
+        if is_informational:
+            return user_id
+        return (user_id, tuple(user_stats.get("top_artists", ())))
+    
     async def query(
         self, 
         user_question: str, 
         user_id: int,
-        context: Optional[Dict] = None
+        context: Optional[Dict] = None,
+        on_partial: Optional[Callable[[str], Awaitable]] = None
     ) -> Dict[str, Any]:
         """
         Procesar consulta del usuario usando todas las fuentes disponibles
@@ -132,6 +301,8 @@ class MusicAgentService:
             user_question: Pregunta o consulta del usuario
             user_id: ID del usuario para mantener contexto conversacional
             context: Contexto adicional (opcional)
+            on_partial: Corrutina que recibe el texto acumulado mientras Gemini
+                genera en streaming (opcional; sin ella se espera la respuesta completa)
             
         Returns:
             Diccionario con la respuesta y datos utilizados
@@ -144,12 +315,41 @@ class MusicAgentService:
             - "Ponme algo parecido" (usa contexto de conversación)
         """
         
-        print(f"🤖 Agente musical procesando: {user_question}")
+        logger.debug("🤖 Agente musical procesando: %s", user_question)
         
         # Obtener sesión conversacional del usuario
         session = self.conversation_manager.get_session(user_id)
         session.add_message("user", user_question)
         
+        # NIVEL 1 de contexto: mínimo (SIEMPRE, muy rápido con caché largo).
+        # Se obtiene antes porque también identifica el bucket de la caché semántica.
+        user_stats = await self._get_minimal_context(user_id)
+        
+        # 0. Reutilizar respuestas a preguntas equivalentes (informativas y
+        # conversacionales sin contexto previo)
+        is_informational = bool(context and context.get("type") == "informational")
+        cache_bucket = self._semantic_cache_bucket(
+            user_question, user_id, is_informational, session, user_stats
+        )
+        question_vector = None
+        if cache_bucket is not None:
+            cached = self.semantic_cache.get_exact(cache_bucket, user_question)
+            if cached is None:
+                question_vector = await self.semantic_cache.embed(user_question)
+                if question_vector is not None:
+                    cached = self.semantic_cache.lookup(
+                        cache_bucket, question_vector, threshold=_AGENT_CACHE_THRESHOLD
+                    )
+            if cached is not None:
+                session.add_message("assistant", cached["answer"])
+                return {
+                    "answer": cached["answer"],
+                    "data_used": {},
+                    "links": cached["links"],
+                    "success": True,
+                    "session_id": user_id
+                }
+        
         # 1. Recopilar datos de todas las fuentes
         # OPTIMIZACIÓN: Agregar timeout de 20 segundos para evitar esperas muy largas
         try:
@@ -158,7 +358,7 @@ class MusicAgentService:
                 timeout=20.0
             )
         except asyncio.TimeoutError:
-            print("⚠️ Timeout obteniendo datos (20s), usando datos parciales")
+            logger.warning("⚠️ Timeout obteniendo datos (20s), usando datos parciales")
             data_context = {
                 "library": {},
                 "listening_history": {},
@@ -178,36 +378,27 @@ class MusicAgentService:
             }
         
         # 2. Obtener estadísticas del usuario con contexto adaptativo en 3 niveles
-        # NIVEL 1: Contexto mínimo (SIEMPRE, muy rápido con caché largo)
-        user_stats = await self._get_minimal_context(user_id)
-        
+        # (el NIVEL 1 ya se obtuvo al principio)
         # NIVEL 2: Contexto enriquecido (cuando hay palabras clave de recomendación)
-        needs_user_context = any(phrase in user_question.lower() for phrase in [
-            "recomienda", "recomiéndame", "sugerencia", "sugiere",
-            "ponme", "parecido", "similar", "nuevo", "descubrir",
-            "mis gustos", "mi perfil", "personalizado"
-        ])
+        question_lower = user_question.lower()
+        needs_user_context = any(phrase in question_lower for phrase in _USER_CONTEXT_PHRASES)
         
         if needs_user_context:
-            print("📊 Enriqueciendo contexto (recomendación detectada)...")
+            logger.debug("📊 Enriqueciendo contexto (recomendación detectada)...")
             user_stats = await self._get_enriched_context(user_id, user_stats)
         
         # NIVEL 3: Contexto completo (cuando se pregunta explícitamente)
-        needs_full_context = any(phrase in user_question.lower() for phrase in [
-            "mi biblioteca", "qué tengo", "mis escuchas", "mis estadísticas",
-            "mi perfil musical", "qué he escuchado", "cuánto he escuchado",
-            "mis favoritos", "mis stats"
-        ])
+        needs_full_context = any(phrase in question_lower for phrase in _FULL_CONTEXT_PHRASES)
         
         if needs_full_context:
-            print("📚 Obteniendo contexto completo (consulta de perfil)...")
+            logger.debug("📚 Obteniendo contexto completo (consulta de perfil)...")
             user_stats = await self._get_full_context(user_id, user_stats)
         
         # 3. Construir prompt inteligente usando SystemPrompts
         conversation_context = session.get_context_for_ai()
         
         # Usar prompt específico para consultas informativas
-        if context and context.get("type") == "informational":
+        if is_informational:
             system_prompt = SystemPrompts.get_informational_prompt(
                 user_stats=user_stats,
                 conversation_context=conversation_context
@@ -219,82 +410,30 @@ class MusicAgentService:
             )
         
         # 4. Agregar datos específicos de la query
-        ai_prompt = f"""{system_prompt}
-
-=== CONSULTA ACTUAL ===
-{user_question}
-
-=== DATOS DISPONIBLES ===
-{self._format_context_for_ai(data_context)}
-
-REGLAS CRÍTICAS:
-1. SIEMPRE consulta PRIMERO la biblioteca (📚) para ver qué tiene el usuario
-2. LUEGO complementa con ListenBrainz/MusicBrainz (🌍) para recomendaciones y descubrimientos
-3. Si preguntan "mejor disco/álbum de X":
-   a) Verifica QUÉ TIENE en biblioteca de ese artista
-   b) Combina con información de MusicBrainz
-   c) Responde: "En tu biblioteca tienes X, Y, Z. Según MusicBrainz, el mejor es..."
-4. Si preguntan "qué tengo de X" → USA SOLO BIBLIOTECA
-5. NUNCA digas "no tienes nada" sin VERIFICAR primero en los datos de biblioteca
-6. VERIFICA coincidencia exacta de artistas - no mezcles artistas diferentes
-7. Sé PROACTIVO: combina siempre biblioteca + descubrimiento
-
-IMPORTANTE - Diferentes tipos de peticiones:
-
-1. "¿Qué álbumes TENGO de [artista]?"
-   → Busca SOLO en BIBLIOTECA
-   → Si no tiene → "No tienes álbumes de [artista] en tu biblioteca"
-
-2. "Recomiéndame un disco DE [artista]"
-   → Busca en BIBLIOTECA primero
-   → Si no tiene → Busca en MUSICBRAINZ y recomienda
-   → Ejemplo: "No tienes de [artista] en biblioteca, pero en MusicBrainz su mejor álbum es X"
-
-3. "Recomiéndame un disco" (sin artista específico)
-   → USA BIBLIOTECA + LISTENBRAINZ/MUSICBRAINZ
-   → Combina: algo de su biblioteca + descubrimientos nuevos
-   → Ejemplo: "De tu biblioteca: X. También te gustará Y (descubrimiento nuevo)"
-
-4. "Recomiéndame algo nuevo / que no tenga"
-   → USA PRINCIPALMENTE LISTENBRAINZ/MUSICBRAINZ
-   → Recomienda música que NO está en biblioteca
-   → Basado en sus gustos pero nuevo contenido
-
-IMPORTANTE - "Playlist con música DE [artistas]":
-- Si piden "playlist de/con [lista de artistas]", busca canciones de ESOS ARTISTAS ESPECÍFICOS
-- Ejemplo: "música de mujeres, vera fauna y cala vento" → busca canciones de esos 3 artistas
-- VERIFICA que cada canción sea del artista correcto
-- Si NO tienes algunos artistas, menciona cuáles SÍ tienes y cuáles NO
-
-IMPORTANTE - CREACIÓN DE PLAYLISTS:
-- Cuando el usuario pida crear una playlist, el sistema AUTOMÁTICAMENTE creará la playlist en Navidrome
-- Tu respuesta debe incluir las canciones que se van a agregar a la playlist
-- Sé específico sobre qué canciones se incluirán y por qué
-- Si no hay suficientes canciones, explica por qué y sugiere alternativas
-
-FORMATO DE RESPUESTA:
-- Si hay álbumes en biblioteca DEL ARTISTA CORRECTO → Lista y recomienda
-- Si hay artistas en biblioteca → Lista los artistas directamente
-- Si piden "recomiéndame álbum de X" y NO tienes de X → "No tienes álbumes de X en tu biblioteca"
-- Si piden "playlist con X, Y, Z" → Lista qué artistas SÍ tienes y cuáles NO
-- NUNCA inventes álbumes o artistas que no aparecen en los datos
-- Usa emojis: 📀 para álbumes, 🎤 para artistas, 🎵 para canciones
-
-Responde ahora de forma natural y conversacional:"""
+        ai_prompt = "".join([
+            system_prompt,
+            "\n\n=== CONSULTA ACTUAL ===\n",
+            user_question,
+            "\n\n=== DATOS DISPONIBLES ===\n",
+            self._format_context_for_ai(data_context),
+            "\n\n",
+            _AGENT_PROMPT_RULES,
+        ])
         
         # 5. Generar respuesta con IA
         try:
-            response = self.model.generate_content(ai_prompt)
-            answer = response.text.strip()
+            if on_partial is None:
+                response = await gemini_client.generate(self.model, ai_prompt)
+                answer = response.text.strip()
+            else:
+                answer = await self._generate_streaming(ai_prompt, on_partial)
             
-            print(f"✅ Agente musical: Respuesta generada ({len(answer)} caracteres)")
+            logger.debug("✅ Agente musical: Respuesta generada (%s caracteres)", len(answer))
             
             # 6. NUEVO: Si es una petición de playlist, crear la playlist en Navidrome
             playlist_created = None
-            is_playlist_request = any(phrase in user_question.lower() for phrase in [
-                "playlist", "crea una playlist", "crear playlist", "haz una playlist", 
-                "hacer playlist", "genera playlist", "generar playlist"
-            ])
+            # Todas las variantes ("crea una playlist", "generar playlist"...) contienen "playlist"
+            is_playlist_request = "playlist" in question_lower
             
             if is_playlist_request:
                 playlist_created = await self._create_playlist_in_navidrome(
@@ -303,24 +442,40 @@ Responde ahora de forma natural y conversacional:"""
                 
                 # Si se creó la playlist, agregar información al mensaje
                 if playlist_created:
-                    answer += f"\n\n🎵 <b>Playlist creada en Navidrome:</b> {playlist_created['name']}\n"
-                    answer += f"📝 <b>Canciones incluidas:</b> {playlist_created['track_count']}\n"
-                    answer += f"🆔 <b>ID de playlist:</b> {playlist_created['id']}"
+                    answer += (
+                        f"\n\n🎵 <b>Playlist creada en Navidrome:</b> {playlist_created['name']}\n"
+                        f"📝 <b>Canciones incluidas:</b> {playlist_created['track_count']}\n"
+                        f"🆔 <b>ID de playlist:</b> {playlist_created['id']}"
+                    )
             
             # Guardar respuesta en historial de conversación
             session.add_message("assistant", answer)
             
+            links = self._extract_links(data_context)
+            # Una respuesta sobre un artista/álbum concreto no sirve para otra
+            # pregunta que solo se le parezca
+            if (
+                question_vector is not None
+                and not playlist_created
+                and not _resolved_entity(data_context)
+            ):
+                self.semantic_cache.store(
+                    cache_bucket, user_question, question_vector,
+                    {"answer": answer, "links": links},
+                    ttl=_AGENT_CACHE_TTL,
+                )
+            
             return {
                 "answer": answer,
                 "data_used": data_context,
-                "links": self._extract_links(data_context),
+                "links": links,
                 "success": True,
                 "session_id": user_id,
                 "playlist_created": playlist_created
             }
         
         except Exception as e:
-            print(f"❌ Error generando respuesta del agente: {e}")
+            logger.error("❌ Error generando respuesta del agente: %s", e)
             return {
                 "answer": f"❌ Error procesando tu consulta: {str(e)}",
                 "data_used": data_context,
@@ -359,7 +514,7 @@ Responde ahora de forma natural y conversacional:"""
         session = self.conversation_manager.get_session(user_id)
         
         if is_search_more:
-            print(f"🔍 Comando 'busca más' detectado")
+            logger.debug("🔍 Comando 'busca más' detectado")
             last_search = session.context.get("last_mb_search", {})
             
             if last_search.get("genre") and last_search.get("has_more"):
@@ -369,9 +524,9 @@ Responde ahora de forma natural y conversacional:"""
                 is_recommendation_request = False
                 search_term = None
                 mb_offset = last_search["next_offset"]
-                print(f"   Continuando búsqueda de '{detected_genre}' desde artista {mb_offset}")
+                logger.debug("   Continuando búsqueda de '%s' desde artista %s", detected_genre, mb_offset)
             else:
-                print(f"   ⚠️ No hay búsqueda anterior para continuar")
+                logger.warning("   ⚠️ No hay búsqueda anterior para continuar")
                 # Responder que no hay búsqueda activa
                 data["no_active_search"] = True
                 data["message"] = "No hay ninguna búsqueda activa que continuar. Primero pregunta por un género, por ejemplo: '¿tengo algo de jazz?'"
@@ -384,7 +539,7 @@ Responde ahora de forma natural y conversacional:"""
                 "recomienda", "recomiéndame", "sugerencia", "sugiere", "sugiéreme",
                 "ponme", "pon", "quiero escuchar", "dame"
             ])
-        print(f"🔍 DEBUG - is_recommendation_request: {is_recommendation_request}")
+        logger.debug("🔍 DEBUG - is_recommendation_request: %s", is_recommendation_request)
         
         # Detectar géneros musicales comunes
         music_genres = {
@@ -411,7 +566,7 @@ Responde ahora de forma natural y conversacional:"""
             elif 'disco de' in query_lower or 'un disco' in query_lower or 'el disco' in query_lower:
                 detected_genre = None  # Confirmar que no es género
         
-        print(f"🔍 DEBUG - detected_genre: '{detected_genre}'")
+        logger.debug("🔍 DEBUG - detected_genre: '%s'", detected_genre)
         
         # Detectar menciones de artistas/álbumes/discos (buscar en biblioteca)
         needs_library_search = any(word in query_lower for word in [
@@ -421,7 +576,7 @@ Responde ahora de forma natural y conversacional:"""
             "discografía", "música de", "canciones de", "temas de", "mi biblioteca",
             "playlist", "crea una playlist", "crear playlist"  # Para playlists SIEMPRE de biblioteca
         ])
-        print(f"🔍 DEBUG - needs_library_search: {needs_library_search}")
+        logger.debug("🔍 DEBUG - needs_library_search: %s", needs_library_search)
         
         # Detectar consultas informativas que necesitan biblioteca completa
         is_informational_query = any(phrase in query_lower for phrase in [
@@ -432,7 +587,7 @@ Responde ahora de forma natural y conversacional:"""
             "que tengo de", "qué tengo de", "tengo de la", "tengo del", "tengo de los",
             "tengo de las", "tienes de la", "tienes del", "tienes de los", "tienes de las"
         ])
-        print(f"🔍 DEBUG - is_informational_query: {is_informational_query}")
+        logger.debug("🔍 DEBUG - is_informational_query: %s", is_informational_query)
         
         needs_listening_history = any(word in query_lower for word in [
             "escuché", "escuchado", "última", "reciente", "top", "favorito", "estadística", "últimos"
@@ -469,23 +624,23 @@ Responde ahora de forma natural y conversacional:"""
         else:
             search_term = None
         
-        print(f"🔍 DEBUG - search_term extraído: '{search_term}'")
+        logger.debug("🔍 DEBUG - search_term extraído: '%s'", search_term)
         
         # Datos de reproducción actual (Navidrome)
         if needs_now_playing:
             try:
-                print(f"🎵 Obteniendo reproducción actual...")
+                logger.debug("🎵 Obteniendo reproducción actual...")
                 now_playing = await self.navidrome.get_now_playing()
                 data["now_playing"] = now_playing
-                print(f"✅ Obtenida información de {len(now_playing)} reproducciones activas")
+                logger.debug("✅ Obtenida información de %s reproducciones activas", len(now_playing))
             except Exception as e:
-                print(f"⚠️ Error obteniendo now playing: {e}")
+                logger.warning("⚠️ Error obteniendo now playing: %s", e)
                 data["now_playing"] = []
         
         # Datos de biblioteca completa para consultas informativas (PRIORIDAD ALTA)
         if is_informational_query:
             try:
-                print(f"📊 Obteniendo biblioteca completa para consulta informativa...")
+                logger.debug("📊 Obteniendo biblioteca completa para consulta informativa...")
                 
                 # Obtener TODA la biblioteca
                 all_artists = await self.navidrome.get_all_artists()
@@ -522,7 +677,7 @@ Responde ahora de forma natural y conversacional:"""
                 
                 # Si hay un género detectado en la consulta, marcar para análisis inteligente
                 if detected_genre:
-                    print(f"🎸 Género detectado: '{detected_genre}' - Usando análisis inteligente de IA")
+                    logger.debug("🎸 Género detectado: '%s' - Usando análisis inteligente de IA", detected_genre)
                     
                     # En lugar de filtrar estrictamente, marcar el género para que la IA lo analice
                     data["library"]["complete_data"]["genre_query"] = {
@@ -533,14 +688,14 @@ Responde ahora de forma natural y conversacional:"""
                         "total_tracks": len(all_tracks)
                     }
                     
-                    print(f"✅ Marcado para análisis inteligente de '{detected_genre}' en {len(all_artists)} artistas, {len(all_albums)} álbumes, {len(all_tracks)} canciones")
+                    logger.debug("✅ Marcado para análisis inteligente de '%s' en %s artistas, %s álbumes, %s canciones", detected_genre, len(all_artists), len(all_albums), len(all_tracks))
                 
                 # Si hay un artista específico mencionado en la consulta, filtrar por ese artista
                 # PERO solo si NO es una consulta de género
                 if not detected_genre:
                     artist_mentioned = self._extract_artist_from_query(query)
                     if artist_mentioned:
-                        print(f"🎤 Filtrando biblioteca completa por artista: '{artist_mentioned}'")
+                        logger.debug("🎤 Filtrando biblioteca completa por artista: '%s'", artist_mentioned)
                         
                         # Buscar artista por nombre (búsqueda flexible)
                         matching_artists = []
@@ -564,12 +719,12 @@ Responde ahora de forma natural y conversacional:"""
                             "total_matching_artists": len(matching_artists)
                         }
                         
-                        print(f"✅ Filtrado por '{artist_mentioned}': {len(artist_tracks)} canciones, {len(artist_albums)} álbumes, {len(matching_artists)} artistas coincidentes")
+                        logger.debug("✅ Filtrado por '%s': %s canciones, %s álbumes, %s artistas coincidentes", artist_mentioned, len(artist_tracks), len(artist_albums), len(matching_artists))
                 
-                print(f"✅ Biblioteca completa obtenida: {len(all_artists)} artistas, {len(all_albums)} álbumes, {len(all_tracks)} canciones, {len(genres)} géneros")
+                logger.debug("✅ Biblioteca completa obtenida: %s artistas, %s álbumes, %s canciones, %s géneros", len(all_artists), len(all_albums), len(all_tracks), len(genres))
                 
             except Exception as e:
-                print(f"❌ Error obteniendo biblioteca completa: {e}")
+                logger.error("❌ Error obteniendo biblioteca completa: %s", e)
                 data["library"]["complete_data"] = None
         
         # Datos de biblioteca (Navidrome) - búsquedas específicas (solo si NO es consulta informativa)
@@ -577,7 +732,7 @@ Responde ahora de forma natural y conversacional:"""
             try:
                 # Si es recomendación por género, buscar el género
                 if is_recommendation_request and detected_genre and not search_term:
-                    print(f"🔍 Buscando en biblioteca por GÉNERO: '{detected_genre}' (query: '{query}')")
+                    logger.debug("🔍 Buscando en biblioteca por GÉNERO: '%s' (query: '%s')", detected_genre, query)
                     # Buscar por género (Navidrome puede buscar por tags/géneros)
                     search_results = await self.navidrome.search(detected_genre, limit=50)
                     data["library"]["search_results"] = search_results
@@ -587,14 +742,14 @@ Responde ahora de forma natural y conversacional:"""
                     
                     if any(search_results.values()):
                         data["library"]["has_content"] = True
-                        print(f"✅ Encontrado {len(search_results.get('albums', []))} álbumes, {len(search_results.get('artists', []))} artistas de género '{detected_genre}'")
+                        logger.debug("✅ Encontrado %s álbumes, %s artistas de género '%s'", len(search_results.get('albums', [])), len(search_results.get('artists', [])), detected_genre)
                     else:
                         data["library"]["has_content"] = False
-                        print(f"⚠️ No se encontraron resultados para género '{detected_genre}'")
+                        logger.warning("⚠️ No se encontraron resultados para género '%s'", detected_genre)
                         
                         # FALLBACK: Usar MusicBrainz para verificar si hay artistas del género
                         if self.musicbrainz:
-                            print(f"   🎯 Activando MusicBrainz para verificar género '{detected_genre}'...")
+                            logger.debug("   🎯 Activando MusicBrainz para verificar género '%s'...", detected_genre)
                             mb_results = await self._search_genre_with_musicbrainz(detected_genre, offset=mb_offset)
                             if mb_results and mb_results.get("results"):
                                 # Si MusicBrainz encuentra artistas, actualizar los resultados
@@ -602,7 +757,7 @@ Responde ahora de forma natural y conversacional:"""
                                 data["library"]["search_results"] = results_data
                                 data["library"]["has_content"] = True
                                 data["library"]["musicbrainz_verified"] = True
-                                print(f"   ✅ MusicBrainz encontró {len(results_data.get('albums', []))} álbumes, {len(results_data.get('artists', []))} artistas de '{detected_genre}'")
+                                logger.debug("   ✅ MusicBrainz encontró %s álbumes, %s artistas de '%s'", len(results_data.get('albums', [])), len(results_data.get('artists', [])), detected_genre)
                                 
                                 # Guardar contexto para "busca más"
                                 session.context["last_mb_search"] = {
@@ -625,7 +780,7 @@ Responde ahora de forma natural y conversacional:"""
                 
                 # Si detectó un género pero NO es recomendación (ej: "tengo algo de jazz?")
                 elif detected_genre and not search_term:
-                    print(f"🔍 Buscando en biblioteca por GÉNERO (no recomendación): '{detected_genre}' (query: '{query}')")
+                    logger.debug("🔍 Buscando en biblioteca por GÉNERO (no recomendación): '%s' (query: '%s')", detected_genre, query)
                     # Buscar por género en Navidrome primero
                     search_results = await self.navidrome.search(detected_genre, limit=50)
                     data["library"]["search_term"] = detected_genre
@@ -636,13 +791,13 @@ Responde ahora de forma natural y conversacional:"""
                     local_artists_count = len(search_results.get('artists', []))
                     
                     if any(search_results.values()):
-                        print(f"✅ Búsqueda local: {local_albums_count} álbumes, {local_artists_count} artistas de '{detected_genre}'")
+                        logger.debug("✅ Búsqueda local: %s álbumes, %s artistas de '%s'", local_albums_count, local_artists_count, detected_genre)
                     else:
-                        print(f"⚠️ Búsqueda local: 0 resultados para '{detected_genre}'")
+                        logger.warning("⚠️ Búsqueda local: 0 resultados para '%s'", detected_genre)
                     
                     # SIEMPRE usar MusicBrainz para géneros (para complementar y permitir "busca más")
                     if self.musicbrainz:
-                        print(f"   🎯 Usando MusicBrainz para verificar más artistas de '{detected_genre}'...")
+                        logger.debug("   🎯 Usando MusicBrainz para verificar más artistas de '%s'...", detected_genre)
                         mb_results = await self._search_genre_with_musicbrainz(detected_genre, offset=mb_offset)
                         
                         if mb_results and mb_results.get("results"):
@@ -684,8 +839,8 @@ Responde ahora de forma natural y conversacional:"""
                             
                             mb_albums = len(results_data.get('albums', []))
                             mb_artists = len(results_data.get('artists', []))
-                            print(f"   ✅ MusicBrainz agregó: {mb_albums} álbumes, {mb_artists} artistas")
-                            print(f"   📊 Total combinado: {len(combined_albums)} álbumes, {len(combined_artists)} artistas")
+                            logger.debug("   ✅ MusicBrainz agregó: %s álbumes, %s artistas", mb_albums, mb_artists)
+                            logger.debug("   📊 Total combinado: %s álbumes, %s artistas", len(combined_albums), len(combined_artists))
                             
                             # Guardar contexto para "busca más" SIEMPRE
                             session.context["last_mb_search"] = {
@@ -716,12 +871,12 @@ Responde ahora de forma natural y conversacional:"""
                 
                 # Si hay un artista específico, buscar por artista
                 elif search_term:
-                    print(f"🔍 Buscando en biblioteca por ARTISTA: '{search_term}' (query: '{query}')")
+                    logger.debug("🔍 Buscando en biblioteca por ARTISTA: '%s' (query: '%s')", search_term, query)
                     
                     # Generar variaciones del término para búsqueda más flexible
                     # Ej: "kaseo" → ["kaseo", "kase.o", "kase o", "kase. o"]
                     search_variations = self._generate_search_variations(search_term)
-                    print(f"🔍 DEBUG - Variaciones de búsqueda: {search_variations}")
+                    logger.debug("🔍 DEBUG - Variaciones de búsqueda: %s", search_variations)
                     
                     # Buscar con todas las variaciones y combinar resultados
                     combined_results = {"tracks": [], "albums": [], "artists": []}
@@ -738,25 +893,25 @@ Responde ahora de forma natural y conversacional:"""
                     search_results = combined_results
                     
                     # DEBUG: Mostrar resultados crudos antes del filtro
-                    print(f"🔍 DEBUG - Resultados ANTES del filtro:")
-                    print(f"   Tracks: {len(search_results.get('tracks', []))}")
-                    print(f"   Albums: {len(search_results.get('albums', []))}")
+                    logger.debug("🔍 DEBUG - Resultados ANTES del filtro:")
+                    logger.debug("   Tracks: %s", len(search_results.get('tracks', [])))
+                    logger.debug("   Albums: %s", len(search_results.get('albums', [])))
                     if search_results.get('albums'):
                         for album in search_results.get('albums', [])[:3]:
-                            print(f"     - {album.artist} - {album.name}")
-                    print(f"   Artists: {len(search_results.get('artists', []))}")
+                            logger.debug("     - %s - %s", album.artist, album.name)
+                    logger.debug("   Artists: %s", len(search_results.get('artists', [])))
                     
                     # FILTRAR resultados para mantener solo los que realmente coincidan
                     filtered_results = self._filter_relevant_results(search_results, search_term)
                     
                     # DEBUG: Mostrar resultados después del filtro
-                    print(f"🔍 DEBUG - Resultados DESPUÉS del filtro:")
-                    print(f"   Tracks: {len(filtered_results.get('tracks', []))}")
-                    print(f"   Albums: {len(filtered_results.get('albums', []))}")
+                    logger.debug("🔍 DEBUG - Resultados DESPUÉS del filtro:")
+                    logger.debug("   Tracks: %s", len(filtered_results.get('tracks', [])))
+                    logger.debug("   Albums: %s", len(filtered_results.get('albums', [])))
                     if filtered_results.get('albums'):
                         for album in filtered_results.get('albums', [])[:3]:
-                            print(f"     - {album.artist} - {album.name}")
-                    print(f"   Artists: {len(filtered_results.get('artists', []))}")
+                            logger.debug("     - %s - %s", album.artist, album.name)
+                    logger.debug("   Artists: %s", len(filtered_results.get('artists', [])))
                     
                     data["library"]["search_results"] = filtered_results
                     data["library"]["search_term"] = search_term
@@ -764,19 +919,19 @@ Responde ahora de forma natural y conversacional:"""
                     
                     if any(filtered_results.values()):
                         data["library"]["has_content"] = True
-                        print(f"✅ Encontrado: {len(filtered_results.get('tracks', []))} tracks, {len(filtered_results.get('albums', []))} álbumes, {len(filtered_results.get('artists', []))} artistas")
+                        logger.debug("✅ Encontrado: %s tracks, %s álbumes, %s artistas", len(filtered_results.get('tracks', [])), len(filtered_results.get('albums', [])), len(filtered_results.get('artists', [])))
                     else:
                         data["library"]["has_content"] = False
-                        print(f"⚠️ No se encontraron resultados para '{search_term}'")
+                        logger.warning("⚠️ No se encontraron resultados para '%s'", search_term)
                     
             except Exception as e:
-                print(f"⚠️ Error obteniendo datos de Navidrome: {e}")
+                logger.warning("⚠️ Error obteniendo datos de Navidrome: %s", e)
                 data["library"]["error"] = str(e)
         
         # Datos de escucha (ListenBrainz)
         if needs_listening_history:
             try:
-                print(f"📊 Obteniendo historial de escucha...")
+                logger.debug("📊 Obteniendo historial de escucha...")
                 
                 # OPTIMIZACIÓN: Paralelizar todas las llamadas
                 tasks = []
@@ -815,16 +970,16 @@ Responde ahora de forma natural y conversacional:"""
                         data["listening_history"][task_names[i]] = [] if task_names[i] != "stats" else {}
                 
                 service_used = "ListenBrainz" if self.listenbrainz and data["listening_history"].get("recent_tracks") else "Ninguno"
-                print(f"✅ Historial obtenido desde: {service_used}")
+                logger.debug("✅ Historial obtenido desde: %s", service_used)
                 
             except Exception as e:
-                print(f"⚠️ Error obteniendo historial de escucha: {e}")
+                logger.warning("⚠️ Error obteniendo historial de escucha: %s", e)
                 data["listening_history"]["error"] = str(e)
         
         # Búsqueda de contenido similar (ListenBrainz CF)
         if self.discovery_service and ("similar" in query_lower or "parecido" in query_lower or "como" in query_lower):
             try:
-                print(f"🔍 Buscando contenido similar en ListenBrainz")
+                logger.debug("🔍 Buscando contenido similar en ListenBrainz")
                 # Extraer nombre de artista/álbum de la query
                 words = query.split()
                 for i, word in enumerate(words):
@@ -839,12 +994,12 @@ Responde ahora de forma natural y conversacional:"""
                             data["similar_content"] = similar_artists
                         break
             except Exception as e:
-                print(f"⚠️ Error buscando contenido similar: {e}")
+                logger.warning("⚠️ Error buscando contenido similar: %s", e)
         
         # Buscar información de MusicBrainz sobre artistas específicos cuando preguntan por "mejor disco/álbum"
         if self.musicbrainz and needs_library_search and search_term and any(word in query_lower for word in ["mejor", "recomend"]):
             try:
-                print(f"🌍 Buscando información en MusicBrainz para '{search_term}'...")
+                logger.debug("🌍 Buscando información en MusicBrainz para '%s'...", search_term)
                 # Obtener top álbumes del artista desde MusicBrainz
                 top_albums = await self.musicbrainz.get_artist_top_albums(search_term, limit=10)
                 if top_albums:
@@ -852,14 +1007,14 @@ Responde ahora de forma natural y conversacional:"""
                         "artist": search_term,
                         "top_albums": top_albums
                     }
-                    print(f"✅ Encontrados {len(top_albums)} álbumes de '{search_term}' en MusicBrainz")
+                    logger.debug("✅ Encontrados %s álbumes de '%s' en MusicBrainz", len(top_albums), search_term)
             except Exception as e:
-                print(f"⚠️ Error obteniendo info de MusicBrainz para '{search_term}': {e}")
+                logger.warning("⚠️ Error obteniendo info de MusicBrainz para '%s': %s", search_term, e)
         
         # Buscar lanzamientos recientes cuando lo pidan
         if needs_recent_releases:
             try:
-                print(f"🆕 Buscando lanzamientos recientes...")
+                logger.debug("🆕 Buscando lanzamientos recientes...")
                 
                 # Obtener artistas de la biblioteca (TODOS para lanzamientos recientes)
                 library_artists = []
@@ -868,7 +1023,7 @@ Responde ahora de forma natural y conversacional:"""
                     library_artists = [artist.name for artist in artists if artist.name]
                 
                 if library_artists and self.musicbrainz:
-                    print(f"   📚 Artistas en biblioteca: {len(library_artists)}")
+                    logger.debug("   📚 Artistas en biblioteca: %s", len(library_artists))
                     
                     # Buscar lanzamientos recientes de artistas de la biblioteca
                     recent_releases = await self.musicbrainz.get_recent_releases_for_artists(
@@ -878,22 +1033,22 @@ Responde ahora de forma natural y conversacional:"""
                     
                     if recent_releases:
                         data["recent_releases"] = recent_releases[:10]  # Máximo 10
-                        print(f"✅ Encontrados {len(recent_releases)} lanzamientos recientes")
+                        logger.debug("✅ Encontrados %s lanzamientos recientes", len(recent_releases))
                     else:
-                        print("⚠️ No se encontraron lanzamientos recientes")
+                        logger.warning("⚠️ No se encontraron lanzamientos recientes")
                         data["recent_releases"] = []
                 else:
-                    print("⚠️ No hay artistas en biblioteca o MusicBrainz no disponible")
+                    logger.warning("⚠️ No hay artistas en biblioteca o MusicBrainz no disponible")
                     data["recent_releases"] = []
                 
             except Exception as e:
-                print(f"⚠️ Error buscando lanzamientos recientes: {e}")
+                logger.warning("⚠️ Error buscando lanzamientos recientes: %s", e)
                 data["recent_releases"] = []
         
         # Buscar música nueva activamente cuando lo pidan
         if needs_new_music:
             try:
-                print(f"🌍 Buscando música NUEVA basada en gustos del usuario...")
+                logger.debug("🌍 Buscando música NUEVA basada en gustos del usuario...")
                 
                 # Obtener top artistas del historial
                 top_artists = []
@@ -920,7 +1075,7 @@ Responde ahora de forma natural y conversacional:"""
                     new_discoveries = []
                     for i, similar_artists in enumerate(similar_results):
                         if isinstance(similar_artists, Exception):
-                            print(f"⚠️ Error obteniendo similares: {similar_artists}")
+                            logger.warning("⚠️ Error obteniendo similares: %s", similar_artists)
                             continue
                         
                         top_artist = top_artists[i]
@@ -962,10 +1117,10 @@ Responde ahora de forma natural y conversacional:"""
                     
                     if new_discoveries:
                         data["new_discoveries"] = new_discoveries[:8]
-                        print(f"✅ Encontrados {len(data['new_discoveries'])} descubrimientos con álbums específicos")
+                        logger.debug("✅ Encontrados %s descubrimientos con álbums específicos", len(data['new_discoveries']))
                 
             except Exception as e:
-                print(f"⚠️ Error buscando música nueva: {e}")
+                logger.warning("⚠️ Error buscando música nueva: %s", e)
         
         return data
     
@@ -978,33 +1133,33 @@ Responde ahora de forma natural y conversacional:"""
         Returns:
             String formateado con toda la información para la IA
         """
-        formatted = ""
+        parts = []
         
         # Reproducción actual (si se preguntó por ello)
         if data.get("now_playing") is not None:
-            formatted += f"\n🎵 === REPRODUCCIÓN ACTUAL ===\n"
+            parts.append(f"\n🎵 === REPRODUCCIÓN ACTUAL ===\n")
             now_playing = data["now_playing"]
             if now_playing:
-                formatted += f"✅ Hay {len(now_playing)} reproducción(es) activa(s):\n\n"
+                parts.append(f"✅ Hay {len(now_playing)} reproducción(es) activa(s):\n\n")
                 for i, entry in enumerate(now_playing, 1):
-                    formatted += f"  {i}. {entry['artist']} - {entry['track']}"
+                    parts.append(f"  {i}. {entry['artist']} - {entry['track']}")
                     if entry.get('album'):
-                        formatted += f" (de {entry['album']})"
-                    formatted += f"\n     👤 Usuario: {entry['username']}"
-                    formatted += f" | 🎧 Reproductor: {entry['player_name']}"
+                        parts.append(f" (de {entry['album']})")
+                    parts.append(f"\n     👤 Usuario: {entry['username']}")
+                    parts.append(f" | 🎧 Reproductor: {entry['player_name']}")
                     if entry.get('minutes_ago') == 0:
-                        formatted += f" | ▶️ Reproduciendo ahora mismo"
+                        parts.append(f" | ▶️ Reproduciendo ahora mismo")
                     elif entry.get('minutes_ago'):
-                        formatted += f" | ⏱️ Comenzó hace {entry['minutes_ago']} minuto(s)"
+                        parts.append(f" | ⏱️ Comenzó hace {entry['minutes_ago']} minuto(s)")
                     if entry.get('duration'):
                         mins = entry['duration'] // 60
                         secs = entry['duration'] % 60
-                        formatted += f" | ⏳ Duración: {mins}:{secs:02d}"
-                    formatted += "\n"
-                formatted += "\n"
+                        parts.append(f" | ⏳ Duración: {mins}:{secs:02d}")
+                    parts.append("\n")
+                parts.append("\n")
             else:
-                formatted += "  ⚠️ No hay nada reproduciéndose en este momento\n"
-                formatted += "  💡 Asegúrate de tener reproductores conectados y activos en Navidrome\n\n"
+                parts.append("  ⚠️ No hay nada reproduciéndose en este momento\n")
+                parts.append("  💡 Asegúrate de tener reproductores conectados y activos en Navidrome\n\n")
         
         # SIEMPRE mostrar primero la biblioteca (si hay búsqueda o datos completos)
         if data.get("library"):
@@ -1016,157 +1171,157 @@ Responde ahora de forma natural y conversacional:"""
             # Si hay datos completos de biblioteca (consultas informativas)
             if lib.get("complete_data"):
                 complete_data = lib["complete_data"]
-                formatted += f"\n📚 === BIBLIOTECA COMPLETA ===\n"
-                formatted += f"📊 <b>ESTADÍSTICAS GENERALES:</b>\n"
-                formatted += f"• <b>Total de artistas:</b> {complete_data['total_artists']}\n"
-                formatted += f"• <b>Total de álbumes:</b> {complete_data['total_albums']}\n"
-                formatted += f"• <b>Total de canciones:</b> {complete_data['total_tracks']}\n"
-                formatted += f"• <b>Total de géneros:</b> {complete_data['total_genres']}\n\n"
+                parts.append(f"\n📚 === BIBLIOTECA COMPLETA ===\n")
+                parts.append(f"📊 <b>ESTADÍSTICAS GENERALES:</b>\n")
+                parts.append(f"• <b>Total de artistas:</b> {complete_data['total_artists']}\n")
+                parts.append(f"• <b>Total de álbumes:</b> {complete_data['total_albums']}\n")
+                parts.append(f"• <b>Total de canciones:</b> {complete_data['total_tracks']}\n")
+                parts.append(f"• <b>Total de géneros:</b> {complete_data['total_genres']}\n\n")
                 
                 # Mostrar géneros únicos
                 if complete_data.get("genres"):
-                    formatted += f"🎸 <b>GÉNEROS EN TU BIBLIOTECA ({complete_data['total_genres']}):</b>\n"
+                    parts.append(f"🎸 <b>GÉNEROS EN TU BIBLIOTECA ({complete_data['total_genres']}):</b>\n")
                     for i, genre in enumerate(complete_data["genres"][:20], 1):  # Mostrar primeros 20
-                        formatted += f"  {i}. {genre}\n"
+                        parts.append(f"  {i}. {genre}\n")
                     if complete_data['total_genres'] > 20:
-                        formatted += f"  ... y {complete_data['total_genres'] - 20} géneros más\n"
-                    formatted += "\n"
+                        parts.append(f"  ... y {complete_data['total_genres'] - 20} géneros más\n")
+                    parts.append("\n")
                 
                 # Mostrar artistas únicos (primeros 30)
                 if complete_data.get("unique_artists"):
-                    formatted += f"🎤 <b>ARTISTAS EN TU BIBLIOTECA ({complete_data['unique_artists_count']}):</b>\n"
+                    parts.append(f"🎤 <b>ARTISTAS EN TU BIBLIOTECA ({complete_data['unique_artists_count']}):</b>\n")
                     for i, artist in enumerate(complete_data["unique_artists"][:30], 1):  # Mostrar primeros 30
-                        formatted += f"  {i}. {artist}\n"
+                        parts.append(f"  {i}. {artist}\n")
                     if complete_data['unique_artists_count'] > 30:
-                        formatted += f"  ... y {complete_data['unique_artists_count'] - 30} artistas más\n"
-                    formatted += "\n"
+                        parts.append(f"  ... y {complete_data['unique_artists_count'] - 30} artistas más\n")
+                    parts.append("\n")
                 
                 # Si hay una consulta de género, proporcionar información para análisis inteligente
                 if complete_data.get("genre_query"):
                     genre_query = complete_data["genre_query"]
                     requested_genre = genre_query["requested_genre"]
                     
-                    formatted += f"\n🎸 <b>CONSULTA DE GÉNERO: {requested_genre.upper()}</b>\n"
-                    formatted += f"💡 <b>INSTRUCCIONES PARA LA IA:</b>\n"
-                    formatted += f"• El usuario pregunta por música de género '{requested_genre}'\n"
-                    formatted += f"• Analiza TODA la biblioteca ({genre_query['total_artists']} artistas, {genre_query['total_albums']} álbumes, {genre_query['total_tracks']} canciones)\n"
-                    formatted += f"• Busca artistas que puedan estar relacionados con '{requested_genre}' aunque no estén etiquetados exactamente así\n"
-                    formatted += f"• Considera variaciones, subgéneros, estilos relacionados y artistas similares\n"
-                    formatted += f"• Usa tu conocimiento musical para identificar conexiones\n\n"
+                    parts.append(f"\n🎸 <b>CONSULTA DE GÉNERO: {requested_genre.upper()}</b>\n")
+                    parts.append(f"💡 <b>INSTRUCCIONES PARA LA IA:</b>\n")
+                    parts.append(f"• El usuario pregunta por música de género '{requested_genre}'\n")
+                    parts.append(f"• Analiza TODA la biblioteca ({genre_query['total_artists']} artistas, {genre_query['total_albums']} álbumes, {genre_query['total_tracks']} canciones)\n")
+                    parts.append(f"• Busca artistas que puedan estar relacionados con '{requested_genre}' aunque no estén etiquetados exactamente así\n")
+                    parts.append(f"• Considera variaciones, subgéneros, estilos relacionados y artistas similares\n")
+                    parts.append(f"• Usa tu conocimiento musical para identificar conexiones\n\n")
                     
                     # Proporcionar muestra de artistas para que la IA analice
                     if complete_data.get("unique_artists"):
-                        formatted += f"🎤 <b>MUESTRA DE ARTISTAS PARA ANÁLISIS (primeros 50):</b>\n"
+                        parts.append(f"🎤 <b>MUESTRA DE ARTISTAS PARA ANÁLISIS (primeros 50):</b>\n")
                         for i, artist in enumerate(complete_data["unique_artists"][:50], 1):
-                            formatted += f"  {i}. {artist}\n"
+                            parts.append(f"  {i}. {artist}\n")
                         if complete_data['unique_artists_count'] > 50:
-                            formatted += f"  ... y {complete_data['unique_artists_count'] - 50} artistas más para analizar\n"
-                        formatted += "\n"
+                            parts.append(f"  ... y {complete_data['unique_artists_count'] - 50} artistas más para analizar\n")
+                        parts.append("\n")
                     
                     # Proporcionar muestra de géneros para contexto
                     if complete_data.get("genres"):
-                        formatted += f"🎵 <b>GÉNEROS DISPONIBLES EN LA BIBLIOTECA:</b>\n"
+                        parts.append(f"🎵 <b>GÉNEROS DISPONIBLES EN LA BIBLIOTECA:</b>\n")
                         for i, genre in enumerate(complete_data["genres"][:30], 1):
-                            formatted += f"  {i}. {genre}\n"
+                            parts.append(f"  {i}. {genre}\n")
                         if complete_data['total_genres'] > 30:
-                            formatted += f"  ... y {complete_data['total_genres'] - 30} géneros más\n"
-                        formatted += "\n"
+                            parts.append(f"  ... y {complete_data['total_genres'] - 30} géneros más\n")
+                        parts.append("\n")
                 
                 # Si hay datos filtrados por artista, mostrarlos
                 if complete_data.get("filtered_by_artist"):
                     filtered = complete_data["filtered_by_artist"]
-                    formatted += f"\n🎤 <b>FILTRADO POR ARTISTA: {filtered['artist'].upper()}</b>\n"
-                    formatted += f"📊 <b>ESTADÍSTICAS DE {filtered['artist'].upper()}:</b>\n"
-                    formatted += f"• <b>Artistas coincidentes:</b> {filtered['total_matching_artists']}\n"
-                    formatted += f"• <b>Álbumes:</b> {filtered['total_albums']}\n"
-                    formatted += f"• <b>Canciones:</b> {filtered['total_tracks']}\n\n"
+                    parts.append(f"\n🎤 <b>FILTRADO POR ARTISTA: {filtered['artist'].upper()}</b>\n")
+                    parts.append(f"📊 <b>ESTADÍSTICAS DE {filtered['artist'].upper()}:</b>\n")
+                    parts.append(f"• <b>Artistas coincidentes:</b> {filtered['total_matching_artists']}\n")
+                    parts.append(f"• <b>Álbumes:</b> {filtered['total_albums']}\n")
+                    parts.append(f"• <b>Canciones:</b> {filtered['total_tracks']}\n\n")
                     
                     # Mostrar artistas coincidentes
                     if filtered.get("matching_artists"):
-                        formatted += f"🎤 <b>ARTISTAS COINCIDENTES:</b>\n"
+                        parts.append(f"🎤 <b>ARTISTAS COINCIDENTES:</b>\n")
                         for i, artist in enumerate(filtered["matching_artists"][:10], 1):
-                            formatted += f"  {i}. {artist.name}"
+                            parts.append(f"  {i}. {artist.name}")
                             if artist.album_count:
-                                formatted += f" ({artist.album_count} álbumes)"
-                            formatted += "\n"
+                                parts.append(f" ({artist.album_count} álbumes)")
+                            parts.append("\n")
                         if filtered['total_matching_artists'] > 10:
-                            formatted += f"  ... y {filtered['total_matching_artists'] - 10} artistas más\n"
-                        formatted += "\n"
+                            parts.append(f"  ... y {filtered['total_matching_artists'] - 10} artistas más\n")
+                        parts.append("\n")
                     
                     # Mostrar álbumes del artista
                     if filtered.get("albums"):
-                        formatted += f"📀 <b>ÁLBUMES DE {filtered['artist'].upper()}:</b>\n"
+                        parts.append(f"📀 <b>ÁLBUMES DE {filtered['artist'].upper()}:</b>\n")
                         for i, album in enumerate(filtered["albums"][:15], 1):
-                            formatted += f"  {i}. {album.name}"
+                            parts.append(f"  {i}. {album.name}")
                             if album.year:
-                                formatted += f" ({album.year})"
-                            formatted += "\n"
+                                parts.append(f" ({album.year})")
+                            parts.append("\n")
                         if filtered['total_albums'] > 15:
-                            formatted += f"  ... y {filtered['total_albums'] - 15} álbumes más\n"
-                        formatted += "\n"
+                            parts.append(f"  ... y {filtered['total_albums'] - 15} álbumes más\n")
+                        parts.append("\n")
                 
-                formatted += f"💡 <b>NOTA:</b> Esta es información completa de toda tu biblioteca musical\n\n"
+                parts.append(f"💡 <b>NOTA:</b> Esta es información completa de toda tu biblioteca musical\n\n")
             
             if lib.get("search_results"):
                 results = lib["search_results"]
                 
                 # Si es búsqueda por género, indicarlo claramente
                 if is_genre_search:
-                    formatted += f"\n📚 === BIBLIOTECA LOCAL - BÚSQUEDA POR GÉNERO ===\n"
-                    formatted += f"🎸 GÉNERO DETECTADO: {detected_genre.upper()}\n"
-                    formatted += f"💡 El usuario pide RECOMENDACIÓN de {detected_genre} de su biblioteca\n\n"
+                    parts.append(f"\n📚 === BIBLIOTECA LOCAL - BÚSQUEDA POR GÉNERO ===\n")
+                    parts.append(f"🎸 GÉNERO DETECTADO: {detected_genre.upper()}\n")
+                    parts.append(f"💡 El usuario pide RECOMENDACIÓN de {detected_genre} de su biblioteca\n\n")
                 
                 # Priorizar álbumes si existen
                 if results.get("albums"):
                     if not is_genre_search:
-                        formatted += f"\n📚 === BIBLIOTECA LOCAL === \n"
-                        formatted += f"📀 ÁLBUMES ENCONTRADOS PARA '{search_term.upper()}' ({len(results['albums'])}):\n"
-                        formatted += f"⚠️ IMPORTANTE: Verifica que el ARTISTA coincida con lo solicitado\n\n"
+                        parts.append(f"\n📚 === BIBLIOTECA LOCAL === \n")
+                        parts.append(f"📀 ÁLBUMES ENCONTRADOS PARA '{search_term.upper()}' ({len(results['albums'])}):\n")
+                        parts.append(f"⚠️ IMPORTANTE: Verifica que el ARTISTA coincida con lo solicitado\n\n")
                     else:
-                        formatted += f"📀 ÁLBUMES DE {detected_genre.upper()} EN BIBLIOTECA ({len(results['albums'])}):\n"
-                        formatted += f"💡 Recomienda UNO O VARIOS de estos según el gusto del usuario\n\n"
+                        parts.append(f"📀 ÁLBUMES DE {detected_genre.upper()} EN BIBLIOTECA ({len(results['albums'])}):\n")
+                        parts.append(f"💡 Recomienda UNO O VARIOS de estos según el gusto del usuario\n\n")
                     
                     for i, album in enumerate(results["albums"][:20], 1):
-                        formatted += f"  {i}. {album.artist} - {album.name}"
+                        parts.append(f"  {i}. {album.artist} - {album.name}")
                         if album.year:
-                            formatted += f" ({album.year})"
+                            parts.append(f" ({album.year})")
                         if album.track_count:
-                            formatted += f" [{album.track_count} canciones]"
-                        formatted += "\n"
-                    formatted += "\n"
+                            parts.append(f" [{album.track_count} canciones]")
+                        parts.append("\n")
+                    parts.append("\n")
                 
                 # Luego artistas
                 if results.get("artists"):
                     if not results.get("albums"):  # Solo mostrar si no hay álbumes
-                        formatted += f"\n📚 === BIBLIOTECA LOCAL === \n"
-                    formatted += f"🎤 ARTISTAS ENCONTRADOS EN BIBLIOTECA ({len(results['artists'])}):\n"
-                    formatted += f"⚠️ Verifica que el nombre coincida con lo que pidió el usuario\n\n"
+                        parts.append(f"\n📚 === BIBLIOTECA LOCAL === \n")
+                    parts.append(f"🎤 ARTISTAS ENCONTRADOS EN BIBLIOTECA ({len(results['artists'])}):\n")
+                    parts.append(f"⚠️ Verifica que el nombre coincida con lo que pidió el usuario\n\n")
                     for i, artist in enumerate(results["artists"][:10], 1):
-                        formatted += f"  {i}. ARTISTA: {artist.name}"
+                        parts.append(f"  {i}. ARTISTA: {artist.name}")
                         if artist.album_count:
-                            formatted += f" | {artist.album_count} álbumes disponibles"
-                        formatted += "\n"
-                    formatted += "\n"
+                            parts.append(f" | {artist.album_count} álbumes disponibles")
+                        parts.append("\n")
+                    parts.append("\n")
                 
                 # Luego canciones
                 if results.get("tracks"):
                     if not results.get("albums") and not results.get("artists"):
-                        formatted += f"\n📚 === BIBLIOTECA LOCAL === \n"
-                    formatted += f"🎵 CANCIONES ENCONTRADAS EN BIBLIOTECA ({len(results['tracks'])}):\n"
-                    formatted += f"⚠️ Verifica que el ARTISTA coincida\n\n"
+                        parts.append(f"\n📚 === BIBLIOTECA LOCAL === \n")
+                    parts.append(f"🎵 CANCIONES ENCONTRADAS EN BIBLIOTECA ({len(results['tracks'])}):\n")
+                    parts.append(f"⚠️ Verifica que el ARTISTA coincida\n\n")
                     for i, track in enumerate(results["tracks"][:10], 1):
-                        formatted += f"  {i}. ARTISTA: {track.artist} | CANCIÓN: {track.title}"
+                        parts.append(f"  {i}. ARTISTA: {track.artist} | CANCIÓN: {track.title}")
                         if track.album:
-                            formatted += f" | ÁLBUM: {track.album}"
+                            parts.append(f" | ÁLBUM: {track.album}")
                         if track.year:
-                            formatted += f" [{track.year}]"
-                        formatted += "\n"
-                    formatted += "\n"
+                            parts.append(f" [{track.year}]")
+                        parts.append("\n")
+                    parts.append("\n")
             
             # Si no se encontró nada, indicarlo claramente
             if lib.get("has_content") == False:
-                formatted += f"\n📚 === BIBLIOTECA LOCAL === \n"
-                formatted += f"⚠️ NO TIENES '{search_term.upper()}' EN TU BIBLIOTECA\n\n"
+                parts.append(f"\n📚 === BIBLIOTECA LOCAL === \n")
+                parts.append(f"⚠️ NO TIENES '{search_term.upper()}' EN TU BIBLIOTECA\n\n")
         
         # Historial de escucha (ListenBrainz) - SOLO SI ES RELEVANTE
         if data.get("listening_history"):
@@ -1175,56 +1330,55 @@ Responde ahora de forma natural y conversacional:"""
             # ESCUCHAS RECIENTES (orden cronológico) - CRÍTICO para consultas de "últimos"
             if hist.get("recent_tracks"):
                 recent = hist["recent_tracks"]
-                formatted += f"\n🕐 === HISTORIAL RECIENTE (orden cronológico, MÁS RECIENTE PRIMERO) ===\n"
-                formatted += f"⚠️ IMPORTANTE: Usa ESTOS datos cuando pregunten por 'últimos/recientes' escuchados\n\n"
+                parts.append(f"\n🕐 === HISTORIAL RECIENTE (orden cronológico, MÁS RECIENTE PRIMERO) ===\n")
+                parts.append(f"⚠️ IMPORTANTE: Usa ESTOS datos cuando pregunten por 'últimos/recientes' escuchados\n\n")
                 
                 # Mostrar últimas escuchas
-                formatted += f"📝 ÚLTIMAS ESCUCHAS:\n"
+                parts.append(f"📝 ÚLTIMAS ESCUCHAS:\n")
                 for i, track in enumerate(recent[:15], 1):
-                    formatted += f"  {i}. {track.artist} - {track.name}"
+                    parts.append(f"  {i}. {track.artist} - {track.name}")
                     if track.date:
-                        formatted += f" (escuchado: {track.date.strftime('%Y-%m-%d %H:%M')})"
-                    formatted += "\n"
+                        parts.append(f" (escuchado: {track.date.strftime('%Y-%m-%d %H:%M')})")
+                    parts.append("\n")
                 
                 # Extraer artistas únicos en orden cronológico
-                from collections import OrderedDict
                 unique_artists = OrderedDict()
                 for track in recent:
                     if track.artist and track.artist not in unique_artists:
                         unique_artists[track.artist] = True
                 
                 if unique_artists:
-                    formatted += f"\n🎤 ÚLTIMOS ARTISTAS ÚNICOS (en orden cronológico):\n"
+                    parts.append(f"\n🎤 ÚLTIMOS ARTISTAS ÚNICOS (en orden cronológico):\n")
                     for i, artist in enumerate(list(unique_artists.keys())[:10], 1):
-                        formatted += f"  {i}. {artist}\n"
+                        parts.append(f"  {i}. {artist}\n")
                 
-                formatted += f"\n💡 Si preguntan 'últimos 3/5/N artistas' → USA ESTA LISTA (no top artists)\n\n"
+                parts.append(f"\n💡 Si preguntan 'últimos 3/5/N artistas' → USA ESTA LISTA (no top artists)\n\n")
             
             # Estadísticas generales
             if hist.get("stats"):
                 stats = hist["stats"]
-                formatted += f"\n📊 === ESTADÍSTICAS GENERALES ===\n"
-                formatted += f"  • Total de escuchas: {stats.get('total_listens', 'N/A')}\n"
-                formatted += f"  • Artistas únicos: {stats.get('total_artists', 'N/A')}\n"
-                formatted += f"  • Álbumes únicos: {stats.get('total_albums', 'N/A')}\n"
-                formatted += f"  • Canciones únicas: {stats.get('total_tracks', 'N/A')}\n\n"
+                parts.append(f"\n📊 === ESTADÍSTICAS GENERALES ===\n")
+                parts.append(f"  • Total de escuchas: {stats.get('total_listens', 'N/A')}\n")
+                parts.append(f"  • Artistas únicos: {stats.get('total_artists', 'N/A')}\n")
+                parts.append(f"  • Álbumes únicos: {stats.get('total_albums', 'N/A')}\n")
+                parts.append(f"  • Canciones únicas: {stats.get('total_tracks', 'N/A')}\n\n")
             
             # Top artists (por cantidad, NO por cronología)
             if hist.get("top_artists"):
-                formatted += f"\n🏆 TUS TOP ARTISTAS MÁS ESCUCHADOS (por cantidad total):\n"
-                formatted += f"⚠️ NOTA: Estos son los MÁS ESCUCHADOS, NO los más recientes\n"
+                parts.append(f"\n🏆 TUS TOP ARTISTAS MÁS ESCUCHADOS (por cantidad total):\n")
+                parts.append(f"⚠️ NOTA: Estos son los MÁS ESCUCHADOS, NO los más recientes\n")
                 for i, artist in enumerate(hist["top_artists"][:5], 1):
-                    formatted += f"  {i}. {artist.name}"
+                    parts.append(f"  {i}. {artist.name}")
                     if artist.playcount:
-                        formatted += f" ({artist.playcount} escuchas)"
-                    formatted += "\n"
-                formatted += "\n"
+                        parts.append(f" ({artist.playcount} escuchas)")
+                    parts.append("\n")
+                parts.append("\n")
         
         # Información de MusicBrainz sobre artista específico
         if data.get("musicbrainz_artist_info"):
             info = data["musicbrainz_artist_info"]
-            formatted += f"\n🌍 === INFORMACIÓN DE MUSICBRAINZ: {info['artist'].upper()} ===\n"
-            formatted += f"📊 TOP ÁLBUMES MÁS POPULARES (según MusicBrainz):\n\n"
+            parts.append(f"\n🌍 === INFORMACIÓN DE MUSICBRAINZ: {info['artist'].upper()} ===\n")
+            parts.append(f"📊 TOP ÁLBUMES MÁS POPULARES (según MusicBrainz):\n\n")
             for i, album in enumerate(info["top_albums"][:10], 1):
                 # Puede ser dict o objeto
                 if isinstance(album, dict):
@@ -1236,26 +1390,26 @@ Responde ahora de forma natural y conversacional:"""
                     playcount = getattr(album, 'playcount', 0)
                     url = getattr(album, 'url', '')
                 
-                formatted += f"  {i}. {album_name}"
+                parts.append(f"  {i}. {album_name}")
                 if playcount:
-                    formatted += f" - {playcount:,} escuchas globales"
+                    parts.append(f" - {playcount:,} escuchas globales")
                 if url:
-                    formatted += f" | {url}"
-                formatted += "\n"
-            formatted += "\n💡 IMPORTANTE: Usa esta info para recomendar el mejor álbum\n"
-            formatted += f"💡 Combina lo que tiene en biblioteca + información de MusicBrainz\n\n"
+                    parts.append(f" | {url}")
+                parts.append("\n")
+            parts.append("\n💡 IMPORTANTE: Usa esta info para recomendar el mejor álbum\n")
+            parts.append(f"💡 Combina lo que tiene en biblioteca + información de MusicBrainz\n\n")
         
         # Contenido similar
         if data.get("similar_content"):
-            formatted += f"\n🔗 ARTISTAS SIMILARES:\n"
+            parts.append(f"\n🔗 ARTISTAS SIMILARES:\n")
             for i, artist in enumerate(data["similar_content"][:5], 1):
                 url_info = f" - {artist.url}" if hasattr(artist, 'url') and artist.url else ""
-                formatted += f"  {i}. {artist.name}{url_info}\n"
+                parts.append(f"  {i}. {artist.name}{url_info}\n")
         
         # LANZAMIENTOS RECIENTES (música nueva de artistas de la biblioteca)
         if data.get("recent_releases"):
-            formatted += f"\n🆕 === LANZAMIENTOS RECIENTES DE TUS ARTISTAS ===\n"
-            formatted += f"📅 Últimos 30 días - Música nueva de artistas en tu biblioteca\n\n"
+            parts.append(f"\n🆕 === LANZAMIENTOS RECIENTES DE TUS ARTISTAS ===\n")
+            parts.append(f"📅 Últimos 30 días - Música nueva de artistas en tu biblioteca\n\n")
             
             for i, release in enumerate(data["recent_releases"][:10], 1):
                 title = release.get('title', 'Unknown')
@@ -1264,22 +1418,22 @@ Responde ahora de forma natural y conversacional:"""
                 release_type = release.get('type', 'album')
                 url = release.get('url', '')
                 
-                formatted += f"  {i}. **{title}** - {artist}"
+                parts.append(f"  {i}. **{title}** - {artist}")
                 if date:
-                    formatted += f" ({date})"
+                    parts.append(f" ({date})")
                 if release_type:
-                    formatted += f" [{release_type}]"
+                    parts.append(f" [{release_type}]")
                 if url:
-                    formatted += f" - {url}"
-                formatted += "\n"
+                    parts.append(f" - {url}")
+                parts.append("\n")
             
-            formatted += "\n💡 Estos son lanzamientos recientes de artistas que ya tienes en tu biblioteca\n"
+            parts.append("\n💡 Estos son lanzamientos recientes de artistas que ya tienes en tu biblioteca\n")
         
         # NUEVO: Descubrimientos (música que NO está en biblioteca pero puede recomendar)
         if data.get("new_discoveries"):
-            formatted += f"\n🌍 === MÚSICA NUEVA PARA DESCUBRIR (de ListenBrainz) ===\n"
-            formatted += f"📌 IMPORTANTE: Estos NO están en tu biblioteca pero PUEDES recomendarlos\n"
-            formatted += f"🎯 Basado en tus gustos, te pueden gustar:\n\n"
+            parts.append(f"\n🌍 === MÚSICA NUEVA PARA DESCUBRIR (de ListenBrainz) ===\n")
+            parts.append(f"📌 IMPORTANTE: Estos NO están en tu biblioteca pero PUEDES recomendarlos\n")
+            parts.append(f"🎯 Basado en tus gustos, te pueden gustar:\n\n")
             
             for i, discovery in enumerate(data["new_discoveries"][:8], 1):
                 # Puede ser dict (nuevo formato) o objeto (formato antiguo)
@@ -1289,37 +1443,37 @@ Responde ahora de forma natural y conversacional:"""
                     similar_to = discovery.get('similar_to', '')
                     url = discovery.get('url', '')
                     
-                    formatted += f"  {i}. **{artist}**"
+                    parts.append(f"  {i}. **{artist}**")
                     if album:
-                        formatted += f" - Álbum recomendado: **{album}**"
+                        parts.append(f" - Álbum recomendado: **{album}**")
                     if similar_to:
-                        formatted += f" (similar a {similar_to})"
+                        parts.append(f" (similar a {similar_to})")
                     if url:
-                        formatted += f" - {url}"
-                    formatted += "\n"
+                        parts.append(f" - {url}")
+                    parts.append("\n")
                 else:
                     # Formato antiguo (compatibilidad)
-                    formatted += f"  {i}. {discovery.name}"
+                    parts.append(f"  {i}. {discovery.name}")
                     if hasattr(discovery, 'url') and discovery.url:
-                        formatted += f" - {discovery.url}"
-                    formatted += "\n"
+                        parts.append(f" - {discovery.url}")
+                    parts.append("\n")
             
-            formatted += "\n💡 Recomienda estos álbumes/artistas libremente - son descubrimientos basados en sus gustos\n"
+            parts.append("\n💡 Recomienda estos álbumes/artistas libremente - son descubrimientos basados en sus gustos\n")
         
         # Si no hay datos
-        if not formatted:
-            formatted = "\n⚠️ No hay datos disponibles para responder esta consulta.\n"
+        if not parts:
+            parts.append("\n⚠️ No hay datos disponibles para responder esta consulta.\n")
         
         # Información sobre búsqueda incremental disponible
         if data.get("library", {}).get("can_search_more"):
             stats = data["library"]["mb_stats"]
-            formatted += f"\n💡 === BÚSQUEDA INCREMENTAL DISPONIBLE ===\n"
-            formatted += f"✓ Verificados hasta ahora: {stats['checked']}/{stats['total']} artistas\n"
-            formatted += f"✓ Quedan por verificar: {stats['remaining']} artistas\n"
-            formatted += f"\n💬 IMPORTANTE: Menciona al usuario que puede decir 'busca más' para verificar más artistas.\n"
-            formatted += f"Ejemplo: 'He verificado {stats['checked']} artistas de tu biblioteca. Si quieres que busque más a fondo, dime \"busca más\".'\n\n"
+            parts.append(f"\n💡 === BÚSQUEDA INCREMENTAL DISPONIBLE ===\n")
+            parts.append(f"✓ Verificados hasta ahora: {stats['checked']}/{stats['total']} artistas\n")
+            parts.append(f"✓ Quedan por verificar: {stats['remaining']} artistas\n")
+            parts.append(f"\n💬 IMPORTANTE: Menciona al usuario que puede decir 'busca más' para verificar más artistas.\n")
+            parts.append(f"Ejemplo: 'He verificado {stats['checked']} artistas de tu biblioteca. Si quieres que busque más a fondo, dime \"busca más\".'\n\n")
         
-        return formatted
+        return "".join(parts)
     
     def _extract_links(self, data: Dict[str, Any]) -> List[str]:
         """Extraer todos los enlaces relevantes del contexto
@@ -1390,7 +1544,7 @@ Responde ahora de forma natural y conversacional:"""
                 info["library_albums"] = library_results.get("albums", [])
                 info["library_tracks"] = library_results.get("tracks", [])
         except Exception as e:
-            print(f"Error buscando en biblioteca: {e}")
+            logger.debug("Error buscando en biblioteca: %s", e)
         
         # Información de descubrimiento (ListenBrainz + MusicBrainz)
         if self.discovery_service:
@@ -1402,7 +1556,7 @@ Responde ahora de forma natural y conversacional:"""
                     musicbrainz_service=self.musicbrainz
                 )
             except Exception as e:
-                print(f"Error obteniendo artistas similares: {e}")
+                logger.debug("Error obteniendo artistas similares: %s", e)
         
         # Información de MusicBrainz
         if self.musicbrainz:
@@ -1413,7 +1567,7 @@ Responde ahora de forma natural y conversacional:"""
                 # Top tracks  
                 info["top_tracks"] = await self.musicbrainz.get_artist_top_tracks(artist_name, limit=5)
             except Exception as e:
-                print(f"Error obteniendo info de MusicBrainz: {e}")
+                logger.debug("Error obteniendo info de MusicBrainz: %s", e)
         
         return info
     
@@ -1430,9 +1584,6 @@ Responde ahora de forma natural y conversacional:"""
         Returns:
             Resultados filtrados
         """
-        from difflib import SequenceMatcher
-        import unicodedata
-        
         def normalize_text(text: str) -> str:
             """Normalizar texto: eliminar tildes/acentos, puntuación y convertir a minúsculas
             
@@ -1441,7 +1592,6 @@ Responde ahora de forma natural y conversacional:"""
                 "Kase.O" -> "kaseo"
                 "El Mató a un Policía" -> "el mato a un policia"
             """
-            import re
             # Normalizar caracteres Unicode (NFD separa base + diacríticos)
             nfd = unicodedata.normalize('NFD', text)
             # Eliminar diacríticos (categoría 'Mn' = Nonspacing Mark)
@@ -1492,9 +1642,9 @@ Responde ahora de forma natural y conversacional:"""
                 artist_similarity >= SIMILARITY_THRESHOLD or 
                 search_normalized in album_normalized):
                 filtered["albums"].append(album)
-                print(f"   ✓ Álbum mantenido: {album.artist} - {album.name} (similitud: {artist_similarity:.2f})")
+                logger.debug("   ✓ Álbum mantenido: %s - %s (similitud: %.2f)", album.artist, album.name, artist_similarity)
             else:
-                print(f"   ✗ Álbum filtrado: {album.artist} - {album.name} (similitud: {artist_similarity:.2f})")
+                logger.debug("   ✗ Álbum filtrado: %s - %s (similitud: %.2f)", album.artist, album.name, artist_similarity)
         
         # Filtrar artistas
         for artist in results.get("artists", []):
@@ -1508,9 +1658,9 @@ Responde ahora de forma natural y conversacional:"""
                 artist_normalized.startswith(search_normalized) or
                 artist_similarity >= SIMILARITY_THRESHOLD):
                 filtered["artists"].append(artist)
-                print(f"   ✓ Artista mantenido: {artist.name} (similitud: {artist_similarity:.2f})")
+                logger.debug("   ✓ Artista mantenido: %s (similitud: %.2f)", artist.name, artist_similarity)
             else:
-                print(f"   ✗ Artista filtrado: {artist.name} (similitud: {artist_similarity:.2f})")
+                logger.debug("   ✗ Artista filtrado: %s (similitud: %.2f)", artist.name, artist_similarity)
         
         # Filtrar canciones
         for track in results.get("tracks", []):
@@ -1525,7 +1675,7 @@ Responde ahora de forma natural y conversacional:"""
                 artist_similarity >= SIMILARITY_THRESHOLD):
                 filtered["tracks"].append(track)
             else:
-                print(f"   ✗ Canción filtrada: {track.artist} - {track.title}")
+                logger.debug("   ✗ Canción filtrada: %s - %s", track.artist, track.title)
         
         return filtered
     
@@ -1576,13 +1726,11 @@ Responde ahora de forma natural y conversacional:"""
             if with_space_last not in variations:
                 variations.append(with_space_last)
         
-        print(f"🔍 Generadas {len(variations)} variaciones para '{search_term}'")
+        logger.debug("🔍 Generadas %s variaciones para '%s'", len(variations), search_term)
         return variations
     
     def _extract_artist_from_query(self, query: str) -> Optional[str]:
         """Extraer nombre de artista de consultas como 'que tengo de X'"""
-        import re
-        
         # Patrones para extraer artista
         patterns = [
             r'que tengo de (?:la |el |los |las )?([^?]+)',
@@ -1619,8 +1767,6 @@ Responde ahora de forma natural y conversacional:"""
         Returns:
             Término de búsqueda extraído
         """
-        import re
-        
         # Palabras a ignorar (stop words en español)
         stop_words = {
             'qué', 'que', 'cual', 'cuál', 'cuales', 'cuáles', 'cómo', 'como',
@@ -1658,7 +1804,7 @@ Responde ahora de forma natural y conversacional:"""
                 # Verificar que no sea solo stop words
                 words = result.lower().split()
                 if result and len(result) > 2 and not all(w in stop_words for w in words):
-                    print(f"🔍 Término extraído (patrón 'de'): '{result}'")
+                    logger.debug("🔍 Término extraído (patrón 'de'): '%s'", result)
                     return result
         
         # ESTRATEGIA 2: Buscar nombres propios (palabras con mayúsculas)
@@ -1673,7 +1819,7 @@ Responde ahora de forma natural y conversacional:"""
             
             if filtered_matches:
                 result = ' '.join(filtered_matches)
-                print(f"🔍 Término extraído (mayúsculas filtradas): '{result}'")
+                logger.debug("🔍 Término extraído (mayúsculas filtradas): '%s'", result)
                 return result
         
         # ESTRATEGIA 3: Buscar después de palabras clave específicas
@@ -1689,7 +1835,7 @@ Responde ahora de forma natural y conversacional:"""
                 # Limpiar stop words
                 result = re.sub(r'\s+(de|en|mi|tu|la|el|los|las)$', '', result, flags=re.IGNORECASE)
                 if result and len(result) > 2:
-                    print(f"🔍 Término extraído (keywords): '{result}'")
+                    logger.debug("🔍 Término extraído (keywords): '%s'", result)
                     return result
         
         # Limpiar la query de signos de puntuación
@@ -1704,7 +1850,7 @@ Responde ahora de forma natural y conversacional:"""
         # Unir las palabras significativas
         result = ' '.join(meaningful_words)
         
-        print(f"🔍 Término extraído (filtrado): '{result}'")
+        logger.debug("🔍 Término extraído (filtrado): '%s'", result)
         return result if result else query
     
     async def _search_genre_with_musicbrainz(
@@ -1727,7 +1873,7 @@ Responde ahora de forma natural y conversacional:"""
             
             # Extraer artistas únicos
             unique_artists = list(set([track.artist for track in library_tracks if track.artist]))
-            print(f"      Total de artistas en biblioteca: {len(unique_artists)}")
+            logger.debug("      Total de artistas en biblioteca: %s", len(unique_artists))
             
             # Preparar filtros
             filters = {"genre": genre}
@@ -1752,7 +1898,7 @@ Responde ahora de forma natural y conversacional:"""
             
             # Extraer nombres de artistas que coinciden
             matching_artist_names = set([a["name"].lower() for a in mb_data["artists"]])
-            print(f"      ✅ Artistas coincidentes: {list(matching_artist_names)}")
+            logger.debug("      ✅ Artistas coincidentes: %s", list(matching_artist_names))
             
             # Buscar en Navidrome los artistas verificados
             results = {"tracks": [], "albums": [], "artists": []}
@@ -1783,7 +1929,7 @@ Responde ahora de forma natural y conversacional:"""
             }
             
         except Exception as e:
-            print(f"      ❌ Error en búsqueda MusicBrainz: {e}")
+            logger.error("      ❌ Error en búsqueda MusicBrainz: %s", e)
             return {
                 "results": {"tracks": [], "albums": [], "artists": []},
                 "offset": offset,
@@ -1809,7 +1955,7 @@ Responde ahora de forma natural y conversacional:"""
         cached = self._get_cache(cache_key, ttl_seconds=3600)  # 1 hora
         
         if cached:
-            print("⚡ Usando contexto mínimo en caché (1h)")
+            logger.debug("⚡ Usando contexto mínimo en caché (1h)")
             return cached
         
         context = {}
@@ -1820,9 +1966,9 @@ Responde ahora de forma natural y conversacional:"""
                 top_artists = await self.listenbrainz.get_top_artists(limit=3)
                 if top_artists:
                     context['top_artists'] = [a.name for a in top_artists]
-                    print(f"✅ Contexto mínimo obtenido: {len(top_artists)} top artistas")
+                    logger.debug("✅ Contexto mínimo obtenido: %s top artistas", len(top_artists))
         except Exception as e:
-            print(f"⚠️ Error obteniendo contexto mínimo: {e}")
+            logger.warning("⚠️ Error obteniendo contexto mínimo: %s", e)
         
         # Guardar en caché por 1 hora
         self._set_cache(cache_key, context, ttl_seconds=3600)
@@ -1845,7 +1991,7 @@ Responde ahora de forma natural y conversacional:"""
         cached = self._get_cache(cache_key, ttl_seconds=600)  # 10 minutos
         
         if cached:
-            print("⚡ Usando contexto enriquecido en caché (10min)")
+            logger.debug("⚡ Usando contexto enriquecido en caché (10min)")
             return {**base_context, **cached}
         
         enriched = dict(base_context)  # Copiar contexto base
@@ -1876,9 +2022,9 @@ Responde ahora de forma natural y conversacional:"""
                         f"{t.artist} - {t.name}" for t in results[1][:5]
                     ]
                 
-                print(f"✅ Contexto enriquecido obtenido: {len(enriched.get('top_artists', []))} top artistas, {len(enriched.get('recent_tracks', []))} tracks recientes")
+                logger.debug("✅ Contexto enriquecido obtenido: %s top artistas, %s tracks recientes", len(enriched.get('top_artists', [])), len(enriched.get('recent_tracks', [])))
         except Exception as e:
-            print(f"⚠️ Error obteniendo contexto enriquecido: {e}")
+            logger.warning("⚠️ Error obteniendo contexto enriquecido: %s", e)
         
         # Guardar en caché por 10 minutos
         cache_data = {k: v for k, v in enriched.items() if k not in base_context}
@@ -1904,7 +2050,7 @@ Responde ahora de forma natural y conversacional:"""
         cached = self._get_cache(cache_key, ttl_seconds=300)  # 5 minutos
         
         if cached:
-            print("⚡ Usando contexto completo en caché (5min)")
+            logger.debug("⚡ Usando contexto completo en caché (5min)")
             return {**base_context, **cached}
         
         full = dict(base_context)  # Copiar contexto base
@@ -1949,9 +2095,9 @@ Responde ahora de forma natural y conversacional:"""
                 if len(results) > 2 and not isinstance(results[2], Exception) and results[2]:
                     full['stats'] = results[2]
                 
-                print(f"✅ Contexto completo obtenido: {len(full.get('top_artists', []))} top artistas, {len(full.get('recent_tracks', []))} tracks recientes")
+                logger.debug("✅ Contexto completo obtenido: %s top artistas, %s tracks recientes", len(full.get('top_artists', [])), len(full.get('recent_tracks', [])))
         except Exception as e:
-            print(f"⚠️ Error obteniendo contexto completo: {e}")
+            logger.warning("⚠️ Error obteniendo contexto completo: %s", e)
         
         # Guardar en caché por 5 minutos
         cache_data = {k: v for k, v in full.items() if k not in base_context}
@@ -1976,7 +2122,7 @@ Responde ahora de forma natural y conversacional:"""
             Diccionario con información de la playlist creada o None si falla
         """
         try:
-            print(f"🎵 Creando playlist en Navidrome para: {user_question}")
+            logger.debug("🎵 Creando playlist en Navidrome para: %s", user_question)
             
             # Extraer nombre de la playlist de la consulta
             playlist_name = self._extract_playlist_name(user_question)
@@ -1985,19 +2131,19 @@ Responde ahora de forma natural y conversacional:"""
             song_ids = await self._extract_song_ids_from_context(data_context)
             
             if not song_ids:
-                print("⚠️ No se encontraron canciones para la playlist")
+                logger.warning("⚠️ No se encontraron canciones para la playlist")
                 return None
             
             # Limitar a 50 canciones máximo (límite de Navidrome)
             if len(song_ids) > 50:
                 song_ids = song_ids[:50]
-                print(f"⚠️ Limitando playlist a 50 canciones (tenías {len(song_ids)})")
+                logger.warning("⚠️ Limitando playlist a 50 canciones (tenías %s)", len(song_ids))
             
             # Crear playlist en Navidrome
             playlist_id = await self.navidrome.create_playlist(playlist_name, song_ids)
             
             if playlist_id:
-                print(f"✅ Playlist creada exitosamente: {playlist_name} (ID: {playlist_id})")
+                logger.debug("✅ Playlist creada exitosamente: %s (ID: %s)", playlist_name, playlist_id)
                 return {
                     "id": playlist_id,
                     "name": playlist_name,
@@ -2005,11 +2151,11 @@ Responde ahora de forma natural y conversacional:"""
                     "song_ids": song_ids
                 }
             else:
-                print("❌ No se pudo crear la playlist en Navidrome")
+                logger.error("❌ No se pudo crear la playlist en Navidrome")
                 return None
                 
         except Exception as e:
-            print(f"❌ Error creando playlist en Navidrome: {e}")
+            logger.error("❌ Error creando playlist en Navidrome: %s", e)
             return None
     
     def _extract_playlist_name(self, user_question: str) -> str:
@@ -2021,8 +2167,6 @@ Responde ahora de forma natural y conversacional:"""
         Returns:
             Nombre de la playlist
         """
-        import re
-        
         # Patrones para extraer nombre de playlist
         patterns = [
             r'playlist\s+(?:de\s+|con\s+|para\s+)?(.+?)(?:\s+\d+\s+canciones?)?$',
@@ -2060,11 +2204,13 @@ Responde ahora de forma natural y conversacional:"""
         Returns:
             Lista de IDs de canciones filtradas por relevancia
         """
-        song_ids = []
+        # dict como conjunto ordenado: len() cuenta canciones únicas y se
+        # conserva el orden de inserción
+        song_ids: Dict[str, None] = {}
         
         # Extraer criterios de la consulta para validación
         search_criteria = self._extract_search_criteria_from_context(data_context)
-        print(f"🎵 Criterios extraídos para validación: {search_criteria}")
+        logger.debug("🎵 Criterios extraídos para validación: %s", search_criteria)
         
         # PRIORIDAD 1: Resultados de búsqueda específica CON VALIDACIÓN
         if data_context.get("library", {}).get("search_results"):
@@ -2072,28 +2218,32 @@ Responde ahora de forma natural y conversacional:"""
             
             # Validar tracks de búsqueda específica
             if results.get("tracks"):
-                print(f"🎵 Validando {len(results['tracks'])} tracks de búsqueda específica...")
+                logger.debug("🎵 Validando %s tracks de búsqueda específica...", len(results['tracks']))
                 validated_tracks = await self._validate_tracks_against_criteria(results["tracks"], search_criteria)
                 
                 for track in validated_tracks:
                     if hasattr(track, 'id') and track.id:
-                        song_ids.append(track.id)
+                        song_ids[track.id] = None
                 
-                print(f"✅ {len(validated_tracks)} tracks validados de búsqueda específica")
+                logger.debug("✅ %s tracks validados de búsqueda específica", len(validated_tracks))
             
             # Validar álbumes de búsqueda específica
             elif results.get("albums"):
-                print(f"🎵 Validando {len(results['albums'])} álbumes de búsqueda específica...")
+                logger.debug("🎵 Validando %s álbumes de búsqueda específica...", len(results['albums']))
                 for album in results["albums"][:5]:  # Limitar a 5 álbumes
+                    # Navidrome acepta 50 canciones por playlist: con eso basta,
+                    # no pedir las pistas del resto de álbumes
+                    if len(song_ids) >= 50:
+                        break
                     try:
                         album_tracks = await self.navidrome.get_album_tracks(album.id)
                         validated_tracks = await self._validate_tracks_against_criteria(album_tracks, search_criteria)
                         
                         for track in validated_tracks:
                             if hasattr(track, 'id') and track.id:
-                                song_ids.append(track.id)
+                                song_ids[track.id] = None
                     except Exception as e:
-                        print(f"⚠️ Error obteniendo tracks del álbum {album.name}: {e}")
+                        logger.warning("⚠️ Error obteniendo tracks del álbum %s: %s", album.name, e)
                         continue
         
         # PRIORIDAD 2: Datos filtrados por artista específico CON VALIDACIÓN
@@ -2102,27 +2252,27 @@ Responde ahora de forma natural y conversacional:"""
             tracks = filtered.get("tracks", [])
             
             if tracks:
-                print(f"🎵 Validando {len(tracks)} tracks filtrados por artista específico...")
+                logger.debug("🎵 Validando %s tracks filtrados por artista específico...", len(tracks))
                 validated_tracks = await self._validate_tracks_against_criteria(tracks, search_criteria)
                 
                 for track in validated_tracks:
                     if hasattr(track, 'id') and track.id:
-                        song_ids.append(track.id)
+                        song_ids[track.id] = None
                 
-                print(f"✅ {len(validated_tracks)} tracks validados de artista específico")
+                logger.debug("✅ %s tracks validados de artista específico", len(validated_tracks))
         
         # PRIORIDAD 3: Búsqueda inteligente por criterios si no hay resultados válidos
         if len(song_ids) < 5:  # Si tenemos menos de 5 canciones válidas
-            print("⚠️ Pocas canciones válidas encontradas, usando búsqueda inteligente...")
+            logger.warning("⚠️ Pocas canciones válidas encontradas, usando búsqueda inteligente...")
             
             intelligent_songs = await self._search_songs_by_criteria(search_criteria)
-            song_ids.extend(intelligent_songs)
+            song_ids.update(dict.fromkeys(intelligent_songs))
             
-            print(f"✅ Búsqueda inteligente agregó {len(intelligent_songs)} canciones adicionales")
+            logger.debug("✅ Búsqueda inteligente agregó %s canciones adicionales", len(intelligent_songs))
         
         # PRIORIDAD 4: Último recurso - datos generales con validación estricta
         if len(song_ids) < 3 and data_context.get("library", {}).get("complete_data", {}).get("tracks"):
-            print("⚠️ Usando datos generales como último recurso con validación estricta...")
+            logger.warning("⚠️ Usando datos generales como último recurso con validación estricta...")
             tracks = data_context["library"]["complete_data"]["tracks"]
             
             # Aplicar validación muy estricta
@@ -2130,20 +2280,12 @@ Responde ahora de forma natural y conversacional:"""
             
             for track in validated_tracks[:20]:  # Limitar a 20
                 if hasattr(track, 'id') and track.id:
-                    song_ids.append(track.id)
+                    song_ids[track.id] = None
             
-            print(f"✅ Validación estricta agregó {len(validated_tracks)} canciones")
+            logger.debug("✅ Validación estricta agregó %s canciones", len(validated_tracks))
         
-        # Eliminar duplicados manteniendo el orden
-        seen = set()
-        unique_song_ids = []
-        for song_id in song_ids:
-            if song_id not in seen:
-                seen.add(song_id)
-                unique_song_ids.append(song_id)
-        
-        print(f"🎵 Extraídos {len(unique_song_ids)} IDs de canciones relevantes para la playlist")
-        return unique_song_ids
+        logger.debug("🎵 Extraídos %s IDs de canciones relevantes para la playlist", len(song_ids))
+        return list(song_ids)
     
     async def _validate_tracks_against_criteria(self, tracks: List, criteria: Dict[str, Any], strict_mode: bool = False) -> List:
         """Validar tracks contra criterios específicos
@@ -2191,7 +2333,7 @@ Responde ahora de forma natural y conversacional:"""
             if is_valid and validation_score >= (80 if strict_mode else 60):
                 validated_tracks.append(track)
         
-        print(f"🎵 Validados {len(validated_tracks)} tracks de {len(tracks)} (modo {'estricto' if strict_mode else 'normal'})")
+        logger.debug("🎵 Validados %s tracks de %s (modo %s)", len(validated_tracks), len(tracks), 'estricto' if strict_mode else 'normal')
         return validated_tracks
     
     def _calculate_genre_score(self, track, genre: str, genre_patterns: List[str]) -> float:
@@ -2398,7 +2540,6 @@ Responde ahora de forma natural y conversacional:"""
                     break
             
             # Detectar años específicos
-            import re
             year_matches = re.findall(r'\b(19|20)\d{2}\b', search_term)
             if year_matches:
                 criteria["years"] = [int(year) for year in year_matches]
@@ -2438,7 +2579,6 @@ Responde ahora de forma natural y conversacional:"""
         mentioned_artists = []
         
         # Buscar patrones como "de [artista]", "por [artista]", "[artista]", etc.
-        import re
         
         # Patrones comunes para mencionar artistas
         patterns = [
@@ -2478,7 +2618,7 @@ Responde ahora de forma natural y conversacional:"""
         try:
             # PRIORIDAD 1: Buscar por artistas mencionados con validación inteligente
             if criteria.get("mentioned_artists"):
-                print(f"🎵 Validando artistas mencionados: {criteria['mentioned_artists']}")
+                logger.debug("🎵 Validando artistas mencionados: %s", criteria['mentioned_artists'])
                 
                 for artist_name in criteria["mentioned_artists"]:
                     try:
@@ -2486,23 +2626,23 @@ Responde ahora de forma natural y conversacional:"""
                         validation_result = await self._validate_artist_against_criteria(artist_name, criteria)
                         
                         if validation_result["is_relevant"]:
-                            print(f"✅ {artist_name}: RELEVANTE ({validation_result['confidence']:.1f}%) - {validation_result['reason']}")
+                            logger.debug("✅ %s: RELEVANTE (%.1f%%) - %s", artist_name, validation_result['confidence'], validation_result['reason'])
                             
                             # Buscar canciones del artista validado
                             artist_songs = await self._get_artist_songs_with_validation(artist_name, criteria, validation_result)
                             song_ids.extend(artist_songs)
                         else:
-                            print(f"❌ {artist_name}: NO RELEVANTE ({validation_result['confidence']:.1f}%) - {validation_result['reason']}")
+                            logger.error("❌ %s: NO RELEVANTE (%.1f%%) - %s", artist_name, validation_result['confidence'], validation_result['reason'])
                     
                     except Exception as e:
-                        print(f"⚠️ Error validando artista {artist_name}: {e}")
+                        logger.warning("⚠️ Error validando artista %s: %s", artist_name, e)
                         continue
             
             # PRIORIDAD 2: Búsqueda inteligente por género usando MusicBrainz
             if len(song_ids) < 15:  # Si necesitamos más canciones
                 genre = criteria.get("genre")
                 if genre:
-                    print(f"🎵 Búsqueda inteligente por género '{genre}' usando MusicBrainz...")
+                    logger.debug("🎵 Búsqueda inteligente por género '%s' usando MusicBrainz...", genre)
                     intelligent_songs = await self._find_genre_artists_intelligently(genre, criteria)
                     song_ids.extend(intelligent_songs)
             
@@ -2510,12 +2650,12 @@ Responde ahora de forma natural y conversacional:"""
             if len(song_ids) < 10:
                 search_term = criteria.get("search_term", "")
                 if search_term:
-                    print(f"🎵 Búsqueda general con término: '{search_term}'")
+                    logger.debug("🎵 Búsqueda general con término: '%s'", search_term)
                     general_songs = await self._search_general_term(search_term, criteria)
                     song_ids.extend(general_songs)
         
         except Exception as e:
-            print(f"⚠️ Error en búsqueda por criterios: {e}")
+            logger.warning("⚠️ Error en búsqueda por criterios: %s", e)
         
         return song_ids
     
@@ -2584,7 +2724,7 @@ Responde ahora de forma natural y conversacional:"""
                     validation_result.update(heuristic_result)
         
         except Exception as e:
-            print(f"⚠️ Error validando artista {artist_name}: {e}")
+            logger.warning("⚠️ Error validando artista %s: %s", artist_name, e)
             validation_result["reason"] = f"Error en validación: {str(e)}"
         
         return validation_result
@@ -2678,7 +2818,7 @@ Responde ahora de forma natural y conversacional:"""
             
             if artist_results.get("tracks"):
                 tracks = artist_results["tracks"]
-                print(f"🎵 Encontradas {len(tracks)} canciones de {artist_name}")
+                logger.debug("🎵 Encontradas %s canciones de %s", len(tracks), artist_name)
                 
                 # Aplicar filtrado inteligente
                 filtered_tracks = self._filter_tracks_by_criteria(tracks, criteria)
@@ -2689,7 +2829,7 @@ Responde ahora de forma natural y conversacional:"""
             
             elif artist_results.get("albums"):
                 albums = artist_results["albums"]
-                print(f"🎵 Encontrados {len(albums)} álbumes de {artist_name}")
+                logger.debug("🎵 Encontrados %s álbumes de %s", len(albums), artist_name)
                 
                 # Obtener tracks de álbumes
                 for album in albums[:3]:
@@ -2701,11 +2841,11 @@ Responde ahora de forma natural y conversacional:"""
                             if hasattr(track, 'id') and track.id:
                                 song_ids.append(track.id)
                     except Exception as e:
-                        print(f"⚠️ Error obteniendo tracks del álbum {album.name}: {e}")
+                        logger.warning("⚠️ Error obteniendo tracks del álbum %s: %s", album.name, e)
                         continue
         
         except Exception as e:
-            print(f"⚠️ Error obteniendo canciones de {artist_name}: {e}")
+            logger.warning("⚠️ Error obteniendo canciones de %s: %s", artist_name, e)
         
         return song_ids
     
@@ -2737,12 +2877,12 @@ Responde ahora de forma natural y conversacional:"""
                     additional_filters["year_to"] = year_max
                 
                 # Obtener artistas de la biblioteca
-                print(f"🎵 Obteniendo artistas de la biblioteca para validar género '{genre}'...")
+                logger.debug("🎵 Obteniendo artistas de la biblioteca para validar género '%s'...", genre)
                 library_artists = await self.navidrome.get_artists(limit=1000)
                 
                 if library_artists:
                     artist_names = [artist.name for artist in library_artists if hasattr(artist, 'name')]
-                    print(f"🎵 Validando {len(artist_names)} artistas contra género '{genre}'...")
+                    logger.debug("🎵 Validando %s artistas contra género '%s'...", len(artist_names), genre)
                     
                     # Usar MusicBrainz para encontrar artistas que coincidan con el género
                     matching_artists_data = await self.musicbrainz.find_matching_artists_in_library(
@@ -2753,7 +2893,7 @@ Responde ahora de forma natural y conversacional:"""
                     
                     if matching_artists_data:
                         matching_artist_names = set([a["name"].lower() for a in matching_artists_data])
-                        print(f"🎵 Artistas validados para '{genre}': {list(matching_artist_names)}")
+                        logger.debug("🎵 Artistas validados para '%s': %s", genre, list(matching_artist_names))
                         
                         # Buscar canciones de estos artistas validados
                         for artist_name in matching_artist_names:
@@ -2779,19 +2919,19 @@ Responde ahora de forma natural y conversacional:"""
                                                 if hasattr(track, 'id') and track.id:
                                                     song_ids.append(track.id)
                                         except Exception as e:
-                                            print(f"⚠️ Error obteniendo tracks del álbum {album.name}: {e}")
+                                            logger.warning("⚠️ Error obteniendo tracks del álbum %s: %s", album.name, e)
                                             continue
                             
                             except Exception as e:
-                                print(f"⚠️ Error buscando canciones de {artist_name}: {e}")
+                                logger.warning("⚠️ Error buscando canciones de %s: %s", artist_name, e)
                                 continue
                         
-                        print(f"🎵 Encontradas {len(song_ids)} canciones de género '{genre}' usando MusicBrainz")
+                        logger.debug("🎵 Encontradas %s canciones de género '%s' usando MusicBrainz", len(song_ids), genre)
                     else:
-                        print(f"🎵 No se encontraron artistas de género '{genre}' en la biblioteca")
+                        logger.debug("🎵 No se encontraron artistas de género '%s' en la biblioteca", genre)
         
         except Exception as e:
-            print(f"⚠️ Error en búsqueda inteligente por género: {e}")
+            logger.warning("⚠️ Error en búsqueda inteligente por género: %s", e)
         
         return song_ids
     
@@ -2812,7 +2952,7 @@ Responde ahora de forma natural y conversacional:"""
             
             if search_results.get("tracks"):
                 tracks = search_results["tracks"]
-                print(f"🎵 Encontrados {len(tracks)} tracks en búsqueda general")
+                logger.debug("🎵 Encontrados %s tracks en búsqueda general", len(tracks))
                 
                 # Filtrar por criterios
                 filtered_tracks = self._filter_tracks_by_criteria(tracks, criteria)
@@ -2823,7 +2963,7 @@ Responde ahora de forma natural y conversacional:"""
             
             elif search_results.get("albums"):
                 albums = search_results["albums"]
-                print(f"🎵 Encontrados {len(albums)} álbumes en búsqueda general")
+                logger.debug("🎵 Encontrados %s álbumes en búsqueda general", len(albums))
                 
                 for album in albums[:5]:
                     try:
@@ -2834,11 +2974,11 @@ Responde ahora de forma natural y conversacional:"""
                             if hasattr(track, 'id') and track.id:
                                 song_ids.append(track.id)
                     except Exception as e:
-                        print(f"⚠️ Error obteniendo tracks del álbum {album.name}: {e}")
+                        logger.warning("⚠️ Error obteniendo tracks del álbum %s: %s", album.name, e)
                         continue
         
         except Exception as e:
-            print(f"⚠️ Error en búsqueda general: {e}")
+            logger.warning("⚠️ Error en búsqueda general: %s", e)
         
         return song_ids
     
@@ -2949,7 +3089,7 @@ Responde ahora de forma natural y conversacional:"""
             
             filtered_tracks.append(track)
         
-        print(f"🎵 Filtrados {len(filtered_tracks)} tracks de {len(tracks)} por criterios específicos")
+        logger.debug("🎵 Filtrados %s tracks de %s por criterios específicos", len(filtered_tracks), len(tracks))
         return filtered_tracks
     
     def _filter_tracks_by_relevance(self, tracks: List, criteria: Dict[str, Any]) -> List:
@@ -2968,14 +3108,15 @@ Responde ahora de forma natural y conversacional:"""
         # Aplicar filtros básicos si es posible
         return self._filter_tracks_by_criteria(tracks, criteria)
 
+    def _own(self, service):
+        self._owned_clients.append(service)
+        return service
+
     async def close(self):
-        """Cerrar todas las conexiones"""
+        """Cerrar las conexiones propias (los servicios inyectados los cierra su dueño)"""
         try:
-            await self.navidrome.close()
-            if self.listenbrainz:
-                await self.listenbrainz.close()
-            if self.musicbrainz:
-                await self.musicbrainz.close()
+            for service in self._owned_clients:
+                await service.close()
         except Exception as e:
-            print(f"Error cerrando conexiones: {e}")
+            logger.debug("Error cerrando conexiones: %s", e)
 
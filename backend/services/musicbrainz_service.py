@@ -2,10 +2,40 @@ import httpx
 import os
 import asyncio
 import json
+import logging
+import re
 import time
+import unicodedata
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 
+from services import json_utils
+
+logger = logging.getLogger(__name__)
+
+# Entradas guardadas por artista en el cache de álbumes/canciones top
+_TOP_CACHE_SIZE = 25
+
+
+def _normalize_name(name: str) -> str:
+    """Nombre de artista comparable: minúsculas, sin acentos ni puntuación"""
+    nfd = unicodedata.normalize('NFD', (name or "").lower())
+    normalized = ''.join(c for c in nfd if unicodedata.category(c) != 'Mn')
+    return re.sub(r'\s+', ' ', re.sub(r'[^\w\s]', '', normalized)).strip()
+
+
+def _credit_name(entity: Dict[str, Any]) -> str:
+    """Artista principal (normalizado) del artist-credit de un resultado"""
+    credit = entity.get("artist-credit") or [{}]
+    return _normalize_name(credit[0].get("artist", {}).get("name", ""))
+
+
+def _lucene_phrase(text: str) -> str:
+    """Escapa un texto para usarlo entre comillas en una query de MusicBrainz"""
+    return text.replace('\\', '\\\\').replace('"', '\\"')
+
+
 class MusicBrainzService:
     """Servicio para enriquecer y verificar metadatos usando MusicBrainz
     
@@ -37,8 +67,9 @@ class MusicBrainzService:
             self._load_cache()
             MusicBrainzService._cache_loaded = True
         
-        # Rate limiting: última petición
+        # Rate limiting: última petición y turno entre peticiones concurrentes
         self._last_request_time = 0
+        self._rate_lock = asyncio.Lock()
     
     def _load_cache(self):
         """Cargar cache desde archivo"""
@@ -50,39 +81,51 @@ class MusicBrainzService:
                     last_updated = data.get('last_updated', 0)
                     if last_updated:
                         age_hours = (time.time() - last_updated) / 3600
-                        print(f"✅ Cache MusicBrainz cargado: {len(MusicBrainzService._persistent_cache)} artistas (actualizado hace {age_hours:.1f}h)")
+                        logger.debug("✅ Cache MusicBrainz cargado: %s artistas (actualizado hace %.1fh)", len(MusicBrainzService._persistent_cache), age_hours)
                     else:
-                        print(f"✅ Cache MusicBrainz cargado: {len(MusicBrainzService._persistent_cache)} artistas")
+                        logger.debug("✅ Cache MusicBrainz cargado: %s artistas", len(MusicBrainzService._persistent_cache))
             else:
                 MusicBrainzService._persistent_cache = {}
-                print("📝 Cache MusicBrainz inicializado vacío (primera vez)")
+                logger.debug("📝 Cache MusicBrainz inicializado vacío (primera vez)")
         except Exception as e:
-            print(f"⚠️ Error cargando cache MusicBrainz: {e}")
+            logger.warning("⚠️ Error cargando cache MusicBrainz: %s", e)
             MusicBrainzService._persistent_cache = {}
     
-    def _save_cache(self):
-        """Guardar cache en archivo"""
+    async def _save_cache(self):
+        """Guardar cache en archivo
+        
+        La limpieza y la copia del dict se hacen en el event loop (los handlers
+        concurrentes siguen escribiendo en el cache compartido); solo la
+        serialización y escritura de esa copia van a un hilo.
+        """
         try:
-            # Crear directorio si no existe
-            MusicBrainzService._CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
-            
             # Limpiar entradas expiradas antes de guardar
             expired_count = self._clean_expired_cache()
             
             data = {
-                'cache': MusicBrainzService._persistent_cache,
+                'cache': dict(MusicBrainzService._persistent_cache),
                 'last_updated': time.time()
             }
             
-            with open(MusicBrainzService._CACHE_FILE, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            await asyncio.to_thread(self._write_cache_file, data)
             
             if expired_count > 0:
-                print(f"💾 Cache MusicBrainz guardado: {len(MusicBrainzService._persistent_cache)} artistas ({expired_count} expiradas limpiadas)")
+                logger.debug("💾 Cache MusicBrainz guardado: %s artistas (%s expiradas limpiadas)", len(MusicBrainzService._persistent_cache), expired_count)
             else:
-                print(f"💾 Cache MusicBrainz guardado: {len(MusicBrainzService._persistent_cache)} artistas")
+                logger.debug("💾 Cache MusicBrainz guardado: %s artistas", len(MusicBrainzService._persistent_cache))
         except Exception as e:
-            print(f"⚠️ Error guardando cache MusicBrainz: {e}")
+            logger.warning("⚠️ Error guardando cache MusicBrainz: %s", e)
+    
+    @staticmethod
+    def _write_cache_file(data: Dict[str, Any]) -> None:
+        """Escribe el cache en un temporal y lo renombra: un fallo a mitad de
+        escritura no deja vacío el archivo anterior"""
+        cache_file = MusicBrainzService._CACHE_FILE
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(cache_file.name + ".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, cache_file)
     
     def _clean_expired_cache(self) -> int:
         """Eliminar entradas del cache que han expirado
@@ -107,7 +150,7 @@ class MusicBrainzService:
             del MusicBrainzService._persistent_cache[key]
         
         if expired_keys:
-            print(f"🧹 Limpiadas {len(expired_keys)} entradas expiradas del cache")
+            logger.debug("🧹 Limpiadas %s entradas expiradas del cache", len(expired_keys))
         
         return len(expired_keys)
     
@@ -147,15 +190,18 @@ class MusicBrainzService:
         }
     
     async def _rate_limit(self):
-        """Asegurar que respetamos el rate limit de MusicBrainz (1 req/seg)"""
-        import time
-        current_time = time.time()
-        time_since_last = current_time - self._last_request_time
+        """Asegurar que respetamos el rate limit de MusicBrainz (1 req/seg)
         
-        if time_since_last < 1.1:  # 1.1 seg para estar seguros
-            await asyncio.sleep(1.1 - time_since_last)
-        
-        self._last_request_time = time.time()
+        Serializado con un lock: con varias consultas concurrentes cada una
+        espera su turno en lugar de dormir lo mismo y salir todas a la vez.
+        """
+        async with self._rate_lock:
+            time_since_last = time.time() - self._last_request_time
+            
+            if time_since_last < 1.1:  # 1.1 seg para estar seguros
+                await asyncio.sleep(1.1 - time_since_last)
+            
+            self._last_request_time = time.time()
     
     async def find_matching_artists_in_library(
         self,
@@ -196,7 +242,7 @@ class MusicBrainzService:
             # Verificar límite máximo total
             max_total = int(os.getenv("MUSICBRAINZ_MAX_TOTAL", "100"))
             if offset >= max_total:
-                print(f"   ⚠️ Límite máximo alcanzado ({max_total} artistas)")
+                logger.warning("   ⚠️ Límite máximo alcanzado (%s artistas)", max_total)
                 return {
                     "artists": [],
                     "offset": offset,
@@ -211,9 +257,9 @@ class MusicBrainzService:
             end_index = min(offset + max_artists, len(library_artists), max_total)
             artists_to_check = library_artists[offset:end_index]
             
-            print(f"🔍 MusicBrainz: Verificando artistas {offset+1} a {end_index} de {len(library_artists)}...")
-            print(f"   Filtros: {filters}")
-            print(f"   Batch size: {max_artists}")
+            logger.debug("🔍 MusicBrainz: Verificando artistas %s a %s de %s...", offset+1, end_index, len(library_artists))
+            logger.debug("   Filtros: %s", filters)
+            logger.debug("   Batch size: %s", max_artists)
             
             matching_artists = []
             checked_count = 0
@@ -241,27 +287,27 @@ class MusicBrainzService:
                         "name": artist_name,
                         "mb_data": verification
                     })
-                    print(f"   ✅ [{offset+i+1}/{len(library_artists)}] {artist_name} - CUMPLE")
+                    logger.debug("   ✅ [%s/%s] %s - CUMPLE", offset+i+1, len(library_artists), artist_name)
                 else:
-                    print(f"   ❌ [{offset+i+1}/{len(library_artists)}] {artist_name} - no cumple")
+                    logger.debug("   ❌ [%s/%s] %s - no cumple", offset+i+1, len(library_artists), artist_name)
                 
                 # Mostrar progreso cada 10 artistas
                 if (i + 1) % 10 == 0:
-                    print(f"   📊 Progreso: {offset+i+1}/{len(library_artists)} verificados, {len(matching_artists)} coinciden")
-                    print(f"      💾 Cache: {cache_hits} hits | 🌐 API: {api_requests} requests")
+                    logger.debug("   📊 Progreso: %s/%s verificados, %s coinciden", offset+i+1, len(library_artists), len(matching_artists))
+                    logger.debug("      💾 Cache: %s hits | 🌐 API: %s requests", cache_hits, api_requests)
             
             has_more = end_index < len(library_artists) and end_index < max_total
-            print(f"✅ MusicBrainz: {len(matching_artists)}/{checked_count} artistas cumplen los filtros")
-            print(f"   💾 Cache usado: {cache_hits}/{checked_count} artistas ({cache_hits/checked_count*100:.0f}%)")
-            print(f"   🌐 API requests: {api_requests}/{checked_count} artistas ({api_requests/checked_count*100:.0f}%)")
+            logger.debug("✅ MusicBrainz: %s/%s artistas cumplen los filtros", len(matching_artists), checked_count)
+            logger.debug("   💾 Cache usado: %s/%s artistas (%.0f%%)", cache_hits, checked_count, cache_hits/checked_count*100)
+            logger.debug("   🌐 API requests: %s/%s artistas (%.0f%%)", api_requests, checked_count, api_requests/checked_count*100)
             
             # Guardar cache ahora si hay nuevas entradas
             if api_requests > 0:
-                self._save_cache()
-                print(f"   💾 Cache guardado en disco ({len(MusicBrainzService._persistent_cache)} artistas total)")
+                await self._save_cache()
+                logger.debug("   💾 Cache guardado en disco (%s artistas total)", len(MusicBrainzService._persistent_cache))
             if has_more:
                 remaining = min(len(library_artists) - end_index, max_total - end_index)
-                print(f"💡 Quedan {remaining} artistas por verificar. Di 'busca más' para continuar")
+                logger.debug("💡 Quedan %s artistas por verificar. Di 'busca más' para continuar", remaining)
             
             return {
                 "artists": matching_artists,
@@ -273,9 +319,7 @@ class MusicBrainzService:
             }
             
         except Exception as e:
-            print(f"❌ Error en búsqueda inversa de MusicBrainz: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error en búsqueda inversa de MusicBrainz: %s", e)
             return {
                 "artists": [],
                 "offset": offset,
@@ -320,10 +364,10 @@ class MusicBrainzService:
             
             if cached_data:
                 artist_info = cached_data
-                print(f"   💾 CACHE HIT: {artist_name} (datos cacheados)")
+                logger.debug("   💾 CACHE HIT: %s (datos cacheados)", artist_name)
             else:
                 # Buscar artista
-                print(f"   🌐 API REQUEST: {artist_name} (consultando MusicBrainz...)")
+                logger.debug("   🌐 API REQUEST: %s (consultando MusicBrainz...)", artist_name)
                 artist_info = await self._search_and_get_artist(artist_name)
                 
                 if not artist_info or not artist_info.get("found"):
@@ -460,7 +504,7 @@ class MusicBrainzService:
             return result
             
         except Exception as e:
-            print(f"⚠️ Error verificando '{artist_name}': {e}")
+            logger.warning("⚠️ Error verificando '%s': %s", artist_name, e)
             return {
                 "found": False,
                 "matches": False,
@@ -498,7 +542,7 @@ class MusicBrainzService:
             )
             
             if not details or not isinstance(details, dict) or "id" not in details:
-                print(f"   ⚠️ MusicBrainz no devolvió detalles válidos para '{artist_name}'")
+                logger.warning("   ⚠️ MusicBrainz no devolvió detalles válidos para '%s'", artist_name)
                 return {"found": False}
             
             # Extraer géneros con manejo seguro
@@ -508,14 +552,14 @@ class MusicBrainzService:
                 if not genres:  # Fallback a tags
                     genres = [t.get("name") for t in details.get("tags", [])[:5] if isinstance(t, dict) and t.get("name")]
             except Exception as e:
-                print(f"   ⚠️ Error extrayendo géneros para '{artist_name}': {e}")
+                logger.warning("   ⚠️ Error extrayendo géneros para '%s': %s", artist_name, e)
             
             # Extraer todos los tags con manejo seguro
             tags = []
             try:
                 tags = [t.get("name") for t in details.get("tags", []) if isinstance(t, dict) and t.get("name")]
             except Exception as e:
-                print(f"   ⚠️ Error extrayendo tags para '{artist_name}': {e}")
+                logger.warning("   ⚠️ Error extrayendo tags para '%s': %s", artist_name, e)
             
             # Extraer area de forma segura
             area_name = None
@@ -553,7 +597,7 @@ class MusicBrainzService:
             }
             
         except Exception as e:
-            print(f"Error en búsqueda de artista: {e}")
+            logger.debug("Error en búsqueda de artista: %s", e)
             return {"found": False, "error": str(e)}
     
     async def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict[str, Any]:
@@ -569,10 +613,10 @@ class MusicBrainzService:
                 params=request_params
             )
             response.raise_for_status()
-            return response.json()
+            return json_utils.loads(response.content)
             
         except Exception as e:
-            print(f"❌ Error en petición MusicBrainz ({endpoint}): {e}")
+            logger.error("❌ Error en petición MusicBrainz (%s): %s", endpoint, e)
             return {}
     
     async def get_latest_releases_by_artist(
@@ -593,9 +637,6 @@ class MusicBrainzService:
             Lista de releases ordenados por fecha (más reciente primero)
         """
         try:
-            import logging
-            logger = logging.getLogger(__name__)
-            
             logger.info(f"🔍 Buscando últimos {limit} releases de '{artist_name}'...")
             
             # Búsqueda simple por artista con ordenamiento por fecha
@@ -660,9 +701,7 @@ class MusicBrainzService:
             return latest_releases
             
         except Exception as e:
-            logger.error(f"❌ Error obteniendo releases de '{artist_name}': {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error obteniendo releases de '%s': %s", artist_name, e)
             return []
     
     async def get_recent_releases_for_artists(
@@ -684,11 +723,6 @@ class MusicBrainzService:
             Lista de releases de esos artistas específicos
         """
         try:
-            from datetime import datetime, timedelta
-            import logging
-            import os
-            logger = logging.getLogger(__name__)
-            
             # Calcular rango de fechas
             end_date = datetime.now()
             start_date = end_date - timedelta(days=days)
@@ -775,9 +809,7 @@ class MusicBrainzService:
             return all_releases
             
         except Exception as e:
-            logger.error(f"❌ Error obteniendo releases de artistas: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error obteniendo releases de artistas: %s", e)
             return []
     
     async def get_all_recent_releases(self, days: int = 30) -> List[Dict[str, Any]]:
@@ -793,11 +825,6 @@ class MusicBrainzService:
             Lista de releases con información completa
         """
         try:
-            from datetime import datetime, timedelta
-            import logging
-            import os
-            logger = logging.getLogger(__name__)
-            
             # Calcular rango de fechas
             end_date = datetime.now()
             start_date = end_date - timedelta(days=days)
@@ -886,9 +913,7 @@ class MusicBrainzService:
             return all_releases
             
         except Exception as e:
-            print(f"❌ Error obteniendo releases recientes: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error obteniendo releases recientes: %s", e)
             return []
     
     def match_releases_with_library(
@@ -908,9 +933,6 @@ class MusicBrainzService:
         Returns:
             Lista de releases que coinciden con la biblioteca
         """
-        import unicodedata
-        import re
-        
         def normalize_artist_name(name: str) -> str:
             """Normalizar nombre de artista para comparación
             
@@ -951,9 +973,6 @@ class MusicBrainzService:
             if normalized not in library_name_map:
                 library_name_map[normalized] = original
         
-        import logging
-        logger = logging.getLogger(__name__)
-        
         logger.info(f"📚 Artistas en biblioteca: {len(library_names)}")
         logger.info(f"🔍 Releases a verificar: {len(recent_releases)}")
         
@@ -1009,14 +1028,14 @@ class MusicBrainzService:
             Diccionario agrupado por tipo de relación con artistas relacionados
         """
         try:
-            print(f"🔍 Buscando relaciones de '{artist_name}'...")
+            logger.debug("🔍 Buscando relaciones de '%s'...", artist_name)
             
             # Buscar el artista primero
             await self._rate_limit()
             artist_data = await self._search_and_get_artist(artist_name)
             
             if not artist_data.get("found"):
-                print(f"   ⚠️ Artista '{artist_name}' no encontrado")
+                logger.warning("   ⚠️ Artista '%s' no encontrado", artist_name)
                 return {}
             
             artist_id = artist_data.get("id")
@@ -1059,13 +1078,11 @@ class MusicBrainzService:
                     "url": f"https://musicbrainz.org/artist/{related_artist.get('id')}"
                 })
             
-            print(f"✅ Encontradas {sum(len(v) for v in grouped_relations.values())} relaciones")
+            logger.debug("✅ Encontradas %s relaciones", sum(len(v) for v in grouped_relations.values()))
             return grouped_relations
             
         except Exception as e:
-            print(f"❌ Error obteniendo relaciones: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error obteniendo relaciones: %s", e)
             return {}
     
     async def discover_similar_artists(
@@ -1091,9 +1108,6 @@ class MusicBrainzService:
             Lista de artistas similares ordenados por relevancia
         """
         try:
-            import logging
-            logger = logging.getLogger(__name__)
-            
             logger.info(f"🔍 Buscando artistas similares a '{artist_name}' en biblioteca...")
             
             # Obtener metadata del artista de referencia
@@ -1195,9 +1209,7 @@ class MusicBrainzService:
             return result
             
         except Exception as e:
-            logger.error(f"❌ Error descubriendo artistas similares: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error descubriendo artistas similares: %s", e)
             return []
     
     async def find_similar_by_tags(
@@ -1218,9 +1230,6 @@ class MusicBrainzService:
             Lista de artistas similares
         """
         try:
-            import logging
-            logger = logging.getLogger(__name__)
-            
             logger.info(f"🔍 Buscando artistas similares globalmente a '{artist_name}'...")
             
             # Obtener metadata del artista de referencia
@@ -1292,11 +1301,113 @@ class MusicBrainzService:
             return similar_artists
             
         except Exception as e:
-            logger.error(f"❌ Error buscando similares por tags: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error buscando similares por tags: %s", e)
             return []
     
+    async def get_artist_top_albums(
+        self,
+        artist_name: str,
+        limit: int = 5
+    ) -> List[Dict[str, Any]]:
+        """Obtener los álbumes más relevantes de un artista
+        
+        MusicBrainz no tiene escuchas: se usa como popularidad el número de
+        ediciones (releases) de cada release group, que crece con reediciones
+        y remasterizaciones. Una sola búsqueda, cacheada en el cache persistente.
+        
+        Args:
+            artist_name: Nombre del artista
+            limit: Número de álbumes a obtener
+        
+        Returns:
+            Lista de álbumes (name, artist, year, playcount, mbid, url) ordenada
+            por número de ediciones
+        """
+        cache_key = f"top_albums:{artist_name.lower()}"
+        cached = self._get_from_cache(cache_key)
+        if cached is not None:
+            return cached.get("albums", [])[:limit]
+        
+        await self._rate_limit()
+        data = await self._make_request(
+            "release-group",
+            {
+                "query": f'artist:"{_lucene_phrase(artist_name)}" AND primarytype:album AND status:official',
+                "limit": 100
+            }
+        )
+        
+        target = _normalize_name(artist_name)
+        albums = []
+        for rg in data.get("release-groups", []):
+            # Solo álbumes de estudio del propio artista (sin directos ni recopilatorios)
+            if rg.get("secondary-types") or _credit_name(rg) != target:
+                continue
+            albums.append({
+                "name": rg.get("title"),
+                "artist": artist_name,
+                "year": (rg.get("first-release-date") or "")[:4] or None,
+                "playcount": rg.get("count") or len(rg.get("releases", [])),
+                "mbid": rg.get("id"),
+                "url": f"https://musicbrainz.org/release-group/{rg.get('id')}"
+            })
+        albums.sort(key=lambda a: a["playcount"], reverse=True)
+        
+        # Un fallo de red devuelve {}: solo se cachean respuestas reales
+        if data:
+            self._save_to_cache(cache_key, {"albums": albums[:_TOP_CACHE_SIZE]})
+        return albums[:limit]
+    
+    async def get_artist_top_tracks(
+        self,
+        artist_name: str,
+        limit: int = 5
+    ) -> List[Dict[str, Any]]:
+        """Obtener las canciones más relevantes de un artista
+        
+        Como popularidad se usa en cuántas ediciones aparece cada canción
+        (sumando las grabaciones con el mismo título): los éxitos salen en
+        singles, recopilatorios y directos. Una sola búsqueda, cacheada.
+        
+        Returns:
+            Lista de canciones (name, artist, playcount, mbid, url) ordenada por
+            número de apariciones
+        """
+        cache_key = f"top_tracks:{artist_name.lower()}"
+        cached = self._get_from_cache(cache_key)
+        if cached is not None:
+            return cached.get("tracks", [])[:limit]
+        
+        await self._rate_limit()
+        data = await self._make_request(
+            "recording",
+            {
+                "query": f'artist:"{_lucene_phrase(artist_name)}" AND status:official AND video:false',
+                "limit": 100
+            }
+        )
+        
+        target = _normalize_name(artist_name)
+        by_title: Dict[str, Dict[str, Any]] = {}
+        for rec in data.get("recordings", []):
+            title = rec.get("title")
+            if not title or _credit_name(rec) != target:
+                continue
+            appearances = len(rec.get("releases", []))
+            track = by_title.setdefault(title.lower(), {
+                "name": title,
+                "artist": artist_name,
+                "playcount": 0,
+                "mbid": rec.get("id"),
+                "url": f"https://musicbrainz.org/recording/{rec.get('id')}"
+            })
+            track["playcount"] += appearances
+        tracks = sorted(by_title.values(), key=lambda t: t["playcount"], reverse=True)
+        
+        if data:
+            self._save_to_cache(cache_key, {"tracks": tracks[:_TOP_CACHE_SIZE]})
+        return tracks[:limit]
+    
     async def get_artist_top_albums_enhanced(
         self,
         artist_name: str,
@@ -1331,7 +1442,7 @@ class MusicBrainzService:
             return enhanced_albums
             
         except Exception as e:
-            print(f"❌ Error obteniendo álbumes: {e}")
+            logger.error("❌ Error obteniendo álbumes: %s", e)
             return []
     
     async def get_artist_top_tracks_enhanced(
@@ -1349,11 +1460,7 @@ class MusicBrainzService:
             enhanced_tracks = []
             for track in tracks:
                 enhanced = {
-                    "name": track.name,
-                    "artist": track.artist,
-                    "playcount": track.playcount or 0,
-                    "url": track.url,
-                    "image_url": track.image_url,
+                    **track,
                     "source": "musicbrainz"
                 }
                 enhanced_tracks.append(enhanced)
@@ -1361,12 +1468,12 @@ class MusicBrainzService:
             return enhanced_tracks
             
         except Exception as e:
-            print(f"❌ Error obteniendo tracks: {e}")
+            logger.error("❌ Error obteniendo tracks: %s", e)
             return []
     
     async def close(self):
         """Cerrar conexión y guardar cache"""
         await self.client.aclose()
         # Guardar cache al cerrar
-        self._save_cache()
+        await self._save_cache()
 
@@ -1,10 +1,14 @@
 import httpx
+import logging
 import os
 from typing import List, Optional, Dict, Any
 import hashlib
 import random
 import string
 from models.schemas import Track, Album, Artist
+from services import json_utils
+
+logger = logging.getLogger(__name__)
 
 class NavidromeService:
     def __init__(self):
@@ -43,7 +47,7 @@ class NavidromeService:
             ID de la playlist creada o None si falla
         """
         try:
-            print(f"🎵 Creando playlist '{name}' en Navidrome con {len(song_ids)} canciones...")
+            logger.debug("🎵 Creando playlist '%s' en Navidrome con %s canciones...", name, len(song_ids))
             
             # Crear playlist vacía
             params = self._get_auth_params()
@@ -54,10 +58,10 @@ class NavidromeService:
             playlist_id = playlist_data.get("id")
             
             if not playlist_id:
-                print(f"❌ No se pudo obtener ID de playlist creada")
+                logger.error("❌ No se pudo obtener ID de playlist creada")
                 return None
             
-            print(f"✅ Playlist creada con ID: {playlist_id}")
+            logger.debug("✅ Playlist creada con ID: %s", playlist_id)
             
             # Agregar canciones a la playlist
             # La API de Subsonic requiere múltiples parámetros songIdToAdd
@@ -72,15 +76,15 @@ class NavidromeService:
             
             response = await self.client.get(full_url)
             if response.status_code != 200:
-                print(f"❌ Error al agregar canciones: {response.status_code}")
+                logger.error("❌ Error al agregar canciones: %s", response.status_code)
                 return None
             
-            print(f"✅ Agregadas {len(song_ids)} canciones a la playlist")
+            logger.debug("✅ Agregadas %s canciones a la playlist", len(song_ids))
             
             return playlist_id
             
         except Exception as e:
-            print(f"❌ Error creando playlist en Navidrome: {e}")
+            logger.error("❌ Error creando playlist en Navidrome: %s", e)
             return None
     
     async def test_connection(self):
@@ -93,17 +97,17 @@ class NavidromeService:
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = json_utils.loads(response.content)
                 subsonic_response = data.get("subsonic-response", {})
                 if subsonic_response.get("status") == "ok":
-                    print(f"✅ Conexión exitosa con Navidrome")
+                    logger.debug("✅ Conexión exitosa con Navidrome")
                     return True
             
-            print(f"❌ Error de conexión Navidrome: {response.status_code}")
+            logger.error("❌ Error de conexión Navidrome: %s", response.status_code)
             return False
                 
         except Exception as e:
-            print(f"❌ Error probando conexión Navidrome: {e}")
+            logger.error("❌ Error probando conexión Navidrome: %s", e)
             return False
     
     async def _make_request(self, endpoint: str, extra_params: Optional[Dict] = None):
@@ -120,7 +124,7 @@ class NavidromeService:
             )
             
             response.raise_for_status()
-            data = response.json()
+            data = json_utils.loads(response.content)
             
             # Verificar respuesta de Subsonic
             subsonic_response = data.get("subsonic-response", {})
@@ -131,13 +135,13 @@ class NavidromeService:
             return subsonic_response
             
         except Exception as e:
-            print(f"❌ Error en petición Navidrome ({endpoint}): {e}")
+            logger.error("❌ Error en petición Navidrome (%s): %s", endpoint, e)
             raise
     
     async def get_tracks(self, limit: int = 50, offset: int = 0, **filters) -> List[Track]:
         """Obtener canciones aleatorias de la biblioteca"""
         try:
-            print(f"🎵 Obteniendo {limit} canciones aleatorias de Navidrome...")
+            logger.debug("🎵 Obteniendo %s canciones aleatorias de Navidrome...", limit)
             
             # Usar getRandomSongs para obtener canciones aleatorias
             params = {
@@ -162,11 +166,11 @@ class NavidromeService:
             for item in songs:
                 # Debug: imprimir todos los campos disponibles (solo primero)
                 if len(tracks) == 0:
-                    print(f"🔍 Campos disponibles en song: {list(item.keys())}")
+                    logger.debug("🔍 Campos disponibles en song: %s", list(item.keys()))
                     if 'path' in item:
-                        print(f"   path: {item.get('path')}")
+                        logger.debug("   path: %s", item.get('path'))
                     if 'suffix' in item:
-                        print(f"   suffix: {item.get('suffix')}")
+                        logger.debug("   suffix: %s", item.get('suffix'))
                 
                 track = Track(
                     id=item.get("id", ""),
@@ -182,21 +186,27 @@ class NavidromeService:
                 )
                 tracks.append(track)
             
-            print(f"✅ Obtenidas {len(tracks)} canciones de Navidrome")
+            logger.debug("✅ Obtenidas %s canciones de Navidrome", len(tracks))
             return tracks
             
         except Exception as e:
-            print(f"❌ Error obteniendo tracks: {e}")
+            logger.error("❌ Error obteniendo tracks: %s", e)
             return []
     
-    async def get_albums(self, limit: int = 50, offset: int = 0, **filters) -> List[Album]:
-        """Obtener álbumes de la biblioteca"""
+    async def get_albums(
+        self, limit: int = 50, offset: int = 0, list_type: str = "random", **filters
+    ) -> List[Album]:
+        """Obtener álbumes de la biblioteca
+
+        Para paginar usar un list_type estable (p. ej. "alphabeticalByName"):
+        con "random" cada offset devuelve una muestra distinta.
+        """
         try:
-            print(f"📀 Obteniendo {limit} álbumes de Navidrome...")
+            logger.debug("📀 Obteniendo %s álbumes de Navidrome...", limit)
             
             # Usar getAlbumList2 (tipo: random, newest, frequent, recent, etc)
             params = {
-                "type": "random",
+                "type": list_type,
                 "size": min(limit, 500),
                 "offset": offset
             }
@@ -222,17 +232,17 @@ class NavidromeService:
                 )
                 albums.append(album)
             
-            print(f"✅ Obtenidos {len(albums)} álbumes de Navidrome")
+            logger.debug("✅ Obtenidos %s álbumes de Navidrome", len(albums))
             return albums
             
         except Exception as e:
-            print(f"❌ Error obteniendo álbumes: {e}")
+            logger.error("❌ Error obteniendo álbumes: %s", e)
             return []
     
     async def get_artists(self, limit: int = 50, offset: int = 0, **filters) -> List[Artist]:
         """Obtener artistas de la biblioteca"""
         try:
-            print(f"🎤 Obteniendo artistas de Navidrome...")
+            logger.debug("🎤 Obteniendo artistas de Navidrome...")
             
             # Usar getArtists para obtener todos los artistas
             data = await self._make_request("getArtists", {})
@@ -253,6 +263,11 @@ class NavidromeService:
                     if artist_count >= limit:
                         break
                     
+                    # getArtists no admite offset: se salta en cliente
+                    if offset > 0:
+                        offset -= 1
+                        continue
+                    
                     artist = Artist(
                         id=item.get("id", ""),
                         name=item.get("name", ""),
@@ -268,17 +283,17 @@ class NavidromeService:
                 if artist_count >= limit:
                     break
             
-            print(f"✅ Obtenidos {len(artists)} artistas de Navidrome")
+            logger.debug("✅ Obtenidos %s artistas de Navidrome", len(artists))
             return artists
             
         except Exception as e:
-            print(f"❌ Error obteniendo artistas: {e}")
+            logger.error("❌ Error obteniendo artistas: %s", e)
             return []
     
     async def get_all_artists(self) -> List[Artist]:
         """Obtener TODOS los artistas de la biblioteca sin límite"""
         try:
-            print(f"🎤 Obteniendo TODOS los artistas de Navidrome...")
+            logger.debug("🎤 Obteniendo TODOS los artistas de Navidrome...")
             
             # Usar getArtists para obtener todos los artistas
             data = await self._make_request("getArtists", {})
@@ -306,17 +321,17 @@ class NavidromeService:
                     )
                     artists.append(artist)
             
-            print(f"✅ Obtenidos TODOS los {len(artists)} artistas de Navidrome")
+            logger.debug("✅ Obtenidos TODOS los %s artistas de Navidrome", len(artists))
             return artists
             
         except Exception as e:
-            print(f"❌ Error obteniendo todos los artistas: {e}")
+            logger.error("❌ Error obteniendo todos los artistas: %s", e)
             return []
     
     async def get_all_albums(self) -> List[Album]:
         """Obtener TODOS los álbumes de la biblioteca sin límite"""
         try:
-            print(f"📀 Obteniendo TODOS los álbumes de Navidrome...")
+            logger.debug("📀 Obteniendo TODOS los álbumes de Navidrome...")
             
             # Usar getAlbumList2 con un límite muy alto
             params = {
@@ -345,17 +360,17 @@ class NavidromeService:
                 )
                 albums.append(album)
             
-            print(f"✅ Obtenidos TODOS los {len(albums)} álbumes de Navidrome")
+            logger.debug("✅ Obtenidos TODOS los %s álbumes de Navidrome", len(albums))
             return albums
             
         except Exception as e:
-            print(f"❌ Error obteniendo todos los álbumes: {e}")
+            logger.error("❌ Error obteniendo todos los álbumes: %s", e)
             return []
     
     async def get_all_tracks(self) -> List[Track]:
         """Obtener TODAS las canciones de la biblioteca sin límite"""
         try:
-            print(f"🎵 Obteniendo TODAS las canciones de Navidrome...")
+            logger.debug("🎵 Obteniendo TODAS las canciones de Navidrome...")
             
             # Usar getRandomSongs con un límite muy alto
             params = {
@@ -386,17 +401,17 @@ class NavidromeService:
                 )
                 tracks.append(track)
             
-            print(f"✅ Obtenidas TODAS las {len(tracks)} canciones de Navidrome")
+            logger.debug("✅ Obtenidas TODAS las %s canciones de Navidrome", len(tracks))
             return tracks
             
         except Exception as e:
-            print(f"❌ Error obteniendo todas las canciones: {e}")
+            logger.error("❌ Error obteniendo todas las canciones: %s", e)
             return []
     
     async def search(self, query: str, limit: int = 20) -> Dict[str, List]:
         """Buscar en la biblioteca usando Subsonic API"""
         try:
-            print(f"🔍 Buscando '{query}' en Navidrome...")
+            logger.debug("🔍 Buscando '%s' en Navidrome...", query)
             params = {
                 "query": query,
                 "songCount": limit,
@@ -411,7 +426,7 @@ class NavidromeService:
             albums = search_result.get("album", [])
             artists = search_result.get("artist", [])
             
-            print(f"📊 Resultados de búsqueda: {len(songs)} canciones, {len(albums)} álbumes, {len(artists)} artistas")
+            logger.debug("📊 Resultados de búsqueda: %s canciones, %s álbumes, %s artistas", len(songs), len(albums), len(artists))
             
             results = {
                 "tracks": [],
@@ -464,7 +479,7 @@ class NavidromeService:
             return results
             
         except Exception as e:
-            print(f"❌ Error en búsqueda: {e}")
+            logger.error("❌ Error en búsqueda: %s", e)
             return {"tracks": [], "albums": [], "artists": []}
     
     async def create_share(
@@ -489,7 +504,7 @@ class NavidromeService:
             'downloadable' tanto en createShare como en updateShare.
         """
         try:
-            print(f"🔗 Creando share para {len(item_ids)} items...")
+            logger.debug("🔗 Creando share para %s items...", len(item_ids))
             
             # Construir parámetros
             params = self._get_auth_params()
@@ -507,15 +522,15 @@ class NavidromeService:
             response = await self.client.get(full_url)
             
             if response.status_code != 200:
-                print(f"❌ Error al crear share: {response.status_code}")
+                logger.error("❌ Error al crear share: %s", response.status_code)
                 return None
             
-            data = response.json()
+            data = json_utils.loads(response.content)
             subsonic_response = data.get("subsonic-response", {})
             
             if subsonic_response.get("status") == "failed":
                 error = subsonic_response.get("error", {})
-                print(f"❌ Error de Subsonic: {error.get('message', 'Unknown')}")
+                logger.error("❌ Error de Subsonic: %s", error.get('message', 'Unknown'))
                 return None
             
             # Extraer información del share
@@ -524,7 +539,7 @@ class NavidromeService:
                 shares = [shares]
             
             if not shares:
-                print(f"❌ No se recibió información del share")
+                logger.error("❌ No se recibió información del share")
                 return None
             
             share = shares[0]
@@ -540,11 +555,11 @@ class NavidromeService:
                 "visit_count": share.get("visitCount", 0)
             }
             
-            print(f"✅ Share creado: {share_url}")
+            logger.debug("✅ Share creado: %s", share_url)
             return share_info
             
         except Exception as e:
-            print(f"❌ Error creando share: {e}")
+            logger.error("❌ Error creando share: %s", e)
             return None
     
     async def get_album_tracks(self, album_id: str) -> List[Track]:
@@ -583,7 +598,7 @@ class NavidromeService:
             return tracks
             
         except Exception as e:
-            print(f"❌ Error obteniendo tracks del álbum: {e}")
+            logger.error("❌ Error obteniendo tracks del álbum: %s", e)
             return []
     
     async def get_now_playing(self) -> List[Dict[str, Any]]:
@@ -602,7 +617,7 @@ class NavidromeService:
             - year: Año de lanzamiento
         """
         try:
-            print(f"🎵 Obteniendo información de reproducción actual...")
+            logger.debug("🎵 Obteniendo información de reproducción actual...")
             
             data = await self._make_request("getNowPlaying", {})
             entries = data.get("nowPlaying", {}).get("entry", [])
@@ -624,11 +639,11 @@ class NavidromeService:
                     "year": entry.get("year")
                 })
             
-            print(f"✅ Encontradas {len(now_playing)} reproducciones activas")
+            logger.debug("✅ Encontradas %s reproducciones activas", len(now_playing))
             return now_playing
             
         except Exception as e:
-            print(f"❌ Error obteniendo now playing: {e}")
+            logger.error("❌ Error obteniendo now playing: %s", e)
             return []
     
     async def close(self):
@@ -1,8 +1,11 @@
+import logging
 import os
 from typing import List, Optional
 from datetime import datetime
 from models.schemas import Track
 
+logger = logging.getLogger(__name__)
+
 class PlaylistService:
     """Servicio para crear y gestionar playlists en formato M3U"""
     
@@ -29,13 +32,18 @@ class PlaylistService:
             Contenido de la playlist en formato M3U
         """
         
+        # Se acumulan líneas y se unen una sola vez: con += cada línea copiaba
+        # todo el contenido anterior (cuadrático en el tamaño de la playlist)
+        lines = ["#EXTM3U"]
+        # Prefijo/sufijo de la URL de streaming, iguales para todas las canciones
+        stream_prefix = f"{self.navidrome_url}/rest/stream.view?id="
+        stream_suffix = f"&u={self.navidrome_username}"
+
         if simple_format:
             # Formato M3U estándar para Navidrome
-            m3u_content = "#EXTM3U\n"
-            
             # Agregar nombre de playlist si está disponible
             if playlist_name:
-                m3u_content += f"#PLAYLIST:{playlist_name}\n"
+                lines.append(f"#PLAYLIST:{playlist_name}")
             
             for track in tracks:
                 # Duración en segundos (usar -1 si no está disponible)
@@ -44,10 +52,9 @@ class PlaylistService:
                 # Información del track para mostrar
                 artist_info = track.artist if track.artist else "Unknown Artist"
                 title_info = track.title if track.title else "Unknown Track"
-                display_info = f"{artist_info} - {title_info}"
                 
                 # Agregar línea EXTINF con duración y título
-                m3u_content += f"#EXTINF:{duration},{display_info}\n"
+                lines.append(f"#EXTINF:{duration},{artist_info} - {title_info}")
                 
                 # Agregar ruta del archivo
                 if track.path:
@@ -62,18 +69,16 @@ class PlaylistService:
                             # No tiene /, agregar /music/
                             file_path = f"/music/{file_path}"
                     
-                    m3u_content += f"{file_path}\n"
+                    lines.append(file_path)
                 elif track.id:
                     # Si no hay path pero hay ID, usar la URL de streaming de Navidrome
-                    stream_url = f"{self.navidrome_url}/rest/stream.view?id={track.id}&u={self.navidrome_username}"
-                    m3u_content += f"{stream_url}\n"
+                    lines.append(f"{stream_prefix}{track.id}{stream_suffix}")
         else:
             # Formato extendido: con metadata (EXTINF, duración, etc)
-            m3u_content = "#EXTM3U\n"
             if description:
-                m3u_content += f"#PLAYLIST:{playlist_name}\n"
-                m3u_content += f"#EXTENC:UTF-8\n"
-                m3u_content += f"#DESCRIPTION:{description}\n"
+                lines.append(f"#PLAYLIST:{playlist_name}")
+                lines.append("#EXTENC:UTF-8")
+                lines.append(f"#DESCRIPTION:{description}")
             
             for track in tracks:
                 # Duración en segundos
@@ -83,21 +88,21 @@ class PlaylistService:
                 artist_info = track.artist if track.artist else "Unknown Artist"
                 title_info = track.title if track.title else "Unknown Track"
                 
-                m3u_content += f"#EXTINF:{duration},{artist_info} - {title_info}\n"
+                lines.append(f"#EXTINF:{duration},{artist_info} - {title_info}")
                 
                 # URL de streaming de Navidrome/Subsonic
                 if track.id:
                     # Construir URL de stream con autenticación
-                    stream_url = f"{self.navidrome_url}/rest/stream.view?id={track.id}&u={self.navidrome_username}"
-                    m3u_content += f"{stream_url}\n"
+                    lines.append(f"{stream_prefix}{track.id}{stream_suffix}")
                 elif track.path:
                     # Si no hay ID pero hay path, usar el path
-                    m3u_content += f"{track.path}\n"
+                    lines.append(track.path)
                 else:
                     # Fallback: comentar que no hay URL disponible
-                    m3u_content += f"# No stream URL available for {artist_info} - {title_info}\n"
+                    lines.append(f"# No stream URL available for {artist_info} - {title_info}")
         
-        return m3u_content
+        lines.append("")  # salto de línea final
+        return "\n".join(lines)
     
     def save_playlist(self, m3u_content: str, filename: str, output_dir: str = "/tmp") -> str:
         """Guardar playlist en archivo
@@ -120,7 +125,7 @@ class PlaylistService:
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(m3u_content)
         
-        print(f"✅ Playlist guardada en: {filepath}")
+        logger.debug("✅ Playlist guardada en: %s", filepath)
         return filepath
     
     def create_playlist_from_recommendations(
@@ -157,16 +162,16 @@ class PlaylistService:
         
         # Debe empezar con #EXTM3U
         if not lines or not lines[0].startswith('#EXTM3U'):
-            print("❌ Playlist inválida: no empieza con #EXTM3U")
+            logger.error("❌ Playlist inválida: no empieza con #EXTM3U")
             return False
         
         # Debe tener al menos una entrada
         extinf_count = sum(1 for line in lines if line.startswith('#EXTINF'))
         if extinf_count == 0:
-            print("❌ Playlist inválida: no contiene canciones")
+            logger.error("❌ Playlist inválida: no contiene canciones")
             return False
         
-        print(f"✅ Playlist válida: {extinf_count} canciones")
+        logger.debug("✅ Playlist válida: %s canciones", extinf_count)
         return True
     
     def get_playlist_info(self, m3u_content: str) -> dict:
@@ -0,0 +1,122 @@
+"""
+Caché semántica de respuestas del agente (Gemini)
+
+Preguntas equivalentes ("¿Qué es el jazz?" / "qué es el jazz") no deberían
+costar otra llamada al LLM. Cada pregunta se convierte en un embedding y se
+compara por similitud coseno con las ya respondidas; si supera el umbral se
+devuelve la respuesta guardada.
+
+Las entradas se agrupan por bucket (p. ej. el user_id) para no mezclar
+respuestas personalizadas entre usuarios, y caducan a los SEMANTIC_CACHE_TTL
+segundos: las respuestas salen de estadísticas y biblioteca en vivo.
+"""
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import google.generativeai as genai
+import numpy as np
+
+from services import gemini_client
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class SemanticCache:
+    """LRU de (embedding, respuesta) por bucket con búsqueda por similitud coseno
+    y expiración por entrada"""
+
+    def __init__(
+        self,
+        threshold: float = None,
+        max_entries: int = 256,
+        embedding_model: str = "models/text-embedding-004",
+        ttl: float = None,
+    ):
+        self.threshold = threshold if threshold is not None else float(
+            os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85")
+        )
+        self.ttl = ttl if ttl is not None else float(os.getenv("SEMANTIC_CACHE_TTL", "1800"))
+        self.max_entries = max_entries
+        self.embedding_model = embedding_model
+        gemini_client.configure()
+        # bucket -> OrderedDict[pregunta normalizada -> (caduca en, embedding unitario, respuesta)]
+        self._buckets: Dict[Hashable, "OrderedDict[str, Tuple[float, np.ndarray, Any]]"] = {}
+
+    async def embed(self, text: str) -> Optional[np.ndarray]:
+        """Embedding normalizado (norma 1) o None si la API falla"""
+        try:
+            async with gemini_client.slot():
+                result = await genai.embed_content_async(
+                    model=self.embedding_model,
+                    content=_normalize(text),
+                    task_type="semantic_similarity",
+                )
+        except Exception as e:
+            logger.warning("⚠️ Caché semántica: error obteniendo embedding: %s", e)
+            return None
+        vector = np.asarray(result["embedding"], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _live_entries(self, bucket: Hashable):
+        """Entradas vigentes del bucket (descarta antes las caducadas)"""
+        entries = self._buckets.get(bucket)
+        if not entries:
+            return None
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _, _) in entries.items() if expires_at < now]:
+            del entries[key]
+        if not entries:
+            del self._buckets[bucket]
+            return None
+        return entries
+
+    def get_exact(self, bucket: Hashable, text: str) -> Optional[Any]:
+        """Acierto por texto idéntico (tras normalizar), sin calcular embedding"""
+        entries = self._live_entries(bucket)
+        key = _normalize(text)
+        if not entries or key not in entries:
+            return None
+        entries.move_to_end(key)
+        return entries[key][2]
+
+    def lookup(
+        self, bucket: Hashable, vector: np.ndarray, threshold: float = None
+    ) -> Optional[Any]:
+        """Respuesta más similar del bucket si supera el umbral (o el indicado)"""
+        entries = self._live_entries(bucket)
+        if not entries:
+            return None
+        keys = list(entries)
+        # Una sola multiplicación matriz-vector: todos los embeddings son unitarios
+        matrix = np.stack([entries[k][1] for k in keys])
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < (self.threshold if threshold is None else threshold):
+            return None
+        logger.info("⚡ Caché semántica: acierto (similitud %.2f)", scores[best])
+        entries.move_to_end(keys[best])
+        return entries[keys[best]][2]
+
+    def store(
+        self, bucket: Hashable, text: str, vector: np.ndarray, value: Any, ttl: float = None
+    ) -> None:
+        entries = self._buckets.setdefault(bucket, OrderedDict())
+        key = _normalize(text)
+        entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), vector, value)
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def clear(self, bucket: Hashable = None) -> None:
+        if bucket is None:
+            self._buckets.clear()
+        else:
+            self._buckets.pop(bucket, None)
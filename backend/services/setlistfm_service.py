@@ -1,10 +1,15 @@
 import httpx
+import logging
 import os
 import re
 import time
 import asyncio
 from typing import Optional, Dict, Any, List
 
+from services import json_utils
+
+logger = logging.getLogger(__name__)
+
 
 class SetlistfmService:
     """Cliente de la API pública de setlist.fm (https://api.setlist.fm/docs/1.0/index.html)
@@ -46,17 +51,17 @@ class SetlistfmService:
     async def get_setlist(self, setlist_id: str) -> Optional[Dict[str, Any]]:
         """Obtener un setlist por su ID."""
         if not self.api_key:
-            print("❌ SETLISTFM_API_KEY no configurada")
+            logger.error("❌ SETLISTFM_API_KEY no configurada")
             return None
         try:
             await self._rate_limit()
             response = await self.client.get(f"{self.base_url}/setlist/{setlist_id}")
             if response.status_code != 200:
-                print(f"❌ Error obteniendo setlist {setlist_id}: {response.status_code}")
+                logger.error("❌ Error obteniendo setlist %s: %s", setlist_id, response.status_code)
                 return None
-            return response.json()
+            return json_utils.loads(response.content)
         except Exception as e:
-            print(f"❌ Error obteniendo setlist {setlist_id}: {e}")
+            logger.error("❌ Error obteniendo setlist %s: %s", setlist_id, e)
             return None
 
     async def search_setlists(
@@ -67,7 +72,7 @@ class SetlistfmService:
     ) -> List[Dict[str, Any]]:
         """Buscar setlists por artista y, opcionalmente, ciudad/fecha (dd-MM-yyyy)."""
         if not self.api_key:
-            print("❌ SETLISTFM_API_KEY no configurada")
+            logger.error("❌ SETLISTFM_API_KEY no configurada")
             return []
         try:
             params = {"artistName": artist_name}
@@ -81,16 +86,16 @@ class SetlistfmService:
             if response.status_code == 404:
                 return []
             if response.status_code != 200:
-                print(f"❌ Error buscando setlists de {artist_name}: {response.status_code}")
+                logger.error("❌ Error buscando setlists de %s: %s", artist_name, response.status_code)
                 return []
 
-            data = response.json()
+            data = json_utils.loads(response.content)
             setlists = data.get("setlist", [])
             if isinstance(setlists, dict):
                 setlists = [setlists]
             return setlists
         except Exception as e:
-            print(f"❌ Error buscando setlists de {artist_name}: {e}")
+            logger.error("❌ Error buscando setlists de %s: %s", artist_name, e)
             return []
 
     def extract_songs(self, setlist_json: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -9,6 +9,10 @@ Responsabilidades de este módulo:
 Lo que NO hace este módulo:
   - Lógica de negocio (recomendaciones, búsqueda, playlists, etc.)
   - Llamadas directas a Navidrome/ListenBrainz/IA
+
+Se espera que la Application se cree con bot.build_application(): updates
+concurrentes y pool HTTPX amplio, de modo que las ediciones de mensajes de
+varios callbacks simultáneos no se serialicen en una sola conexión.
 """
 from telegram import (
     Update,
@@ -16,38 +20,333 @@ from telegram import (
     InlineKeyboardMarkup,
     ReplyKeyboardMarkup,
     KeyboardButton,
+    LinkPreviewOptions,
 )
+from telegram.constants import ChatAction
+from telegram.error import BadRequest, TelegramError
 from telegram.ext import ContextTypes
-from typing import Optional
+from typing import Callable, FrozenSet, Optional, Tuple
+import asyncio
+import logging
 import os
 import time
-from functools import wraps
+from contextlib import asynccontextmanager
+from dataclasses import replace
+from functools import lru_cache, wraps
 from datetime import datetime
 
-from core.music_assistant import MusicAssistant
+from core.music_assistant import STATS_PERIOD_NAMES, MusicAssistant
+from core.formatting import escape_html as _e
 from models.responses import AssistantAction, AssistantResponse, RecommendParams
 from services.analytics_system import analytics_system
 
+logger = logging.getLogger(__name__)
+
+_WELCOME_TEXT = """🎵 <b>¡Bienvenido a Musicalo!</b>
+
+Soy tu asistente personal de música con IA que entiende lenguaje natural. Puedes hablarme directamente o usar comandos.
+
+<b>✨ Habla conmigo naturalmente:</b>
+• "Recomiéndame música rock"
+• "Busca Queen en mi biblioteca"
+• "Muéstrame mis estadísticas"
+• "¿Qué álbumes tengo de Pink Floyd?"
+• "¿Qué estoy escuchando?"
+
+<b>📝 Comandos disponibles:</b>
+/recommend - Obtener recomendaciones personalizadas
+/playlist &lt;descripción&gt; - Crear playlist M3U 🎵
+/share &lt;nombre&gt; - Compartir música con enlace público 🔗
+/nowplaying - Ver qué se está reproduciendo ahora 🎧
+/library - Explorar tu biblioteca musical
+/stats - Ver estadísticas de escucha
+/releases [week/month/year] - Lanzamientos recientes 🆕
+/search &lt;término&gt; - Buscar música en tu biblioteca
+/help - Mostrar ayuda
+
+¡Simplemente escríbeme lo que necesites! 🎶"""
+
+_HELP_TEXT = """🎵 <b>Musicalo - Guía de Comandos</b>
+
+<b>✨ Lenguaje Natural:</b>
+Escríbeme directamente sin usar comandos:
+• "Recomiéndame álbumes de rock"
+• "Busca Queen"
+• "Muéstrame mis estadísticas"
+• "¿Qué artistas tengo en mi biblioteca?"
+• "Crea una playlist de rock progresivo"
+• "¿Qué estoy escuchando?"
+
+<b>Comandos principales:</b>
+• /recommend - Recomendaciones generales
+• /recommend album - Recomendar álbumes
+• /recommend artist - Recomendar artistas
+• /recommend track - Recomendar canciones
+• /recommend similar &lt;artista&gt; - Artistas similares
+• /recommend biblioteca - Redescubrir tu biblioteca
+• /playlist &lt;descripción&gt; - Crear playlist M3U 🎵
+• /share &lt;nombre&gt; - Compartir música con enlace público 🔗
+• /nowplaying - Ver qué se está reproduciendo ahora 🎧
+• /library - Ver tu biblioteca musical
+• /stats - Estadísticas de escucha
+• /releases - Lanzamientos recientes de tus artistas 🆕
+• /search &lt;término&gt; - Buscar en tu biblioteca
+
+<b>Servicios:</b>
+• ListenBrainz: Análisis de escucha y recomendaciones
+• MusicBrainz: Metadatos detallados
+• Navidrome: Tu biblioteca musical
+• Gemini AI: Recomendaciones inteligentes
+
+<b>💡 Tip:</b> Puedes preguntarme cualquier cosa sobre música directamente, sin usar comandos. ¡Prueba!"""
+
+_MAIN_KEYBOARD = ReplyKeyboardMarkup(
+    [
+        [KeyboardButton("🎵 Recomendaciones"), KeyboardButton("📚 Mi Biblioteca")],
+        [KeyboardButton("📊 Estadísticas"), KeyboardButton("🔍 Buscar")],
+    ],
+    resize_keyboard=True,
+    one_time_keyboard=False,
+)
+
+# Argumentos completos de /start y /help: texto HTML ya escapado y sin
+# vista previa de enlaces (Telegram no tiene que resolver nada antes de entregar)
+_NO_LINK_PREVIEW = LinkPreviewOptions(is_disabled=True)
+_WELCOME_REPLY = {
+    "text": _WELCOME_TEXT,
+    "reply_markup": _MAIN_KEYBOARD,
+    "parse_mode": "HTML",
+    "link_preview_options": _NO_LINK_PREVIEW,
+}
+_HELP_REPLY = {"text": _HELP_TEXT, "parse_mode": "HTML", "link_preview_options": _NO_LINK_PREVIEW}
+
+_REC_INLINE_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("❤️ Me gusta", callback_data="like_rec"),
+     InlineKeyboardButton("👎 No me gusta", callback_data="dislike_rec")],
+    [InlineKeyboardButton("🔄 Más recomendaciones", callback_data="more_recommendations")],
+])
+
+_STATS_INLINE_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📈 Actividad diaria", callback_data="daily_activity")],
+    [InlineKeyboardButton("🎯 Géneros favoritos", callback_data="favorite_genres")],
+    [InlineKeyboardButton("🔄 Actualizar", callback_data="refresh_stats")],
+])
+
+_STATS_PERIOD_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📅 Esta Semana", callback_data="stats_this_week"),
+     InlineKeyboardButton("📆 Este Mes", callback_data="stats_this_month")],
+    [InlineKeyboardButton("📋 Este Año", callback_data="stats_this_year"),
+     InlineKeyboardButton("🌟 Todo el Tiempo", callback_data="stats_all_time")],
+    [InlineKeyboardButton("⏮️ Mes Pasado", callback_data="stats_last_month"),
+     InlineKeyboardButton("⏮️ Año Pasado", callback_data="stats_last_year")],
+])
+
+# Argumento de /stats -> periodo en la consulta al agente
+_STATS_PERIOD_ARGS = {
+    "week": "esta semana", "month": "este mes", "year": "este año",
+    "all": "de todo el tiempo", "all_time": "de todo el tiempo",
+}
+
+_SEARCH_USAGE_MSG = (
+    "🔍 <b>Uso:</b> <code>/search &lt;término&gt;</code>\n\n"
+    "Ejemplos:\n• <code>/search queen</code>\n• <code>/search bohemian rhapsody</code>"
+)
+_LIBRARY_SEARCH_MSG = "🔍 Usa <code>/search &lt;término&gt;</code> para buscar música"
+_LIKE_ACK_MSG = "❤️ ¡Gracias! He registrado que te gusta esta recomendación."
+_DISLIKE_ACK_MSG = "👎 Entendido. Evitaré recomendaciones similares."
+_FAVORITE_GENRES_WIP_MSG = "🎯 <b>Géneros favoritos</b>\n\n⚠️ Funcionalidad en desarrollo"
+_PLAY_WIP_MSG = "🎵 Abriendo en Navidrome...\n\n⚠️ Funcionalidad en desarrollo"
+
+# Sugerencia de comandos directos cuando falla el lenguaje natural (texto plano)
+_HELP_FALLBACK = (
+    "💡 Puedes usar comandos directos:\n"
+    "• /recommend - Recomendaciones\n"
+    "• /search <término> - Buscar música\n"
+    "• /stats - Estadísticas\n"
+    "• /playlist <descripción> - Crear playlist"
+)
+
+# Límite de longitud de un mensaje de Telegram
+_MAX_MESSAGE_LENGTH = 4096
+
+_DENIED_TEMPLATE = (
+    "🚫 <b>Acceso Denegado</b>\n\n"
+    "Este bot es privado y solo puede ser usado por usuarios autorizados.\n\n"
+    "Tu ID de usuario es: <code>{user_id}</code>\n\n"
+    "Si crees que deberías tener acceso, contacta con el administrador del bot "
+    "y proporciona tu ID de usuario."
+)
+# Como mucho un log de acceso denegado por usuario en este intervalo (segundos)
+_DENIED_LOG_INTERVAL = 60.0
+
+_NO_MUSIC_SERVICE_MSG = (
+    "⚠️ No hay servicio de scrobbling configurado.\n\n"
+    "Por favor configura ListenBrainz (LISTENBRAINZ_USERNAME en .env) "
+    "para recibir recomendaciones personalizadas."
+)
+
+# Palabras clave de /recommend (sets para búsquedas O(1))
+_LIBRARY_WORDS = frozenset({"biblioteca", "library", "lib", "redescubrir"})
+_REC_TYPE_WORDS = (
+    ("album", frozenset({"album", "disco", "álbum"})),
+    ("artist", frozenset({"artist", "artista", "banda", "grupo"})),
+    ("track", frozenset({"track", "song", "cancion", "canción", "tema"})),
+)
+_REC_TYPE_BY_WORD = {word: rec_type for rec_type, words in _REC_TYPE_WORDS for word in words}
+_SIMILAR_WORDS = frozenset({"similar", "like", "como", "parecido"})
+
+_DISCOVERY_TAGS = frozenset({"discovery", "serendipity", "similar_artists", "genre_exploration"})
+
+
+@lru_cache(maxsize=1024)
+def _parse_recommend_tokens(tokens: Tuple[str, ...]) -> RecommendParams:
+    """Parseo puro de los argumentos de /recommend (memoizado por tupla de args)"""
+    params = RecommendParams()
+
+    # Una sola pasada: flags especiales (inyectados por handle_message), flag
+    # de biblioteca, tipos mencionados y posición de la primera palabra "similar"
+    kept = []           # (palabra, tipo al que pertenece o None)
+    seen_types = set()
+    similar_at = -1
+    for arg in tokens:
+        if arg.startswith("__limit="):
+            try:
+                params.limit = int(arg.split("=", 1)[1])
+            except ValueError:
+                pass
+            continue
+        if arg.startswith("__custom_prompt="):
+            params.custom_prompt = arg.split("=", 1)[1]
+            continue
+        word = arg.lower()
+        if word in _LIBRARY_WORDS:
+            params.from_library_only = True
+            continue
+        word_type = _REC_TYPE_BY_WORD.get(word)
+        if word_type:
+            seen_types.add(word_type)
+        elif similar_at < 0 and word in _SIMILAR_WORDS:
+            similar_at = len(kept)
+        kept.append((word, word_type))
+
+    # Tipo: el primero por prioridad; solo se descartan sus palabras
+    rec_type = next((t for t, _ in _REC_TYPE_WORDS if t in seen_types), None)
+    if rec_type:
+        params.rec_type = rec_type
+
+    # Similar a / género con lo que queda
+    if similar_at >= 0:
+        rest = [w for w, t in kept[similar_at + 1:] if t is None or t != rec_type]
+        if rest:
+            params.similar_to = " ".join(rest)
+    else:
+        rest = [w for w, t in kept if t is None or t != rec_type]
+        if rest:
+            params.genre_filter = " ".join(rest)
+
+    return params
+
+
+def _parse_recommend_args(tokens: Tuple[str, ...]) -> RecommendParams:
+    """Copia del parseo cacheado: RecommendParams es mutable y no debe compartirse"""
+    return replace(_parse_recommend_tokens(tokens))
+
+
+def _split_message(text: str, max_length: int = _MAX_MESSAGE_LENGTH) -> list:
+    """Trocea un texto largo por saltos de línea respetando el límite de Telegram
+
+    Un solo recorrido con rfind y slicing, sin reconstruir cadenas línea a línea.
+    """
+    if len(text) <= max_length:
+        return [text]
+    parts = []
+    start = 0
+    while start < len(text):
+        end = start + max_length
+        if end >= len(text):
+            parts.append(text[start:])
+            break
+        cut = text.rfind("\n", start, end)
+        if cut <= start:
+            cut = end
+            parts.append(text[start:cut])
+            start = cut
+        else:
+            parts.append(text[start:cut])
+            start = cut + 1
+    return parts
+
+
+@lru_cache(maxsize=128)
+def _inline_keyboard(buttons: Tuple[Tuple[str, str], ...]) -> InlineKeyboardMarkup:
+    """Teclado de una fila para (etiqueta, callback_data); los de /library y
+    /stats se repiten siempre, así que se construyen una vez"""
+    return InlineKeyboardMarkup([[
+        InlineKeyboardButton(label, callback_data=data) for label, data in buttons
+    ]])
+
+
+def _hybrid_strategy_line(tags: list) -> Optional[str]:
+    strategy = next((t for t in tags if t.startswith("hybrid:")), None)
+    return f"🔧 Estrategia: {strategy.split(':')[1]}" if strategy else None
+
+
+def _discovery_type_line(tags: list) -> Optional[str]:
+    found = [t for t in tags if t in _DISCOVERY_TAGS]
+    return f"🔍 Tipo: {', '.join(found)}" if found else None
+
+
+def _parse_user_ids(env_var: str) -> FrozenSet[int]:
+    """Conjunto de IDs de Telegram separados por comas en una variable de entorno."""
+    raw = os.getenv(env_var, "")
+    try:
+        return frozenset(int(uid.strip()) for uid in raw.split(",") if uid.strip())
+    except ValueError as e:
+        logger.warning("⚠️ Error parseando %s: %s", env_var, e)
+        return frozenset()
+
 
 class TelegramService:
     def __init__(self):
         self.assistant = MusicAssistant()
 
+        # chat_id -> [Lock, handlers esperando/en curso]; se borra al quedar en 0
+        self._chat_locks: dict = {}
+
+        # Tope global de handlers en ejecución: una ráfaga de updates no debe
+        # lanzar a la vez decenas de llamadas a Gemini/Navidrome/ListenBrainz
+        self._handler_sem = asyncio.Semaphore(int(os.getenv("MAX_PARALLEL_HANDLERS", "8")))
+
         # Lista de usuarios permitidos (Telegram-specific)
-        allowed_ids_str = os.getenv("TELEGRAM_ALLOWED_USER_IDS", "")
-        if allowed_ids_str.strip():
-            try:
-                self.allowed_user_ids = [
-                    int(uid.strip()) for uid in allowed_ids_str.split(",") if uid.strip()
-                ]
-                print(f"🔒 Bot configurado en modo privado para {len(self.allowed_user_ids)} usuario(s)")
-            except ValueError as e:
-                print(f"⚠️ Error parseando TELEGRAM_ALLOWED_USER_IDS: {e}")
-                self.allowed_user_ids = []
+        self.allowed_user_ids = _parse_user_ids("TELEGRAM_ALLOWED_USER_IDS")
+        if self.allowed_user_ids:
+            logger.info("🔒 Bot configurado en modo privado para %d usuario(s)", len(self.allowed_user_ids))
         else:
-            self.allowed_user_ids = []
-            print("⚠️ Bot en modo público")
-            print("💡 Para hacerlo privado, configura TELEGRAM_ALLOWED_USER_IDS en .env")
+            logger.warning("⚠️ Bot en modo público")
+            logger.info("💡 Para hacerlo privado, configura TELEGRAM_ALLOWED_USER_IDS en .env")
+
+        # user_id -> último log de acceso denegado (evita inundar el log en escaneos)
+        self._denied_logged: dict = {}
+
+        # Administradores (/analytics): se leen una vez, no en cada comando
+        self.admin_user_ids = _parse_user_ids("TELEGRAM_ADMIN_USER_IDS")
+
+        # callback_data -> handler: primero por valor exacto y si no por prefijo
+        self._callback_handlers = {
+            "like": self._cb_like,
+            "dislike": self._cb_dislike,
+            "more_recommendations": self._cb_more_recommendations,
+            "library": self._cb_library,
+            "daily_activity": self._cb_daily_activity,
+            "favorite_genres": self._cb_favorite_genres,
+            "refresh_stats": self._cb_refresh_stats,
+            "stats": self._cb_stats,
+            "play": self._cb_play,
+        }
+
+    async def close(self):
+        """Liberar conexiones al apagar el bot (ver bot.post_shutdown)."""
+        await self.assistant.close()
 
     # ------------------------------------------------------------------
     # Decoradores
@@ -56,23 +355,46 @@ class TelegramService:
     def _check_authorization(func):
         @wraps(func)
         async def wrapper(self, update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
-            user_id = update.effective_user.id
-            username = update.effective_user.username or update.effective_user.first_name
-
-            if self.allowed_user_ids and user_id not in self.allowed_user_ids:
-                print(f"🚫 Acceso denegado para usuario {username} (ID: {user_id})")
-                await update.message.reply_text(
-                    "🚫 <b>Acceso Denegado</b>\n\n"
-                    "Este bot es privado y solo puede ser usado por usuarios autorizados.\n\n"
-                    f"Tu ID de usuario es: <code>{user_id}</code>\n\n"
-                    "Si crees que deberías tener acceso, contacta con el administrador del bot "
-                    "y proporciona tu ID de usuario.",
-                    parse_mode="HTML",
+            # Modo público: ni siquiera se consulta el usuario
+            if self.allowed_user_ids:
+                user = update.effective_user
+                if user.id not in self.allowed_user_ids:
+                    self._log_denied(user.id, user.username or user.first_name)
+                    await update.effective_message.reply_text(
+                        _DENIED_TEMPLATE.format(user_id=user.id), parse_mode="HTML"
+                    )
+                    return
+            # "Escribiendo..." inmediato aunque el handler tenga que esperar turno;
+            # solo en mensajes/comandos y sin esperar la llamada a la API
+            if update.message:
+                context.application.create_task(
+                    self._send_typing(context.bot, update.effective_chat.id), update=update
                 )
-                return
-            return await func(self, update, context, *args, **kwargs)
+            async with self._chat_lock(update.effective_chat.id), self._handler_sem:
+                return await func(self, update, context, *args, **kwargs)
         return wrapper
 
+    @staticmethod
+    async def _send_typing(bot, chat_id: int):
+        """Acción "escribiendo..." en segundo plano (ver _check_authorization)."""
+        try:
+            await bot.send_chat_action(chat_id, ChatAction.TYPING)
+        except TelegramError:
+            pass  # cosmético: no debe llegar al error handler
+
+    def _log_denied(self, user_id: int, username: str):
+        """Log de acceso denegado, como mucho uno por usuario cada _DENIED_LOG_INTERVAL."""
+        now = time.monotonic()
+        if now - self._denied_logged.get(user_id, float("-inf")) < _DENIED_LOG_INTERVAL:
+            return
+        if len(self._denied_logged) >= 1024:
+            self._denied_logged = {
+                uid: at for uid, at in self._denied_logged.items()
+                if now - at < _DENIED_LOG_INTERVAL
+            }
+        self._denied_logged[user_id] = now
+        logger.warning("🚫 Acceso denegado para usuario %s (ID: %s)", username, user_id)
+
     def track_analytics(interaction_type: str):
         def decorator(func):
             @wraps(func)
@@ -100,6 +422,45 @@ class TelegramService:
             return wrapper
         return decorator
 
+    def _requires_music_service(message: str = _NO_MUSIC_SERVICE_MSG):
+        """Corta el handler si no hay servicio de scrobbling configurado."""
+        def decorator(func):
+            @wraps(func)
+            async def wrapper(self, update, context, *args, **kwargs):
+                if not self.assistant.music_service:
+                    if update.callback_query:
+                        await update.callback_query.edit_message_text(message)
+                    else:
+                        await update.message.reply_text(message)
+                    return
+                return await func(self, update, context, *args, **kwargs)
+            return wrapper
+        return decorator
+
+    # ------------------------------------------------------------------
+    # Concurrencia
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def _chat_lock(self, chat_id: int):
+        """Serializa los handlers de un mismo chat; chats distintos van en paralelo.
+
+        Con concurrent_updates activado, dos mensajes seguidos del mismo chat
+        podrían responderse desordenados. El lock se elimina en cuanto ningún
+        handler lo usa, así que el dict no crece con chats inactivos.
+        """
+        entry = self._chat_locks.get(chat_id)
+        if entry is None:
+            entry = self._chat_locks[chat_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._chat_locks[chat_id]
+
     # ------------------------------------------------------------------
     # Helpers de UI Telegram
     # ------------------------------------------------------------------
@@ -107,18 +468,57 @@ class TelegramService:
     def _actions_to_keyboard(self, actions: list) -> Optional[InlineKeyboardMarkup]:
         if not actions:
             return None
-        return InlineKeyboardMarkup([[
-            InlineKeyboardButton(a.label, callback_data=a.id) for a in actions
-        ]])
+        return _inline_keyboard(tuple((a.label, a.id) for a in actions))
+
+    def _render_recommendations(
+        self, recommendations: list, header: str, footer: str, describe_tags: Callable
+    ) -> str:
+        """Texto común de /hybrid y /discover: top 5 con motivo, confianza y etiquetas."""
+        parts = [header, "\n\n"]
+        for i, rec in enumerate(recommendations[:5], 1):
+            parts.append(f"{i}. <b>{_e(rec.track.title)}</b> - {_e(rec.track.artist)}\n")
+            parts.append(f"   🎵 {_e(rec.reason)}\n")
+            parts.append(f"   📊 Confianza: {rec.confidence:.1%}\n")
+            tag_line = describe_tags(rec.tags)
+            if tag_line:
+                parts.append(f"   {tag_line}\n")
+            parts.append("\n")
+        if len(recommendations) > 5:
+            parts.append(f"... y {len(recommendations) - 5} más\n")
+        parts.append(f"\n💡 <i>{footer}</i>")
+        return "".join(parts)
+
+    async def _edit_message(self, query, text: str, **kwargs):
+        """Edita el mensaje del callback tolerando que no haya cambiado.
+
+        Telegram responde 400 "message is not modified" si se reenvía el mismo
+        texto y teclado (p. ej. "🔄 Actualizar" sin datos nuevos): no es un error.
+        """
+        try:
+            await query.edit_message_text(text, **kwargs)
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                raise
 
-    async def _send_response(self, update: Update, response: AssistantResponse):
-        """Envía un AssistantResponse como mensaje de Telegram."""
+    async def _send_response(self, update: Update, response: AssistantResponse, placeholder=None):
+        """Envía un AssistantResponse como mensaje de Telegram.
+
+        Si se pasa el mensaje de estado ("Buscando...") se edita con el
+        resultado en lugar de dejarlo colgado y enviar otro mensaje.
+        """
         keyboard = self._actions_to_keyboard(response.actions)
-        await update.message.reply_text(
-            response.text,
-            reply_markup=keyboard,
-            parse_mode="HTML",
-        )
+        chunks = _split_message(response.text)
+        # El teclado va en el último fragmento, debajo de todo el texto
+        last = len(chunks) - 1
+        for i, chunk in enumerate(chunks):
+            markup = keyboard if i == last else None
+            if i == 0 and placeholder is not None:
+                try:
+                    await placeholder.edit_text(chunk, reply_markup=markup, parse_mode="HTML")
+                    continue
+                except BadRequest:
+                    pass  # p. ej. el placeholder ya no existe: enviar mensaje nuevo
+            await update.message.reply_text(chunk, reply_markup=markup, parse_mode="HTML")
 
     # ------------------------------------------------------------------
     # Comandos
@@ -127,125 +527,24 @@ class TelegramService:
     @_check_authorization
     @track_analytics("command")
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        welcome_text = """🎵 <b>¡Bienvenido a Musicalo!</b>
-
-Soy tu asistente personal de música con IA que entiende lenguaje natural. Puedes hablarme directamente o usar comandos.
-
-<b>✨ Habla conmigo naturalmente:</b>
-• "Recomiéndame música rock"
-• "Busca Queen en mi biblioteca"
-• "Muéstrame mis estadísticas"
-• "¿Qué álbumes tengo de Pink Floyd?"
-• "¿Qué estoy escuchando?"
-
-<b>📝 Comandos disponibles:</b>
-/recommend - Obtener recomendaciones personalizadas
-/playlist &lt;descripción&gt; - Crear playlist M3U 🎵
-/share &lt;nombre&gt; - Compartir música con enlace público 🔗
-/nowplaying - Ver qué se está reproduciendo ahora 🎧
-/library - Explorar tu biblioteca musical
-/stats - Ver estadísticas de escucha
-/releases [week/month/year] - Lanzamientos recientes 🆕
-/search &lt;término&gt; - Buscar música en tu biblioteca
-/help - Mostrar ayuda
-
-¡Simplemente escríbeme lo que necesites! 🎶"""
-
-        keyboard = [
-            [KeyboardButton("🎵 Recomendaciones"), KeyboardButton("📚 Mi Biblioteca")],
-            [KeyboardButton("📊 Estadísticas"), KeyboardButton("🔍 Buscar")],
-        ]
-        reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=False)
-        await update.message.reply_text(welcome_text, reply_markup=reply_markup, parse_mode="HTML")
+        await update.message.reply_text(**_WELCOME_REPLY)
 
     @_check_authorization
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        help_text = """🎵 <b>Musicalo - Guía de Comandos</b>
-
-<b>✨ Lenguaje Natural:</b>
-Escríbeme directamente sin usar comandos:
-• "Recomiéndame álbumes de rock"
-• "Busca Queen"
-• "Muéstrame mis estadísticas"
-• "¿Qué artistas tengo en mi biblioteca?"
-• "Crea una playlist de rock progresivo"
-• "¿Qué estoy escuchando?"
-
-<b>Comandos principales:</b>
-• /recommend - Recomendaciones generales
-• /recommend album - Recomendar álbumes
-• /recommend artist - Recomendar artistas
-• /recommend track - Recomendar canciones
-• /recommend similar &lt;artista&gt; - Artistas similares
-• /recommend biblioteca - Redescubrir tu biblioteca
-• /playlist &lt;descripción&gt; - Crear playlist M3U 🎵
-• /share &lt;nombre&gt; - Compartir música con enlace público 🔗
-• /nowplaying - Ver qué se está reproduciendo ahora 🎧
-• /library - Ver tu biblioteca musical
-• /stats - Estadísticas de escucha
-• /releases - Lanzamientos recientes de tus artistas 🆕
-• /search &lt;término&gt; - Buscar en tu biblioteca
-
-<b>Servicios:</b>
-• ListenBrainz: Análisis de escucha y recomendaciones
-• MusicBrainz: Metadatos detallados
-• Navidrome: Tu biblioteca musical
-• Gemini AI: Recomendaciones inteligentes
-
-<b>💡 Tip:</b> Puedes preguntarme cualquier cosa sobre música directamente, sin usar comandos. ¡Prueba!"""
-        await update.message.reply_text(help_text, parse_mode="HTML")
+        await update.message.reply_text(**_HELP_REPLY)
 
     @_check_authorization
-    @track_analytics("recommendation")
     async def recommend_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """
         /recommend [tipo] [género/artista] [__limit=N] [__custom_prompt=...]
         Tipos: album | artist | track | biblioteca | similar
         """
-        params = RecommendParams()
-
-        # Extraer flags especiales inyectados por handle_message
-        raw_args = list(context.args or [])
-        filtered = []
-        for arg in raw_args:
-            if arg.startswith("__limit="):
-                try:
-                    params.limit = int(arg.split("=", 1)[1])
-                except ValueError:
-                    pass
-            elif arg.startswith("__custom_prompt="):
-                params.custom_prompt = arg.split("=", 1)[1]
-            else:
-                filtered.append(arg.lower())
-
-        args = filtered
+        params = _parse_recommend_args(tuple(context.args or ()))
 
-        # Flag de biblioteca
-        if any(w in args for w in ["biblioteca", "library", "lib", "redescubrir"]):
-            params.from_library_only = True
-            args = [a for a in args if a not in ["biblioteca", "library", "lib", "redescubrir"]]
-
-        # Tipo
-        if any(w in args for w in ["album", "disco", "álbum"]):
-            params.rec_type = "album"
-            args = [a for a in args if a not in ["album", "disco", "álbum"]]
-        elif any(w in args for w in ["artist", "artista", "banda", "grupo"]):
-            params.rec_type = "artist"
-            args = [a for a in args if a not in ["artist", "artista", "banda", "grupo"]]
-        elif any(w in args for w in ["track", "song", "cancion", "canción", "tema"]):
-            params.rec_type = "track"
-            args = [a for a in args if a not in ["track", "song", "cancion", "canción", "tema"]]
-
-        # Similar a
-        for kw in ["similar", "like", "como", "parecido"]:
-            if kw in args:
-                idx = args.index(kw)
-                if idx + 1 < len(args):
-                    params.similar_to = " ".join(args[idx + 1:])
-                break
-        else:
-            if args:
-                params.genre_filter = " ".join(args)
+        # similar_to funciona sin scrobbling (get_recommendations maneja ese caso)
+        if not params.similar_to and not self.assistant.music_service:
+            await update.message.reply_text(_NO_MUSIC_SERVICE_MSG)
+            return
 
         # Mensaje de estado
         if params.custom_prompt:
@@ -263,89 +562,110 @@ Escríbeme directamente sin usar comandos:
         else:
             status = "🎵 Analizando tus gustos musicales..."
 
-        await update.message.reply_text(status)
+        status_msg = await update.message.reply_text(status)
 
-        try:
-            if params.similar_to and not self.assistant.music_service:
-                pass  # get_recommendations maneja el caso sin music_service para similar_to
+        # La generación (Gemini/MusicBrainz, 5-20 s) sigue en segundo plano: el
+        # handler termina ya y la tarea vuelve a tomar el turno del chat, de modo
+        # que otro /recommend o un botón del mismo chat no editan a la vez.
+        context.application.create_task(
+            self._execute_recommend(update, params, status_msg), update=update
+        )
 
-            if not params.similar_to and not self.assistant.music_service:
-                await update.message.reply_text(
-                    "⚠️ No hay servicio de scrobbling configurado.\n\n"
-                    "Por favor configura ListenBrainz (LISTENBRAINZ_USERNAME en .env) "
-                    "para recibir recomendaciones personalizadas."
-                )
-                return
+    async def _execute_recommend(self, update: Update, params: RecommendParams, status_msg):
+        """Tarea de fondo de /recommend: turno del chat, generación y errores."""
+        async with self._chat_lock(update.effective_chat.id), self._handler_sem:
+            try:
+                await self._reply_recommendations(update, params, status_msg)
+            except Exception as e:
+                logger.exception("❌ Error en recommend_command")
+                await update.message.reply_text(f"❌ Error generando recomendaciones: {e}")
 
-            recommendations = await self.assistant.get_recommendations(
-                update.effective_user.id, params
-            )
+    @track_analytics("recommendation")
+    async def _reply_recommendations(self, update: Update, params: RecommendParams, status_msg):
+        """Generar, formatear y enviar las recomendaciones de /recommend.
 
-            if not recommendations:
-                if params.similar_to:
-                    await update.message.reply_text(
-                        f"😔 No encontré artistas similares a '{params.similar_to}'\n\n"
-                        "Intenta con un artista más conocido o usa /recommend para recomendaciones generales."
-                    )
-                else:
-                    await update.message.reply_text(
-                        "😔 No pude generar recomendaciones en este momento.\n\n"
-                        "Intenta de nuevo más tarde o verifica tu configuración."
-                    )
-                return
+        Lleva el tracking de analytics (y no recommend_command, que solo lanza
+        la tarea): duración y éxito son los de la generación real.
+        """
+        # Vista previa incremental (solo "similar a"): como mucho una edición
+        # cada 0.5 s salvo que lleguen 3 recomendaciones nuevas de golpe
+        last_edit = {"at": 0.0, "shown": 0}
 
-            response = self.assistant._format_recommendations(
-                recommendations,
+        async def on_progress(partial: list):
+            now = time.monotonic()
+            if now - last_edit["at"] < 0.5 and len(partial) - last_edit["shown"] < 3:
+                return
+            last_edit.update(at=now, shown=len(partial))
+            preview = self.assistant._format_recommendations(
+                partial,
                 similar_to=params.similar_to,
-                custom_prompt=params.custom_prompt,
                 rec_type=params.rec_type,
-                genre_filter=params.genre_filter,
             )
+            try:
+                await status_msg.edit_text(preview.text, parse_mode="HTML")
+            except BadRequest:
+                pass
 
-            # Guardar en sesión conversacional
-            session = self.assistant.conversation_manager.get_session(update.effective_user.id)
-            session.set_last_recommendations(recommendations)
+        recommendations = await self.assistant.get_recommendations(
+            update.effective_user.id, params, on_progress=on_progress
+        )
 
-            await self._send_response(update, response)
+        if not recommendations:
+            if params.similar_to:
+                await status_msg.edit_text(
+                    f"😔 No encontré artistas similares a '{params.similar_to}'\n\n"
+                    "Intenta con un artista más conocido o usa /recommend para recomendaciones generales."
+                )
+            else:
+                await status_msg.edit_text(
+                    "😔 No pude generar recomendaciones en este momento.\n\n"
+                    "Intenta de nuevo más tarde o verifica tu configuración."
+                )
+            return
 
-        except Exception as e:
-            print(f"❌ Error en recommend_command: {type(e).__name__}: {e}")
-            import traceback
-            traceback.print_exc()
-            await update.message.reply_text(f"❌ Error generando recomendaciones: {e}")
+        response = self.assistant._format_recommendations(
+            recommendations,
+            similar_to=params.similar_to,
+            custom_prompt=params.custom_prompt,
+            rec_type=params.rec_type,
+            genre_filter=params.genre_filter,
+            feedback_token=self.assistant._register_feedback(recommendations),
+        )
+
+        # Guardar en sesión conversacional
+        session = self.assistant.conversation_manager.get_session(update.effective_user.id)
+        session.set_last_recommendations(recommendations)
+
+        await self._send_response(update, response, status_msg)
 
     @_check_authorization
     async def library_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        await update.message.reply_text("📚 Analizando tu biblioteca musical...")
+        status_msg = await update.message.reply_text("📚 Analizando tu biblioteca musical...")
         try:
             response = await self.assistant._agent_query(
                 "Muéstrame un resumen de mi biblioteca musical con recomendaciones",
                 update.effective_user.id,
             )
-            await self._send_response(update, response)
+            await self._send_response(update, response, status_msg)
         except Exception as e:
             await update.message.reply_text(f"❌ Error accediendo a la biblioteca: {e}")
 
     @_check_authorization
     async def stats_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        period_map = {
-            "week": "esta semana", "month": "este mes", "year": "este año",
-            "all": "de todo el tiempo", "all_time": "de todo el tiempo",
-        }
-        period = period_map.get((context.args or ["month"])[0].lower(), "este mes")
-        await update.message.reply_text(f"📊 Analizando tus estadísticas de {period}...")
+        period = _STATS_PERIOD_ARGS.get((context.args or ["month"])[0].lower(), "este mes")
+        status_msg = await update.message.reply_text(f"📊 Analizando tus estadísticas de {period}...")
         try:
             response = await self.assistant._agent_query(
                 f"Muéstrame mis estadísticas de escucha de {period}",
                 update.effective_user.id,
             )
-            await self._send_response(update, response)
+            await self._send_response(update, response, status_msg)
         except Exception as e:
             await update.message.reply_text(f"❌ Error obteniendo estadísticas: {e}")
 
     @_check_authorization
     async def releases_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        await update.message.reply_text("🔍 Buscando lanzamientos recientes...")
+        status_msg = await update.message.reply_text("🔍 Buscando lanzamientos recientes...")
         query = (
             f"Muéstrame los lanzamientos recientes de {' '.join(context.args)}"
             if context.args
@@ -353,7 +673,7 @@ Escríbeme directamente sin usar comandos:
         )
         try:
             response = await self.assistant._agent_query(query, update.effective_user.id)
-            await self._send_response(update, response)
+            await self._send_response(update, response, status_msg)
         except Exception as e:
             await update.message.reply_text(f"❌ Error obteniendo lanzamientos: {e}")
 
@@ -361,20 +681,16 @@ Escríbeme directamente sin usar comandos:
     @track_analytics("search")
     async def search_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         if not context.args:
-            await update.message.reply_text(
-                "🔍 <b>Uso:</b> <code>/search &lt;término&gt;</code>\n\n"
-                "Ejemplos:\n• <code>/search queen</code>\n• <code>/search bohemian rhapsody</code>",
-                parse_mode="HTML",
-            )
+            await update.message.reply_text(_SEARCH_USAGE_MSG, parse_mode="HTML")
             return
         search_term = " ".join(context.args)
-        await update.message.reply_text(f"🔍 Buscando '{search_term}' en tu biblioteca...")
+        status_msg = await update.message.reply_text(f"🔍 Buscando '{search_term}' en tu biblioteca...")
         try:
             response = await self.assistant._agent_query(
                 f"Busca '{search_term}' en mi biblioteca y dime qué tengo",
                 update.effective_user.id,
             )
-            await self._send_response(update, response)
+            await self._send_response(update, response, status_msg)
         except Exception as e:
             await update.message.reply_text(f"❌ Error en la búsqueda: {e}")
 
@@ -392,13 +708,13 @@ Escríbeme directamente sin usar comandos:
             )
             return
         description = " ".join(context.args)
-        await update.message.reply_text(f"🎵 Creando playlist: <i>{description}</i>...", parse_mode="HTML")
+        status_msg = await update.message.reply_text(f"🎵 Creando playlist: <i>{_e(description)}</i>...", parse_mode="HTML")
         try:
             response = await self.assistant._agent_query(
                 f"Crea una playlist de {description} con canciones de mi biblioteca",
                 update.effective_user.id,
             )
-            await self._send_response(update, response)
+            await self._send_response(update, response, status_msg)
         except Exception as e:
             await update.message.reply_text(f"❌ Error creando playlist: {e}")
 
@@ -424,8 +740,8 @@ Escríbeme directamente sin usar comandos:
 
             if not result:
                 await update.message.reply_text(
-                    f"😔 No encontré '{search_term}' en tu biblioteca.\n\n"
-                    f"💡 Intenta buscar primero con <code>/search {search_term}</code>",
+                    f"😔 No encontré '{_e(search_term)}' en tu biblioteca.\n\n"
+                    f"💡 Intenta buscar primero con <code>/search {_e(search_term)}</code>",
                     parse_mode="HTML",
                 )
                 return
@@ -433,31 +749,29 @@ Escríbeme directamente sin usar comandos:
             text = (
                 f"✅ <b>Enlace compartido creado</b>\n\n"
                 f"{'📀' if result.share_type == 'álbum' else '🎵' if result.share_type == 'canción' else '🎤'} "
-                f"{result.found_name}\n"
+                f"{_e(result.found_name)}\n"
                 f"📦 <b>{result.item_count}</b> {'canción' if result.item_count == 1 else 'canciones'}\n\n"
                 f"🔗 <b>Enlace del share:</b>\n<code>{result.url}</code>\n\n"
                 f"📋 Tipo: {result.share_type} · ID: <code>{result.id}</code>\n"
                 f"✨ Enlace público sin autenticación"
             )
             if result.used_flexible_search:
-                text += f"\n\nℹ️ <i>Búsqueda flexible activada para '{search_term}'</i>"
+                text += f"\n\nℹ️ <i>Búsqueda flexible activada para '{_e(search_term)}'</i>"
 
             await update.message.reply_text(text, parse_mode="HTML")
 
         except Exception as e:
-            print(f"❌ Error en share_command: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error en share_command")
             await update.message.reply_text(f"❌ Error creando enlace: {e}")
 
     @_check_authorization
     async def nowplaying_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        await update.message.reply_text("🎵 Consultando reproducción actual...")
+        status_msg = await update.message.reply_text("🎵 Consultando reproducción actual...")
         try:
             response = await self.assistant._agent_query(
                 "¿Qué estoy escuchando ahora?", update.effective_user.id
             )
-            await self._send_response(update, response)
+            await self._send_response(update, response, status_msg)
         except Exception as e:
             await update.message.reply_text(f"❌ Error obteniendo reproducción: {e}")
 
@@ -465,12 +779,7 @@ Escríbeme directamente sin usar comandos:
     @track_analytics("analytics")
     async def analytics_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = update.effective_user.id
-        admin_ids = [
-            int(uid.strip())
-            for uid in os.getenv("TELEGRAM_ADMIN_USER_IDS", "").split(",")
-            if uid.strip()
-        ]
-        if admin_ids and user_id not in admin_ids:
+        if self.admin_user_ids and user_id not in self.admin_user_ids:
             await update.message.reply_text(
                 "🚫 <b>Acceso Denegado</b>\n\nEste comando solo está disponible para administradores.",
                 parse_mode="HTML",
@@ -487,22 +796,26 @@ Escríbeme directamente sin usar comandos:
             metrics = insights.get("metrics", {})
             performance = insights.get("performance", {})
 
-            text = "📊 <b>Analytics del Sistema</b>\n\n"
-            text += f"🕐 <b>Período:</b> Últimas {metrics.get('period_hours', 24)} horas\n"
-            text += f"👥 <b>Usuarios únicos:</b> {metrics.get('unique_users', 0)}\n"
-            text += f"🔄 <b>Total interacciones:</b> {metrics.get('total_interactions', 0)}\n"
-            text += f"✅ <b>Tasa de éxito:</b> {metrics.get('success_rate', 0):.1f}%\n"
-            text += f"⚡ <b>Tiempo promedio:</b> {metrics.get('average_duration_ms', 0):.0f}ms\n"
-            text += f"💾 <b>Cache hit rate:</b> {metrics.get('cache_hit_rate', 0):.1f}%\n\n"
+            parts = [
+                "📊 <b>Analytics del Sistema</b>\n\n",
+                f"🕐 <b>Período:</b> Últimas {metrics.get('period_hours', 24)} horas\n",
+                f"👥 <b>Usuarios únicos:</b> {metrics.get('unique_users', 0)}\n",
+                f"🔄 <b>Total interacciones:</b> {metrics.get('total_interactions', 0)}\n",
+                f"✅ <b>Tasa de éxito:</b> {metrics.get('success_rate', 0):.1f}%\n",
+                f"⚡ <b>Tiempo promedio:</b> {metrics.get('average_duration_ms', 0):.0f}ms\n",
+                f"💾 <b>Cache hit rate:</b> {metrics.get('cache_hit_rate', 0):.1f}%\n\n",
+            ]
 
             interactions = metrics.get("interactions_by_type", {})
             if interactions:
-                text += "📈 <b>Interacciones por tipo:</b>\n"
-                for t, count in sorted(interactions.items(), key=lambda x: x[1], reverse=True):
-                    text += f"• {t}: {count}\n"
+                parts.append("📈 <b>Interacciones por tipo:</b>\n")
+                parts.extend(
+                    f"• {t}: {count}\n"
+                    for t, count in sorted(interactions.items(), key=lambda x: x[1], reverse=True)
+                )
 
-            text += f"\n🕐 <i>Actualizado: {insights.get('timestamp', 'N/A')}</i>"
-            await update.message.reply_text(text, parse_mode="HTML")
+            parts.append(f"\n🕐 <i>Actualizado: {insights.get('timestamp', 'N/A')}</i>")
+            await update.message.reply_text("".join(parts), parse_mode="HTML")
 
         except Exception as e:
             await update.message.reply_text(f"❌ Error obteniendo analytics: {e}")
@@ -517,39 +830,45 @@ Escríbeme directamente sin usar comandos:
                 await update.message.reply_text(f"❌ Error: {insights['error']}")
                 return
 
-            text = "🧠 <b>Insights de Aprendizaje Personalizado</b>\n\n"
             score = insights.get("personalization_score", 0)
-            text += f"🎯 <b>Nivel de personalización:</b> {score:.1%}\n"
+            parts = [
+                "🧠 <b>Insights de Aprendizaje Personalizado</b>\n\n",
+                f"🎯 <b>Nivel de personalización:</b> {score:.1%}\n",
+            ]
 
             preferences = insights.get("preferences", {})
             if preferences:
-                text += "\n📊 <b>Preferencias detectadas:</b>\n"
-                for feature, values in preferences.items():
-                    if values:
-                        text += f"• <b>{feature.title()}:</b> {', '.join([v[0] for v in values[:3]])}\n"
+                parts.append("\n📊 <b>Preferencias detectadas:</b>\n")
+                parts.extend(
+                    f"• <b>{feature.title()}:</b> {', '.join(v[0] for v in values[:3])}\n"
+                    for feature, values in preferences.items()
+                    if values
+                )
 
             patterns = insights.get("patterns", [])
             if patterns:
-                text += "\n🔍 <b>Patrones detectados:</b>\n"
-                for p in patterns:
-                    text += f"• {p.get('type', '').replace('_', ' ').title()}: {p.get('confidence', 0):.1%}\n"
+                parts.append("\n🔍 <b>Patrones detectados:</b>\n")
+                parts.extend(
+                    f"• {p.get('type', '').replace('_', ' ').title()}: {p.get('confidence', 0):.1%}\n"
+                    for p in patterns
+                )
 
             suggestions = insights.get("improvement_suggestions", [])
             if suggestions:
-                text += "\n💡 <b>Sugerencias:</b>\n"
-                for s in suggestions:
-                    text += f"• {s}\n"
+                parts.append("\n💡 <b>Sugerencias:</b>\n")
+                parts.extend(f"• {s}\n" for s in suggestions)
 
-            text += f"\n📈 Interacciones: {insights.get('total_feedback', 0)}"
+            parts.append(f"\n📈 Interacciones: {insights.get('total_feedback', 0)}")
             if score < 0.3:
-                text += "\n\n💡 <i>Tip: Usa ❤️/👎 en las recomendaciones para mejorar la personalización</i>"
+                parts.append("\n\n💡 <i>Tip: Usa ❤️/👎 en las recomendaciones para mejorar la personalización</i>")
 
-            await update.message.reply_text(text, parse_mode="HTML")
+            await update.message.reply_text("".join(parts), parse_mode="HTML")
         except Exception as e:
             await update.message.reply_text(f"❌ Error obteniendo insights: {e}")
 
     @_check_authorization
     @track_analytics("hybrid")
+    @_requires_music_service()
     async def hybrid_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("🎯 Generando recomendaciones híbridas avanzadas...")
         try:
@@ -565,24 +884,19 @@ Escríbeme directamente sin usar comandos:
                 await update.message.reply_text("❌ No se pudieron generar recomendaciones híbridas.")
                 return
 
-            text = "🎯 <b>Recomendaciones Híbridas Avanzadas</b>\n\n"
-            for i, rec in enumerate(recommendations[:5], 1):
-                text += f"{i}. <b>{rec.track.title}</b> - {rec.track.artist}\n"
-                text += f"   🎵 {rec.reasoning}\n"
-                text += f"   📊 Confianza: {rec.confidence:.1%}\n"
-                strategy_tags = [t for t in rec.tags if t.startswith("hybrid:")]
-                if strategy_tags:
-                    text += f"   🔧 Estrategia: {strategy_tags[0].split(':')[1]}\n"
-                text += "\n"
-            if len(recommendations) > 5:
-                text += f"... y {len(recommendations) - 5} más\n"
-            text += "\n💡 <i>Combinando múltiples estrategias de IA</i>"
+            text = self._render_recommendations(
+                recommendations,
+                header="🎯 <b>Recomendaciones Híbridas Avanzadas</b>",
+                footer="Combinando múltiples estrategias de IA",
+                describe_tags=_hybrid_strategy_line,
+            )
             await update.message.reply_text(text, parse_mode="HTML")
         except Exception as e:
             await update.message.reply_text(f"❌ Error generando recomendaciones híbridas: {e}")
 
     @_check_authorization
     @track_analytics("profile")
+    @_requires_music_service()
     async def profile_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("🧠 Analizando tu perfil musical avanzado...")
         try:
@@ -598,43 +912,46 @@ Escríbeme directamente sin usar comandos:
                 await update.message.reply_text(f"❌ Error: {advanced_profile['error']}")
                 return
 
-            text = "🧠 <b>Tu Perfil Musical Avanzado</b>\n\n"
+            parts = ["🧠 <b>Tu Perfil Musical Avanzado</b>\n\n"]
             personality = advanced_profile.get("personality", {})
             if personality:
-                text += "🎭 <b>Personalidad Musical:</b>\n"
-                for trait, score in personality.get("traits", {}).items():
-                    if score > 0.3:
-                        text += f"• {trait.replace('_', ' ').title()}: {score:.1%}\n"
-                text += f"\n🔍 <b>Descubrimiento:</b> {personality.get('discovery_rate', 0):.1%}\n"
-                text += f"👥 <b>Influencia Social:</b> {personality.get('social_influence', 0):.1%}\n\n"
+                parts.append("🎭 <b>Personalidad Musical:</b>\n")
+                parts.extend(
+                    f"• {trait.replace('_', ' ').title()}: {score:.1%}\n"
+                    for trait, score in personality.get("traits", {}).items()
+                    if score > 0.3
+                )
+                parts.append(f"\n🔍 <b>Descubrimiento:</b> {personality.get('discovery_rate', 0):.1%}\n")
+                parts.append(f"👥 <b>Influencia Social:</b> {personality.get('social_influence', 0):.1%}\n\n")
 
             prefs = advanced_profile.get("contextual_preferences", [])
             if prefs:
-                text += "🎯 <b>Preferencias Contextuales:</b>\n"
+                parts.append("🎯 <b>Preferencias Contextuales:</b>\n")
                 for p in prefs[:3]:
                     ctx = p["context"].replace("_", " ").title()
                     genres = ", ".join(p["preferred_genres"][:3])
-                    text += f"• {ctx}: {genres}\n"
-                text += "\n"
+                    parts.append(f"• {ctx}: {genres}\n")
+                parts.append("\n")
 
             li = advanced_profile.get("learning_insights", {})
             if li:
-                text += f"📊 <b>Personalización:</b> {li.get('personalization_score', 0):.1%}\n"
-                text += f"💬 <b>Interacciones:</b> {li.get('total_feedback', 0)}\n\n"
+                parts.append(f"📊 <b>Personalización:</b> {li.get('personalization_score', 0):.1%}\n")
+                parts.append(f"💬 <b>Interacciones:</b> {li.get('total_feedback', 0)}\n\n")
 
             mp = advanced_profile.get("music_preferences", {})
             if mp:
-                text += "🎵 <b>Estadísticas Musicales:</b>\n"
-                text += f"• Géneros únicos: {mp.get('genre_diversity', 0)}\n"
-                text += f"• Artistas únicos: {mp.get('artist_diversity', 0)}\n"
+                parts.append("🎵 <b>Estadísticas Musicales:</b>\n")
+                parts.append(f"• Géneros únicos: {mp.get('genre_diversity', 0)}\n")
+                parts.append(f"• Artistas únicos: {mp.get('artist_diversity', 0)}\n")
 
-            text += f"\n🕐 <i>Actualizado: {advanced_profile.get('last_updated', 'N/A')}</i>"
-            await update.message.reply_text(text, parse_mode="HTML")
+            parts.append(f"\n🕐 <i>Actualizado: {advanced_profile.get('last_updated', 'N/A')}</i>")
+            await update.message.reply_text("".join(parts), parse_mode="HTML")
         except Exception as e:
             await update.message.reply_text(f"❌ Error analizando perfil: {e}")
 
     @_check_authorization
     @track_analytics("discover")
+    @_requires_music_service()
     async def discover_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("🔍 Descubriendo nueva música para ti...")
         try:
@@ -652,18 +969,12 @@ Escríbeme directamente sin usar comandos:
 
             self.assistant.ai.track_user_activity(update.effective_user.id, "recommendation_given")
 
-            text = "🔍 <b>Descubrimientos Musicales</b>\n\n"
-            for i, rec in enumerate(recommendations[:5], 1):
-                text += f"{i}. <b>{rec.track.title}</b> - {rec.track.artist}\n"
-                text += f"   🎵 {rec.reasoning}\n"
-                text += f"   📊 Confianza: {rec.confidence:.1%}\n"
-                dtags = [t for t in rec.tags if t in ["discovery", "serendipity", "similar_artists", "genre_exploration"]]
-                if dtags:
-                    text += f"   🔍 Tipo: {', '.join(dtags)}\n"
-                text += "\n"
-            if len(recommendations) > 5:
-                text += f"... y {len(recommendations) - 5} más\n"
-            text += "\n💡 <i>Basados en tus gustos y patrones de escucha</i>"
+            text = self._render_recommendations(
+                recommendations,
+                header="🔍 <b>Descubrimientos Musicales</b>",
+                footer="Basados en tus gustos y patrones de escucha",
+                describe_tags=_discovery_type_line,
+            )
             await update.message.reply_text(text, parse_mode="HTML")
         except Exception as e:
             await update.message.reply_text(f"❌ Error descubriendo música: {e}")
@@ -678,14 +989,15 @@ Escríbeme directamente sin usar comandos:
                 await update.message.reply_text("❌ No hay datos de clasificación disponibles.")
                 return
 
-            text = "🏆 <b>Tabla de Clasificación Musicalo</b>\n\n"
             medals = {1: "🥇", 2: "🥈", 3: "🥉"}
-            for entry in leaderboard:
-                rank = entry["rank"]
-                medal = medals.get(rank, "🏅")
-                text += f"{medal} <b>#{rank}</b> - Nivel {entry['level']} ({entry['experience_points']} pts)\n"
-            text += f"\n💡 <i>Usa el bot más para subir en la clasificación</i>"
-            await update.message.reply_text(text, parse_mode="HTML")
+            parts = ["🏆 <b>Tabla de Clasificación Musicalo</b>\n\n"]
+            parts.extend(
+                f"{medals.get(entry['rank'], '🏅')} <b>#{entry['rank']}</b> - "
+                f"Nivel {entry['level']} ({entry['experience_points']} pts)\n"
+                for entry in leaderboard
+            )
+            parts.append("\n💡 <i>Usa el bot más para subir en la clasificación</i>")
+            await update.message.reply_text("".join(parts), parse_mode="HTML")
         except Exception as e:
             await update.message.reply_text(f"❌ Error obteniendo clasificación: {e}")
 
@@ -701,21 +1013,23 @@ Escríbeme directamente sin usar comandos:
             health_score = health_status.get("health_score", 0)
             status_emoji = {"healthy": "✅", "degraded": "⚠️"}.get(status, "❌")
 
-            text = "🏥 <b>Estado de Salud del Sistema</b>\n\n"
-            text += f"{status_emoji} <b>Estado:</b> {status.title()}\n"
-            text += f"📊 <b>Puntuación:</b> {health_score}/100\n\n"
+            parts = [
+                "🏥 <b>Estado de Salud del Sistema</b>\n\n",
+                f"{status_emoji} <b>Estado:</b> {status.title()}\n",
+                f"📊 <b>Puntuación:</b> {health_score}/100\n\n",
+            ]
 
             for svc, info in health_status.get("circuit_breakers", {}).items():
                 state = info.get("state", "unknown")
                 icon = {"OPEN": "🔴", "HALF_OPEN": "🟡"}.get(state, "🟢")
-                text += f"{icon} {svc}: {state}\n"
+                parts.append(f"{icon} {svc}: {state}\n")
 
             recent_errors = health_status.get("recent_errors", {})
             if recent_errors:
-                text += f"\n📈 <b>Errores (24h):</b> {recent_errors.get('total_errors', 0)}\n"
+                parts.append(f"\n📈 <b>Errores (24h):</b> {recent_errors.get('total_errors', 0)}\n")
 
-            text += f"\n🕐 <i>Actualizado: {datetime.now().strftime('%H:%M:%S')}</i>"
-            await update.message.reply_text(text, parse_mode="HTML")
+            parts.append(f"\n🕐 <i>Actualizado: {datetime.now().strftime('%H:%M:%S')}</i>")
+            await update.message.reply_text("".join(parts), parse_mode="HTML")
         except Exception as e:
             await update.message.reply_text(f"❌ Error obteniendo estado de salud: {e}")
 
@@ -728,122 +1042,135 @@ Escríbeme directamente sin usar comandos:
         query = update.callback_query
         await query.answer()
         data = query.data
-        user_id = query.from_user.id
-        print(f"🔘 Botón presionado: {data}")
+        logger.debug("🔘 Botón presionado: %s", data)
 
         try:
-            if data.startswith("like_"):
-                await self.assistant.process_feedback(user_id, data.split("_", 1)[1], "like")
-                await query.edit_message_text("❤️ ¡Gracias! He registrado que te gusta esta recomendación.")
-
-            elif data.startswith("dislike_"):
-                await self.assistant.process_feedback(user_id, data.split("_", 1)[1], "dislike")
-                await query.edit_message_text("👎 Entendido. Evitaré recomendaciones similares.")
-
-            elif data == "more_recommendations":
-                await query.edit_message_text("🔄 Generando más recomendaciones...")
-                result = await self.assistant._agent_query(
-                    "Recomiéndame 5 canciones diferentes basándote en mis gustos", user_id
-                )
-                text = f"🎵 <b>Nuevas recomendaciones para ti:</b>\n\n{result.text}"
-                keyboard = InlineKeyboardMarkup([
-                    [InlineKeyboardButton("❤️ Me gusta", callback_data="like_rec"),
-                     InlineKeyboardButton("👎 No me gusta", callback_data="dislike_rec")],
-                    [InlineKeyboardButton("🔄 Más recomendaciones", callback_data="more_recommendations")],
-                ])
-                await query.edit_message_text(text, reply_markup=keyboard, parse_mode="HTML")
-
-            elif data.startswith("library_"):
-                category = data.split("_", 1)[1]
-                if category == "search":
-                    await query.edit_message_text(
-                        "🔍 Usa <code>/search &lt;término&gt;</code> para buscar música",
-                        parse_mode="HTML",
-                    )
-                else:
-                    await query.edit_message_text(f"📚 Cargando {category}...")
-                    response = await self.assistant.get_library_items(category)
-                    await query.edit_message_text(response.text, parse_mode="HTML")
-
-            elif data == "daily_activity":
-                await query.edit_message_text("📈 Calculando actividad diaria...")
-                activity = await self.assistant.get_listening_activity(days=30)
-                text = "📈 <b>Actividad de los últimos 30 días</b>\n\n"
-                if activity:
-                    text += f"📊 Días activos: {activity.get('total_days', 0)}\n"
-                    text += f"📊 Promedio diario: {activity.get('avg_daily_listens', 0):.1f} escuchas\n"
-                else:
-                    text += "⚠️ No hay datos de actividad disponibles"
-                await query.edit_message_text(text, parse_mode="HTML")
-
-            elif data == "favorite_genres":
-                await query.edit_message_text(
-                    "🎯 <b>Géneros favoritos</b>\n\n⚠️ Funcionalidad en desarrollo",
-                    parse_mode="HTML",
-                )
-
-            elif data == "refresh_stats":
-                await query.edit_message_text("🔄 Actualizando estadísticas...")
-                stats = await self.assistant.get_user_stats_summary()
-                recent = await self.assistant.music_service.get_recent_tracks(limit=1) if self.assistant.music_service else []
-                top_artists = await self.assistant.music_service.get_top_artists(limit=5) if self.assistant.music_service else []
-
-                text = "📊 <b>Tus Estadísticas Musicales</b> (Actualizado)\n\n"
-                text += f"🎵 <b>Total de escuchas:</b> {stats.get('total_listens', 'N/A')}\n"
-                text += f"🎤 <b>Artistas únicos:</b> {stats.get('total_artists', 'N/A')}\n"
-                text += f"📀 <b>Álbumes únicos:</b> {stats.get('total_albums', 'N/A')}\n"
-                text += f"🎼 <b>Canciones únicas:</b> {stats.get('total_tracks', 'N/A')}\n\n"
-                if top_artists:
-                    text += "🏆 <b>Top 5 Artistas:</b>\n"
-                    for i, a in enumerate(top_artists, 1):
-                        text += f"{i}. {a.name} ({a.playcount} escuchas)\n"
-                if recent:
-                    text += f"\n⏰ <b>Última escucha:</b>\n{recent[0].artist} - {recent[0].name}\n"
-
-                keyboard = InlineKeyboardMarkup([
-                    [InlineKeyboardButton("📈 Actividad diaria", callback_data="daily_activity")],
-                    [InlineKeyboardButton("🎯 Géneros favoritos", callback_data="favorite_genres")],
-                    [InlineKeyboardButton("🔄 Actualizar", callback_data="refresh_stats")],
-                ])
-                await query.edit_message_text(text, reply_markup=keyboard, parse_mode="HTML")
-
-            elif data.startswith("stats_"):
-                period = data.replace("stats_", "")
-                period_names = {
-                    "this_week": "Esta Semana", "this_month": "Este Mes",
-                    "this_year": "Este Año", "last_week": "Semana Pasada",
-                    "last_month": "Mes Pasado", "last_year": "Año Pasado",
-                    "all_time": "Todo el Tiempo",
-                }
-                period_name = period_names.get(period, "Este Mes")
-                await query.edit_message_text(f"📊 Calculando estadísticas de <b>{period_name}</b>...", parse_mode="HTML")
-
-                response = await self.assistant.get_stats_for_period(period)
-                keyboard = InlineKeyboardMarkup([
-                    [InlineKeyboardButton("📅 Esta Semana", callback_data="stats_this_week"),
-                     InlineKeyboardButton("📆 Este Mes", callback_data="stats_this_month")],
-                    [InlineKeyboardButton("📋 Este Año", callback_data="stats_this_year"),
-                     InlineKeyboardButton("🌟 Todo el Tiempo", callback_data="stats_all_time")],
-                    [InlineKeyboardButton("⏮️ Mes Pasado", callback_data="stats_last_month"),
-                     InlineKeyboardButton("⏮️ Año Pasado", callback_data="stats_last_year")],
-                ])
-                await query.edit_message_text(response.text, reply_markup=keyboard, parse_mode="HTML")
-
-            elif data.startswith("play_"):
-                await query.edit_message_text("🎵 Abriendo en Navidrome...\n\n⚠️ Funcionalidad en desarrollo")
-
+            # Coincidencia exacta ("refresh_stats") o por prefijo ("library_albums_p2")
+            handler = self._callback_handlers.get(data)
+            arg = ""
+            if handler is None:
+                prefix, _, arg = data.partition("_")
+                handler = self._callback_handlers.get(prefix)
+            if handler is None:
+                await self._edit_message(query, f"⚠️ Opción no implementada: {data}")
             else:
-                await query.edit_message_text(f"⚠️ Opción no implementada: {data}")
+                await handler(query, context, arg)
 
         except Exception as e:
-            print(f"❌ Error en callback: {type(e).__name__}: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error en callback %s", data)
             try:
                 await query.edit_message_text(f"❌ Error: {e}")
             except Exception:
                 pass
 
+    async def _cb_like(self, query, context: ContextTypes.DEFAULT_TYPE, token: str):
+        """like_<token>: feedback positivo sobre una lista de recomendaciones"""
+        await self.assistant.process_feedback(query.from_user.id, token, "like")
+        await self._edit_message(query, _LIKE_ACK_MSG)
+
+    async def _cb_dislike(self, query, context: ContextTypes.DEFAULT_TYPE, token: str):
+        """dislike_<token>: feedback negativo sobre una lista de recomendaciones"""
+        await self.assistant.process_feedback(query.from_user.id, token, "dislike")
+        await self._edit_message(query, _DISLIKE_ACK_MSG)
+
+    async def _cb_more_recommendations(self, query, context: ContextTypes.DEFAULT_TYPE, _: str):
+        """more_recommendations: nueva tanda de recomendaciones del agente"""
+        await self._edit_message(query, "🔄 Generando más recomendaciones...")
+        result = await self.assistant._agent_query(
+            "Recomiéndame 5 canciones diferentes basándote en mis gustos", query.from_user.id
+        )
+        text = f"🎵 <b>Nuevas recomendaciones para ti:</b>\n\n{result.text}"
+        await self._edit_message(query, text, reply_markup=_REC_INLINE_KEYBOARD, parse_mode="HTML")
+
+    async def _cb_library(self, query, context: ContextTypes.DEFAULT_TYPE, arg: str):
+        """library_<categoría>[_p<página>]: página de la biblioteca"""
+        category, sep, page_str = arg.rpartition("_p")
+        if not sep:
+            category, page_str = arg, ""
+        page = int(page_str) if page_str.isdigit() else 1
+        if category == "search":
+            await self._edit_message(query, _LIBRARY_SEARCH_MSG, parse_mode="HTML")
+        else:
+            await self._edit_message(query, f"📚 Cargando {category}...")
+            response = await self.assistant.get_library_items(category, page=page)
+            await self._edit_message(
+                query, response.text,
+                reply_markup=self._actions_to_keyboard(response.actions),
+                parse_mode="HTML",
+            )
+
+    async def _cb_daily_activity(self, query, context: ContextTypes.DEFAULT_TYPE, _: str):
+        """daily_activity: resumen de actividad de los últimos 30 días"""
+        await self._edit_message(query, "📈 Calculando actividad diaria...")
+        activity = await self.assistant.get_listening_activity(days=30)
+        if activity:
+            body = (
+                f"📊 Días activos: {activity.get('total_days', 0)}\n"
+                f"📊 Promedio diario: {activity.get('avg_daily_listens', 0):.1f} escuchas\n"
+            )
+        else:
+            body = "⚠️ No hay datos de actividad disponibles"
+        await self._edit_message(
+            query, f"📈 <b>Actividad de los últimos 30 días</b>\n\n{body}", parse_mode="HTML"
+        )
+
+    async def _cb_favorite_genres(self, query, context: ContextTypes.DEFAULT_TYPE, _: str):
+        """favorite_genres: pendiente de implementar"""
+        await self._edit_message(query, _FAVORITE_GENRES_WIP_MSG, parse_mode="HTML")
+
+    async def _cb_refresh_stats(self, query, context: ContextTypes.DEFAULT_TYPE, _: str):
+        """refresh_stats: recalcula el resumen de estadísticas
+
+        Sin mensaje intermedio: si los datos no cambian, no se edita nada.
+        """
+        if self.assistant.music_service:
+            # Las tres peticiones son independientes: una sola espera de red
+            stats, recent, top_artists = await asyncio.gather(
+                self.assistant.get_user_stats_summary(),
+                self.assistant.get_recent_tracks(limit=1),
+                self.assistant.get_top_artists(limit=5),
+                return_exceptions=True,
+            )
+            if isinstance(stats, Exception):
+                logger.warning("Error obteniendo estadísticas: %s", stats)
+                stats = {}
+            if isinstance(recent, Exception):
+                recent = []
+            if isinstance(top_artists, Exception):
+                top_artists = []
+        else:
+            stats, recent, top_artists = {}, [], []
+
+        parts = [
+            "📊 <b>Tus Estadísticas Musicales</b> (Actualizado)\n\n",
+            f"🎵 <b>Total de escuchas:</b> {stats.get('total_listens', 'N/A')}\n",
+            f"🎤 <b>Artistas únicos:</b> {stats.get('total_artists', 'N/A')}\n",
+            f"📀 <b>Álbumes únicos:</b> {stats.get('total_albums', 'N/A')}\n",
+            f"🎼 <b>Canciones únicas:</b> {stats.get('total_tracks', 'N/A')}\n\n",
+        ]
+        if top_artists:
+            parts.append("🏆 <b>Top 5 Artistas:</b>\n")
+            parts.extend(
+                f"{i}. {_e(a.name)} ({a.playcount} escuchas)\n" for i, a in enumerate(top_artists, 1)
+            )
+        if recent:
+            parts.append(f"\n⏰ <b>Última escucha:</b>\n{_e(recent[0].artist)} - {_e(recent[0].name)}\n")
+        text = "".join(parts)
+
+        await self._edit_message(query, text, reply_markup=_STATS_INLINE_KEYBOARD, parse_mode="HTML")
+
+    async def _cb_stats(self, query, context: ContextTypes.DEFAULT_TYPE, period: str):
+        """stats_<periodo>: estadísticas de un periodo concreto"""
+        period_name = STATS_PERIOD_NAMES.get(period, "Este Mes")
+        await self._edit_message(query, f"📊 Calculando estadísticas de <b>{period_name}</b>...", parse_mode="HTML")
+
+        response = await self.assistant.get_stats_for_period(period)
+        await self._edit_message(query, response.text, reply_markup=_STATS_PERIOD_KEYBOARD, parse_mode="HTML")
+
+    async def _cb_play(self, query, context: ContextTypes.DEFAULT_TYPE, _: str):
+        """play_<id>: pendiente de implementar"""
+        await self._edit_message(query, _PLAY_WIP_MSG)
+
     # ------------------------------------------------------------------
     # Mensajes de texto libre
     # ------------------------------------------------------------------
@@ -854,25 +1181,36 @@ Escríbeme directamente sin usar comandos:
         user_id = update.effective_user.id
         waiting_msg = await update.message.reply_text("🤔 Analizando tu mensaje...")
 
+        # Streaming del agente: el mensaje de espera muestra el texto según se
+        # genera, como mucho una edición por segundo (límites de Telegram) y
+        # cortado en el último fin de frase/línea, sin palabras ni etiquetas a medias
+        last_edit = {"at": 0.0, "shown": 0}
+
+        async def on_partial(text: str):
+            now = time.monotonic()
+            if now - last_edit["at"] < 1.0 or len(text) > _MAX_MESSAGE_LENGTH:
+                return
+            cut = max(text.rfind(". "), text.rfind("\n"), text.rfind("! "), text.rfind("? "))
+            shown = text[:cut + 1] if cut > 0 else text
+            if len(shown) <= last_edit["shown"]:
+                return
+            last_edit.update(at=now, shown=len(shown))
+            try:
+                await waiting_msg.edit_text(f"{shown.rstrip()} ▌", parse_mode="HTML")
+            except TelegramError as e:
+                # HTML aún sin cerrar, timeout, red...: la vista previa es cosmética
+                # y no debe tirar una respuesta que Gemini ya está generando
+                logger.debug("Vista previa no enviada: %s", e)
+
         try:
-            print(f"💬 Usuario {user_id}: {user_message}")
-            response = await self.assistant.chat(user_id, user_message)
-            await waiting_msg.delete()
-            await self._send_response(update, response)
+            logger.debug("💬 Usuario %s: %s", user_id, user_message)
+            response = await self.assistant.chat(user_id, user_message, on_partial=on_partial)
+            await self._send_response(update, response, waiting_msg)
 
         except Exception as e:
-            print(f"❌ Error en handle_message: {type(e).__name__}: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error en handle_message")
             try:
-                await waiting_msg.edit_text(
-                    f"❌ Error procesando tu mensaje: {e}\n\n"
-                    "💡 Puedes usar comandos directos:\n"
-                    "• /recommend - Recomendaciones\n"
-                    "• /search <término> - Buscar música\n"
-                    "• /stats - Estadísticas\n"
-                    "• /playlist <descripción> - Crear playlist"
-                )
+                await waiting_msg.edit_text(f"❌ Error procesando tu mensaje: {e}\n\n{_HELP_FALLBACK}")
             except Exception:
                 await update.message.reply_text(
                     "❌ Hubo un error. Usa /help para ver los comandos disponibles."
@@ -21,6 +21,16 @@ PORT = int(os.getenv("PORT", "8000"))
 HOST = os.getenv("HOST", "0.0.0.0")
 
 
+def install_uvloop():
+    """Usa uvloop como event loop si está disponible (no existe en Windows)."""
+    try:
+        import uvloop
+    except ImportError:
+        return
+    uvloop.install()
+    print("⚡ Event loop: uvloop")
+
+
 def run_telegram():
     from bot import main
     print("📱 Modo: Telegram bot")
@@ -60,6 +70,8 @@ if __name__ == "__main__":
     print("🎵 Iniciando Musicalo...")
     print("-" * 50)
 
+    install_uvloop()
+
     try:
         if MODE == "telegram":
             run_telegram()